@@ -0,0 +1,129 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Time spent fitting the model of a `CausalImpact` analysis for each fitting option,
+compared to the first one of `CONFIGS`, and number of Kalman filter (or smoother)
+passes it takes:
+
+    python benchmarks/bench_fit.py --points 365 --covariates 2 --period 7
+
+With `--harmonics auto` the number of harmonics is chosen from the data.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.statespace.kalman_filter import KalmanFilter
+
+from causalimpact import CausalImpact
+
+# Name and arguments sent to `CausalImpact` of each benchmarked option.
+CONFIGS = [
+    ('with covariance', {'cov_type': 'opg'}),
+    ('default', {}),
+    ('filter', {'fit_method': 'filter'}),
+    ('unbounded level', {'prior_level_sd': None}),
+    ('concentrated', {'prior_level_sd': None, 'concentrate_scale': True}),
+    ('concentrated bounded', {'concentrate_scale': True}),
+    ('analytic score', {'analytic_score': True}),
+    ('analytic score unbounded', {'prior_level_sd': None, 'analytic_score': True})
+]
+
+
+def make_data(n_points, n_covariates, period, seed=1):
+    rs = np.random.RandomState(seed)
+    X = rs.randn(n_points, n_covariates).cumsum(axis=0)
+    y = 10 + X.dot(rs.rand(n_covariates)) + rs.randn(n_points)
+    if period:
+        y += np.sin(2 * np.pi * np.arange(n_points) / period)
+    data = pd.DataFrame(X, columns=['x{}'.format(i) for i in range(n_covariates)])
+    data.insert(0, 'y', y)
+    return data
+
+
+def prepare(data, kwargs):
+    pre_period = [0, int(len(data) * .7) - 1]
+    post_period = [int(len(data) * .7), len(data) - 1]
+    ci = CausalImpact.__new__(CausalImpact)
+    ci._prepare(data, pre_period, post_period, None, 0.05, **kwargs)
+    return ci
+
+
+def time_fit(data, kwargs, repeat):
+    times = []
+    for _ in range(repeat):
+        ci = prepare(data, kwargs)
+        start = time.time()
+        ci._fit_model()
+        times.append(time.time() - start)
+    return np.median(times), ci.trained_model
+
+
+def count_passes(data, kwargs):
+    """Filter passes of one fit; smoother passes run the filter too."""
+    counter = [0]
+    original = KalmanFilter._filter
+
+    def _filter(self, *args, **kwargs):
+        counter[0] += 1
+        return original(self, *args, **kwargs)
+
+    ci = prepare(data, kwargs)
+    KalmanFilter._filter = _filter
+    try:
+        ci._fit_model()
+    finally:
+        KalmanFilter._filter = original
+    return counter[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, default=365)
+    parser.add_argument('--covariates', type=int, default=2)
+    parser.add_argument('--period', type=int, default=7,
+                        help='Period of the seasonal component; 0 for none.')
+    parser.add_argument('--harmonics', default=None,
+                        help='Harmonics of the seasonal component, a number or "auto"; '
+                             'floor(period / 2) by default.')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+    data = make_data(args.points, args.covariates, args.period)
+    nseasons = [{'period': args.period}] if args.period else []
+    if nseasons and args.harmonics:
+        harmonics = args.harmonics
+        nseasons[0]['harmonics'] = harmonics if harmonics == 'auto' else int(harmonics)
+    print('{} points, {} covariates, nseasons={}'.format(
+        args.points, args.covariates, nseasons))
+    header = ('option', 'seconds', 'speedup', 'passes', 'loglike')
+    print('{:<24} {:>9} {:>8} {:>7} {:>12}'.format(*header))
+    baseline = None
+    for name, kwargs in CONFIGS:
+        kwargs = dict(kwargs, nseasons=nseasons)
+        elapsed, results = time_fit(data, kwargs, args.repeat)
+        baseline = baseline or elapsed
+        print('{:<24} {:>9.4f} {:>7.2f}x {:>7} {:>12.3f}'.format(
+            name, elapsed, baseline / elapsed, count_passes(data, kwargs), results.llf))
+
+
+if __name__ == '__main__':
+    main()
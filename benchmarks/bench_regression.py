@@ -0,0 +1,89 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fit time of the default model with the regression coefficients as parameters
+(`mle_regression=True`) and as states (`mle_regression=False`), for several numbers
+of covariates, next to the times predicted by `causalimpact.cost.fit_cost` and the
+formulation chosen by `mle_regression='auto'`:
+
+    python benchmarks/bench_regression.py --points 100 365 1000 \\
+        --covariates 1 5 20 40 80 --analytic-score
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from causalimpact import CausalImpact
+from causalimpact.cost import choose_mle_regression, fit_cost, model_dimensions
+
+
+def make_data(n_points, n_covariates, seed=1):
+    rs = np.random.RandomState(seed)
+    X = rs.randn(n_points, n_covariates).cumsum(axis=0)
+    y = 10 + X.dot(rs.rand(n_covariates)) + 2 * rs.randn(n_points)
+    data = pd.DataFrame(X, columns=['x{}'.format(i) for i in range(n_covariates)])
+    data.insert(0, 'y', y)
+    return data
+
+
+def time_fit(data, kwargs):
+    ci = CausalImpact.__new__(CausalImpact)
+    ci._prepare(data, [0, len(data) - 11], [len(data) - 10, len(data) - 1], None, 0.05,
+                **kwargs)
+    start = time.time()
+    ci._fit_model()
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, nargs='+', default=[100, 365, 1000])
+    parser.add_argument('--covariates', type=int, nargs='+',
+                        default=[1, 5, 20, 40, 80])
+    parser.add_argument('--analytic-score', action='store_true')
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+    header = ('points', 'covariates', 'params', 'states', 'predicted params',
+              'predicted states', 'auto')
+    print('{:>6} {:>10} {:>9} {:>9} {:>16} {:>16} {:>7}'.format(*header))
+    for n_points in args.points:
+        for n_covariates in args.covariates:
+            data = make_data(n_points, n_covariates)
+            n_obs = n_points - 10
+            times, predicted = [], []
+            for mle_regression in [True, False]:
+                kwargs = {'mle_regression': mle_regression,
+                          'analytic_score': args.analytic_score}
+                times.append(time_fit(data, kwargs))
+                k_states, k_params = model_dimensions(n_covariates,
+                                                      mle_regression=mle_regression)
+                predicted.append(fit_cost(n_obs, k_states, k_params,
+                                          analytic_score=args.analytic_score))
+            auto = choose_mle_regression(n_obs, n_covariates,
+                                         analytic_score=args.analytic_score)
+            print('{:>6} {:>10} {:>9.3f} {:>9.3f} {:>16.3f} {:>16.3f} {:>7}'.format(
+                n_points, n_covariates, times[0], times[1], predicted[0], predicted[1],
+                'params' if auto else 'states'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput of `run_batch` for combinations of worker processes and native threads
+per worker, compared to the split chosen by `ThreadingPolicy`:
+
+    python benchmarks/bench_threads.py --units 32 --points 365
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from causalimpact.batch import iter_wide_units, run_batch
+from causalimpact.parallel import ThreadingPolicy, cpu_count
+
+
+def make_data(n_units, n_points, seed=1):
+    rs = np.random.RandomState(seed)
+    covariates = rs.randn(n_points, 2).cumsum(axis=0)
+    columns = dict(('unit_{}'.format(i), 10 + covariates.dot(rs.rand(2)) +
+                    rs.randn(n_points)) for i in range(n_units))
+    data = pd.DataFrame(columns)
+    data['x1'], data['x2'] = covariates[:, 0], covariates[:, 1]
+    return data
+
+
+def combinations(n_cpus):
+    sizes = sorted(set([1, 2, 4, n_cpus // 2, n_cpus]) - set([0]))
+    for n_jobs in sizes:
+        for threads in sizes:
+            if n_jobs * threads <= 2 * n_cpus:
+                yield n_jobs, threads
+
+
+def run(data, n_jobs, threads):
+    units = iter_wide_units(data, ['x1', 'x2'])
+    pre_period = [0, int(len(data) * .7) - 1]
+    post_period = [int(len(data) * .7), len(data) - 1]
+    start = time.time()
+    results = list(run_batch(units, pre_period, post_period, n_jobs=n_jobs,
+                             threads_per_worker=threads))
+    assert all(error is None for _, _, error in results)
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--units', type=int, default=32)
+    parser.add_argument('--points', type=int, default=365)
+    args = parser.parse_args(argv)
+    # Worker processes inherit the filter when they are forked.
+    warnings.simplefilter('ignore')
+    data = make_data(args.units, args.points)
+    n_cpus = cpu_count()
+    policy = ThreadingPolicy(n_tasks=args.units)
+    print('{} CPUs, {} units of {} points; default {!r}'.format(
+        n_cpus, args.units, args.points, policy))
+    header = ('processes', 'threads', 'seconds', 'units/s')
+    print('{:>9} {:>8} {:>9} {:>8}'.format(*header))
+    for n_jobs, threads in combinations(n_cpus):
+        elapsed = run(data, n_jobs, threads)
+        chosen = (n_jobs, threads) == (policy.n_jobs, policy.threads_per_worker)
+        marker = ' *' if chosen else ''
+        print('{:>9} {:>8} {:>9.2f} {:>8.2f}{}'.format(
+            n_jobs, threads, elapsed, args.units / elapsed, marker))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+asyncio support for running many Causal Impact analyses concurrently (Python 3.6+).
+
+Each analysis runs in three stages offloaded to an executor: validation plus fitting,
+simulation of the post-period responses and posterior inferences. Cancelling the task
+awaiting an analysis prevents the remaining stages from being started.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import asyncio
+import weakref
+
+from causalimpact.parallel import cpu_count
+
+
+def _fit_stage(cls, args, kwargs):
+    ci = cls.__new__(cls)
+    ci._prepare(*args, **kwargs)
+    ci._fit_model()
+    return ci
+
+
+def _simulation_stage(ci):
+    ci.simulated_y
+    return ci
+
+
+def _inferences_stage(ci):
+    ci._process_posterior_inferences()
+    return ci
+
+
+class AsyncRunner(object):
+    """
+    Runs Causal Impact analyses off the event loop while bounding how many of them run
+    at the same time, which avoids oversubscribing the BLAS threads used by numpy.
+
+    Args
+    ----
+      executor: `concurrent.futures.Executor`.
+          Where stages are run. `None` uses the default executor of the event loop.
+          Process executors from `causalimpact.parallel.ThreadingPolicy` limit the
+          native threads of each worker as well.
+      max_concurrency: int.
+          Maximum analyses running at once. `None` uses the number of CPUs.
+
+    Examples:
+    ---------
+      >>> policy = ThreadingPolicy(n_jobs=4)
+      >>> runner = AsyncRunner(policy.process_executor(), max_concurrency=policy.n_jobs)
+      >>> ci = await runner.run(data, pre_period, post_period)
+      >>> async for unit, ci, error in runner.run_batch(units, pre_period, post_period):
+      ...     print(unit, ci.p_value)
+    """
+    def __init__(self, executor=None, max_concurrency=None):
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1.')
+        self.executor = executor
+        self.max_concurrency = max_concurrency or cpu_count()
+        # Semaphores are bound to the event loop they are used in.
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _get_semaphore(self):
+        loop = asyncio.get_event_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def run(self, data, pre_period, post_period, model=None, alpha=0.05,
+                  executor=None, cls=None, **kwargs):
+        """
+        Runs one analysis.
+
+        Args
+        ----
+          executor: `concurrent.futures.Executor`.
+              Overrides the executor of the runner for this analysis.
+          cls: class of the analysis; defaults to `CausalImpact`.
+          Remaining arguments are the same as in `CausalImpact`.
+
+        Returns
+        -------
+          ci: processed `CausalImpact` object.
+        """
+        if cls is None:
+            from causalimpact.main import CausalImpact as cls
+        executor = executor if executor is not None else self.executor
+        loop = asyncio.get_event_loop()
+        async with self._get_semaphore():
+            ci = await loop.run_in_executor(
+                executor, _fit_stage, cls,
+                (data, pre_period, post_period, model, alpha), kwargs
+            )
+            ci = await loop.run_in_executor(executor, _simulation_stage, ci)
+            ci = await loop.run_in_executor(executor, _inferences_stage, ci)
+        return ci
+
+    async def run_batch(self, units, pre_period, post_period, alpha=0.05, **kwargs):
+        """
+        Runs one analysis per unit and yields them as they complete.
+
+        Args
+        ----
+          units: iterable of tuples.
+              (unit, data) pairs such as the ones built by
+              `causalimpact.batch.iter_wide_units`.
+          Remaining arguments are sent to `run`.
+
+        Returns
+        -------
+          async generator of tuples:
+            unit: object.
+            ci: processed `CausalImpact` or `None` if the analysis failed.
+            error: the raised exception or `None`.
+        """
+        async def run_unit(unit, data):
+            try:
+                ci = await self.run(data, pre_period, post_period, alpha=alpha,
+                                    **kwargs)
+            except Exception as err:
+                return unit, None, err
+            return unit, ci, None
+
+        tasks = [asyncio.ensure_future(run_unit(unit, data)) for unit, data in units]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+_default_runner = None
+
+
+def get_default_runner():
+    """Runner shared by all calls of `CausalImpact.arun` without explicit runner."""
+    global _default_runner
+    if _default_runner is None:
+        _default_runner = AsyncRunner()
+    return _default_runner
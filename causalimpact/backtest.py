@@ -0,0 +1,242 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Rolling-origin backtests of the default model over the pre-intervention period.
+
+Windows of the pre-intervention data are held out as if each one were the
+post-intervention period of an analysis without any effect, so the prediction
+intervals should cover the observed response as often as `1 - alpha` and the
+cumulative effect should be close to zero.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import copy
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from causalimpact.main import CausalImpact
+from causalimpact.parallel import ThreadingPolicy
+
+WINDOWS = ('expanding', 'rolling')
+COLUMNS = ['train_start', 'train_end', 'test_start', 'test_end', 'coverage',
+           'cum_error', 'cum_covered', 'rmse', 'error']
+
+
+def backtest_folds(n_obs, horizon, n_folds=5, window='expanding', min_train=None):
+    """
+    Positions of the training and held-out points of each fold. Held-out windows
+    are the last `n_folds` consecutive blocks of `horizon` points.
+
+    Args
+    ----
+      n_obs: int.
+          Number of pre-intervention points.
+      horizon: int.
+          Number of held-out points of each fold.
+      n_folds: int.
+      window: str.
+          "expanding" trains each fold on all points before its held-out window;
+          "rolling" trains all folds on as many points as the first fold.
+      min_train: int.
+          Minimum number of training points of the first fold. Defaults to
+          `horizon`.
+
+    Returns
+    -------
+      folds: list of (train, test) tuples of slices.
+
+    Raises
+    ------
+      ValueError: if `horizon` or `n_folds` is lower than 1.
+                  if `window` is not one of `WINDOWS`.
+                  if there are not enough points for the folds.
+    """
+    if horizon < 1 or n_folds < 1:
+        raise ValueError('horizon and n_folds must be at least 1.')
+    if window not in WINDOWS:
+        raise ValueError('window must be either "expanding" or "rolling".')
+    min_train = max(min_train or horizon, 4)
+    first_origin = n_obs - horizon * n_folds
+    if first_origin < min_train:
+        raise ValueError(
+            '{n_folds} folds of {horizon} points leave {n_train} training points, '
+            'less than the minimum of {min_train}.'.format(
+                n_folds=n_folds, horizon=horizon, n_train=max(first_origin, 0),
+                min_train=min_train))
+    folds = []
+    for origin in range(first_origin, n_obs, horizon):
+        start = origin - first_origin if window == 'rolling' else 0
+        folds.append((slice(start, origin), slice(origin, origin + horizon)))
+    return folds
+
+
+def backtest(data, pre_period, post_period, horizon, n_folds=5, window='expanding',
+             min_train=None, alpha=0.05, n_jobs=None, threads_per_worker=None,
+             **kwargs):
+    """
+    Fits the default model on each fold of the pre-intervention period and checks
+    the inferences on its held-out points.
+
+    Data is validated once and each fold takes a slice of it, standardized with the
+    mean and deviation of its own training points. Folds are split into as many
+    consecutive chains as workers and the fit of each fold starts from the parameters
+    of the previous fold of its chain.
+
+    Args
+    ----
+      data: numpy.array, pandas.DataFrame.
+      pre_period: list.
+      post_period: list.
+          Only validated, as in `CausalImpact`; it's never used by the folds.
+      horizon: int.
+          Number of held-out points of each fold.
+      n_folds: int.
+      window: str.
+          Either "expanding" or "rolling"; see `backtest_folds`.
+      min_train: int.
+          Minimum number of training points of the first fold.
+      alpha: float.
+      n_jobs: int.
+          Number of worker processes. If 1, folds run in the current process and if
+          `None` it's chosen by `causalimpact.parallel.ThreadingPolicy`.
+      threads_per_worker: int.
+          Native (BLAS/OpenMP) threads each worker may use.
+      kwargs: arguments of `CausalImpact` used by every fold, such as `nseasons` and
+          `prior_level_sd`. "auto" seasons are resolved once on the whole
+          pre-intervention period.
+
+    Returns
+    -------
+      folds: pandas DataFrame.
+          One row per fold with:
+            train_start, train_end, test_start, test_end: index labels bounding
+                the training and held-out points.
+            coverage: fraction of held-out points inside the prediction interval.
+            cum_error: observed minus predicted response summed over the held-out
+                points, the cumulative effect the analysis would report.
+            cum_covered: whether the cumulative response is inside its interval.
+            rmse: root mean squared prediction error.
+            error: reason why the fold failed, if so.
+
+    Examples:
+    ---------
+      >>> folds = backtest(data, pre_period, post_period, horizon=30, n_folds=4)
+      >>> folds[['coverage', 'cum_error']].mean()
+    """
+    base = CausalImpact.__new__(CausalImpact)
+    base._prepare(data, pre_period, post_period, None, alpha, **kwargs)
+    if base.model_args.get('mle_regression') == 'auto':
+        # All folds share the formulation so that parameters can be warm started.
+        base.model_args['mle_regression'] = base.model.mle_regression
+    folds = backtest_folds(len(base.pre_data), horizon, n_folds, window, min_train)
+    policy = ThreadingPolicy(n_jobs, threads_per_worker, n_tasks=len(folds))
+    chains = [[folds[idx] for idx in chain]
+              for chain in np.array_split(np.arange(len(folds)), policy.n_jobs)]
+    tasks = [(base, chain) for chain in chains]
+    results = policy.map(_run_chain, tasks)
+    return pd.DataFrame([row for rows in results for row in rows], columns=COLUMNS)
+
+
+def _run_chain(task):
+    """
+    Runs consecutive folds, warm starting each fit from the previous one. Used as the
+    worker function of `backtest`; failures are reported in the rows instead of
+    raised.
+
+    Args
+    ----
+      task: tuple.
+          (base, folds) where `base` is the prepared `CausalImpact` and `folds` a list
+          of (train, test) slices of its pre-intervention data.
+
+    Returns
+    -------
+      rows: list of OrderedDict.
+    """
+    base, folds = task
+    params = None
+    rows = []
+    for train, test in folds:
+        ci = _fold_model(base, train, test, params)
+        row = OrderedDict([
+            ('train_start', ci.pre_data.index[0]),
+            ('train_end', ci.pre_data.index[-1]),
+            ('test_start', ci.post_data.index[0]),
+            ('test_end', ci.post_data.index[-1])
+        ])
+        try:
+            ci._fit_model()
+            ci._compile_posterior_inferences()
+        except Exception as err:
+            row['error'] = '{name}: {err}'.format(name=type(err).__name__, err=err)
+            rows.append(row)
+            continue
+        params = np.asarray(ci.trained_model.params)
+        row.update(_fold_scores(ci))
+        row['error'] = None
+        rows.append(row)
+    return rows
+
+
+def _fold_model(base, train, test, params=None):
+    """
+    Builds the default model of one fold from the data already validated in `base`.
+
+    Args
+    ----
+      base: `CausalImpact` prepared with the backtest arguments.
+      train: slice of the training points in `base.pre_data`.
+      test: slice of the held-out points.
+      params: numpy array.
+          Parameters of the previous fold used as starting point of the fit.
+
+    Returns
+    -------
+      ci: `CausalImpact` ready to be fitted.
+    """
+    ci = copy.copy(base)
+    ci.pre_data = base.pre_data.iloc[train]
+    ci.post_data = base.pre_data.iloc[test]
+    model_args = dict(base.model_args)
+    # The coarse fit of `coarse_factor` gives the start of its folds instead.
+    warm_start = (params is not None and model_args.get('fit_method') != 'filter' and
+                  model_args.get('params') is None and
+                  model_args.get('coarse_factor') is None)
+    if warm_start:
+        model_args.setdefault('start_params', params)
+    # Standardizes the fold with the mean and deviation of its own training points.
+    ci.model_args = model_args
+    ci.model = None
+    return ci
+
+
+def _fold_scores(ci):
+    """Compares the inferences of a fold with its held-out response."""
+    inferences = ci.inferences.loc[ci.post_data.index]
+    y = ci.post_data.iloc[:, 0]
+    covered = ((y >= inferences['post_preds_lower']) &
+               (y <= inferences['post_preds_upper']))
+    last = inferences.iloc[-1]
+    return OrderedDict([
+        ('coverage', covered.mean()),
+        ('cum_error', last['post_cum_y'] - last['post_cum_pred']),
+        ('cum_covered', bool(last['post_cum_pred_lower'] <= last['post_cum_y'] <=
+                             last['post_cum_pred_upper'])),
+        ('rmse', np.sqrt(np.mean((y - inferences['post_preds']) ** 2)))
+    ])
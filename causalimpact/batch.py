@@ -0,0 +1,464 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Runs Causal Impact analyses over a batch of units, each one with its own response
+series, using a pool of worker processes.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import csv
+import datetime
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from causalimpact.cost import estimate_cost
+from causalimpact.main import CausalImpact
+from causalimpact.parallel import ThreadingPolicy, init_worker
+from causalimpact.shared import SharedFrame
+
+
+def wide_unit_slices(data, covariates=None):
+    """
+    Describes each unit of data in wide format, where each column that is not a
+    covariate holds the response of one unit, as a slice of `data`.
+
+    Args
+    ----
+      data: pandas DataFrame.
+          Indexed by time points; response columns are named after their units.
+      covariates: list of str.
+          Columns shared by all units as the `X` covariates.
+
+    Returns
+    -------
+      tuple:
+        frame: pandas DataFrame holding the data of all units.
+        units: list of (unit, rows, columns) tuples where `rows` is a slice of `frame`
+            and `columns` lists the response column followed by the covariates.
+
+    Raises
+    ------
+      ValueError: if some covariate is not present in `data`.
+    """
+    covariates = list(covariates or [])
+    _check_columns(data, covariates)
+    units = [(unit, slice(None), [unit] + covariates) for unit in data.columns
+             if unit not in covariates]
+    return data, units
+
+
+def long_unit_slices(data, unit_column, response_column, time_column=None,
+                     covariates=None):
+    """
+    Describes each unit of data in long format, where rows of all units are stacked
+    and identified by `unit_column`, as a slice of a frame with rows sorted by unit.
+
+    Args
+    ----
+      data: pandas DataFrame.
+      unit_column: str.
+          Column identifying to which unit each row belongs.
+      response_column: str.
+          Column with the response variable `y`.
+      time_column: str.
+          Column used as index of each unit data. If `None`, each unit is indexed by
+          the position of its rows.
+      covariates: list of str.
+          Columns used as the `X` covariates.
+
+    Returns
+    -------
+      tuple:
+        frame: pandas DataFrame with the response and covariates of all units.
+        units: list of (unit, rows, columns) tuples as in `wide_unit_slices`. Units
+            keep the order in which they first appear in `data`.
+
+    Raises
+    ------
+      ValueError: if some of the input columns is not present in `data`.
+    """
+    covariates = list(covariates or [])
+    columns = [unit_column, response_column] + covariates
+    if time_column is not None:
+        columns.append(time_column)
+    _check_columns(data, columns)
+    codes, uniques = pd.factorize(data[unit_column])
+    order = np.argsort(codes, kind='mergesort')
+    codes = codes[order]
+    frame = data.iloc[order]
+    if time_column is not None:
+        frame = frame.set_index(time_column)
+    else:
+        frame = frame.set_index(frame.groupby(codes).cumcount().values)
+    frame = frame[[response_column] + covariates]
+    bounds = np.searchsorted(codes, np.arange(len(uniques) + 1))
+    units = [(unit, slice(bounds[idx], bounds[idx + 1]), [response_column] + covariates)
+             for idx, unit in enumerate(uniques)]
+    return frame, units
+
+
+def iter_wide_units(data, covariates=None):
+    """
+    Splits data in wide format into the input data of each unit.
+
+    Args
+    ----
+      Same as `wide_unit_slices`.
+
+    Returns
+    -------
+      generator of tuples:
+        unit: name of the response column.
+        data: pandas DataFrame whose first column is the unit response followed by the
+            covariates.
+    """
+    frame, units = wide_unit_slices(data, covariates)
+    for unit, rows, columns in units:
+        yield unit, frame.iloc[rows][columns]
+
+
+def iter_long_units(data, unit_column, response_column, time_column=None,
+                    covariates=None):
+    """
+    Splits data in long format into the input data of each unit.
+
+    Args
+    ----
+      Same as `long_unit_slices`.
+
+    Returns
+    -------
+      generator of tuples:
+        unit: value of `unit_column`.
+        data: pandas DataFrame whose first column is the response followed by the
+            covariates.
+    """
+    frame, units = long_unit_slices(data, unit_column, response_column, time_column,
+                                    covariates)
+    for unit, rows, columns in units:
+        yield unit, frame.iloc[rows][columns]
+
+
+def _check_columns(data, columns):
+    missing = [str(column) for column in columns if column not in data.columns]
+    if missing:
+        raise ValueError('{columns} not present in input data.'.format(
+                         columns=', '.join(missing)))
+
+
+def summary_row(unit, ci):
+    """
+    Flattens the summary of a Causal Impact analysis into one row.
+
+    Args
+    ----
+      unit: object.
+          Identifier of the analyzed unit.
+      ci: `CausalImpact`.
+          Object with posterior inferences already processed.
+
+    Returns
+    -------
+      row: OrderedDict.
+          Keys are "unit", "{metric}_{average|cumulative}" for each metric in
+          `ci.summary_data` and "p_value".
+    """
+    row = OrderedDict([('unit', unit)])
+    for metric, values in ci.summary_data.iterrows():
+        for stat in ci.summary_data.columns:
+            row['{metric}_{stat}'.format(metric=metric, stat=stat)] = values[stat]
+    row['p_value'] = ci.p_value
+    return row
+
+
+def _run_unit(task):
+    """
+    Runs the Causal Impact analysis of one unit. Used as the worker function of
+    `run_batch`; failures are returned instead of raised so that one bad unit doesn't
+    stop the whole batch.
+
+    Args
+    ----
+      task: tuple.
+          (unit, data, pre_period, post_period, alpha, kwargs)
+
+    Returns
+    -------
+      tuple:
+        unit: object.
+        row: OrderedDict or `None` if the analysis failed.
+        error: str or `None` if the analysis succeeded.
+    """
+    unit, data, pre_period, post_period, alpha, kwargs = task
+    try:
+        ci = CausalImpact(data, pre_period, post_period, alpha=alpha, **kwargs)
+    except Exception as err:
+        return unit, None, '{name}: {err}'.format(name=type(err).__name__, err=err)
+    return unit, summary_row(unit, ci), None
+
+
+def predicted_cost(n_rows, n_columns, pre_period, post_period, kwargs):
+    """
+    Predicted seconds of analyzing a unit, used to start the most expensive units
+    first so that a long unit doesn't run alone at the end of a parallel batch.
+
+    Args
+    ----
+      n_rows: int.
+          Number of time points of the unit.
+      n_columns: int.
+          Number of columns, the response and the covariates.
+      pre_period: list.
+      post_period: list.
+          If they are positions, they bound the length of each period. Otherwise all
+          points are taken as pre-intervention points.
+      kwargs: arguments sent to `CausalImpact`.
+
+    Returns
+    -------
+      cost: float.
+    """
+    n_pre, n_post = n_rows, 0
+    periods = list(pre_period) + list(post_period)
+    if all(isinstance(value, (int, np.integer)) for value in periods):
+        n_pre = min(n_rows, pre_period[1] - pre_period[0] + 1)
+        n_post = min(n_rows - n_pre, post_period[1] - post_period[0] + 1)
+    return estimate_cost(n_pre, n_post, n_columns - 1, kwargs,
+                         n_sims=kwargs.get('n_sims', 1000))['total_seconds']
+
+
+def run_batch(units, pre_period, post_period, n_jobs=1, alpha=0.05,
+              threads_per_worker=None, order_by_cost=True, **kwargs):
+    """
+    Runs Causal Impact for each unit and yields results as soon as they complete,
+    which means they don't necessarily follow the input order.
+
+    Args
+    ----
+      units: iterable of tuples.
+          (unit, data) pairs such as the ones built by `iter_wide_units` and
+          `iter_long_units`.
+      pre_period: list.
+      post_period: list.
+      n_jobs: int.
+          Number of worker processes. If 1, analyses run in the current process and if
+          `None` it's chosen by `causalimpact.parallel.ThreadingPolicy`.
+      alpha: float.
+      threads_per_worker: int.
+          Native (BLAS/OpenMP) threads each worker may use. `None` splits the CPUs
+          evenly between workers.
+      order_by_cost: bool.
+          If `True` and there are several workers, units with the highest
+          `predicted_cost` are started first, which shortens the tail of the batch
+          when units have different lengths. This reads all `units` upfront, as the
+          pool would do anyway.
+      kwargs: arguments sent to `CausalImpact`, such as `nseasons`, `prior_level_sd`
+          and `standardize`.
+
+    Returns
+    -------
+      generator of tuples:
+        (unit, row, error) as returned by `_run_unit`.
+
+    Raises
+    ------
+      ValueError: if `n_jobs` or `threads_per_worker` is lower than 1.
+    """
+    policy = ThreadingPolicy(n_jobs, threads_per_worker)
+    tasks = ((unit, data, pre_period, post_period, alpha, kwargs)
+             for unit, data in units)
+    if policy.n_jobs > 1 and order_by_cost:
+        tasks = sorted(tasks, reverse=True, key=lambda task: predicted_cost(
+            task[1].shape[0], task[1].shape[1], pre_period, post_period, kwargs))
+    for result in policy.map(_run_unit, tasks, ordered=False):
+        yield result
+
+
+# Reference to the shared input matrix, set once in each worker process.
+_worker_frame = None
+
+
+def _init_shared_worker(frame_ref, n_threads):
+    global _worker_frame
+    _worker_frame = frame_ref
+    init_worker(n_threads)
+
+
+def _run_shared_unit(task):
+    """
+    Worker function of `run_shared_batch`: builds the unit data from the shared
+    matrix and runs it as in `_run_unit`.
+    """
+    unit, rows, columns = task[:3]
+    return _run_unit((unit, _worker_frame.take(rows, columns)) + task[3:])
+
+
+def run_shared_batch(frame, units, pre_period, post_period, n_jobs=1, alpha=0.05,
+                     threads_per_worker=None, path=None, order_by_cost=True, **kwargs):
+    """
+    Same as `run_batch` but the values of `frame` are placed only once in shared
+    memory and each task carries just the unit slice, so the data is neither pickled
+    per unit nor duplicated in each worker.
+
+    Args
+    ----
+      frame: pandas DataFrame.
+          Numeric data of all units.
+      units: list of (unit, rows, columns) tuples such as the ones returned by
+          `wide_unit_slices` and `long_unit_slices`. If `n_jobs` is `None`, no more
+          workers than units are started.
+      path: str.
+          If not `None`, the matrix is shared through a memory-mapped `.npy` file in
+          this path instead of `multiprocessing.shared_memory`.
+      Remaining arguments are the same as in `run_batch`.
+
+    Returns
+    -------
+      generator of tuples:
+        (unit, row, error) as returned by `_run_unit`.
+    """
+    policy = ThreadingPolicy(n_jobs, threads_per_worker, n_tasks=len(units))
+    if policy.n_jobs == 1:
+        tasks = ((unit, frame.iloc[rows][columns], pre_period, post_period, alpha,
+                  kwargs) for unit, rows, columns in units)
+        for result in policy.map(_run_unit, tasks):
+            yield result
+        return
+    if order_by_cost:
+        units = sorted(units, reverse=True, key=lambda unit: predicted_cost(
+            len(range(*unit[1].indices(len(frame)))), len(unit[2]), pre_period,
+            post_period, kwargs))
+    tasks = ((unit, rows, columns, pre_period, post_period, alpha, kwargs)
+             for unit, rows, columns in units)
+    with SharedFrame(frame, path=path) as shared:
+        for result in policy.map(_run_shared_unit, tasks, ordered=False,
+                                 initializer=_init_shared_worker,
+                                 initargs=(shared.ref, policy.threads_per_worker)):
+            yield result
+
+
+def read_done_units(path, unit_column='unit'):
+    """
+    Reads which units are already present in a summary output file so that an
+    interrupted batch can be resumed.
+
+    Args
+    ----
+      path: str.
+          Path of the CSV file written by `SummaryWriter`.
+      unit_column: str.
+
+    Returns
+    -------
+      set of str: units already processed. Empty if file doesn't exist yet.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    done = pd.read_csv(path, usecols=[unit_column], dtype=str)
+    return set(done[unit_column])
+
+
+class SummaryWriter(object):
+    """
+    Streams summary rows to a CSV file, flushing each row as soon as it is written.
+    If the file already exists rows are appended to it.
+
+    Args
+    ----
+      path: str.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._header = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'a')
+        self._writer = None
+
+    def write(self, row):
+        """
+        Args
+        ----
+          row: OrderedDict as returned by `summary_row`.
+        """
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(row.keys()))
+            if not self._header:
+                self._writer.writeheader()
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Progress(object):
+    """
+    Reports how many units were processed, the throughput and the estimated time to
+    finish the batch.
+
+    Args
+    ----
+      total: int.
+          Total units to process.
+      stream: file-like object where to write the progress line.
+    """
+    def __init__(self, total, stream=sys.stderr):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.stream = stream
+        self._start = time.time()
+
+    @property
+    def rate(self):
+        """Units processed per second."""
+        elapsed = time.time() - self._start
+        return self.done / elapsed if elapsed > 0 else 0.
+
+    @property
+    def eta(self):
+        """Estimated remaining seconds or `None` while no unit has been processed."""
+        rate = self.rate
+        if not rate:
+            return None
+        return (self.total - self.done) / rate
+
+    def update(self, failed=False):
+        self.done += 1
+        self.failed += int(failed)
+        eta = self.eta
+        eta = '?' if eta is None else str(datetime.timedelta(seconds=int(eta)))
+        self.stream.write(
+            '\r{done}/{total} units ({failed} failed) | {rate:.2f} units/s | '
+            'ETA {eta}'.format(done=self.done, total=self.total, failed=self.failed,
+                               rate=self.rate, eta=eta)
+        )
+        self.stream.flush()
+
+    def close(self):
+        self.stream.write('\n')
+        self.stream.flush()
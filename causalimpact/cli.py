@@ -0,0 +1,210 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Command line interface for running Causal Impact over CSV or Parquet inputs.
+
+Example
+-------
+  $ causalimpact sales.csv --time-column date --covariates x1 x2 \
+        --pre-period 20180101 20180410 --post-period 20180411 20180719 \
+        --nseasons 7 --n-jobs 8 -o summary.csv
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import sys
+
+import pandas as pd
+
+from causalimpact.batch import (Progress, SummaryWriter, long_unit_slices,
+                                read_done_units, run_shared_batch,
+                                wide_unit_slices)
+
+
+def read_input(path, time_column=None):
+    """
+    Reads input data from CSV or Parquet files, the latter being chosen by the file
+    extension.
+
+    Args
+    ----
+      path: str.
+      time_column: str.
+          Column with time points. In CSV files it's read as `str` so that values such
+          as "20180101" are later converted to dates instead of integers.
+
+    Returns
+    -------
+      data: pandas DataFrame.
+    """
+    if path.endswith(('.parquet', '.pq')):
+        data = pd.read_parquet(path)
+    else:
+        dtype = {time_column: str} if time_column is not None else None
+        data = pd.read_csv(path, dtype=dtype)
+    return data
+
+
+def parse_period(values, index):
+    """
+    Converts period values from the command line to `int` when the data is indexed by
+    integers and keeps them as `str` otherwise (such as in "20180101").
+
+    Args
+    ----
+      values: list of str.
+      index: pandas Index of the units data.
+    """
+    if pd.api.types.is_integer_dtype(index):
+        return [int(value) for value in values]
+    return list(values)
+
+
+def parse_nseasons(values):
+    """
+    Converts values like ["7", "365:10"] to [{'period': 7}, {'period': 365,
+    'harmonics': 10}]. Harmonics can be "auto" and ["auto"] is converted to "auto",
+    which detects the seasonal components of each unit.
+    """
+    if values == ['auto']:
+        return 'auto'
+    nseasons = []
+    for value in values:
+        period, _, harmonics = value.partition(':')
+        season = {'period': int(period)}
+        if harmonics:
+            season['harmonics'] = harmonics if harmonics == 'auto' else int(harmonics)
+        nseasons.append(season)
+    return nseasons
+
+
+def parse_prior_level_sd(value):
+    return None if value.lower() == 'none' else float(value)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='causalimpact',
+        description='Runs Causal Impact over every unit found in the input data and '
+                    'streams one summary row per unit to the output file.'
+    )
+    parser.add_argument('input', help='CSV or Parquet (.parquet, .pq) input file.')
+    parser.add_argument('-o', '--output', required=True,
+                        help='CSV file where summary rows are written. If it already '
+                             'exists, units present in it are skipped.')
+    parser.add_argument('--pre-period', nargs=2, required=True,
+                        metavar=('START', 'END'))
+    parser.add_argument('--post-period', nargs=2, required=True,
+                        metavar=('START', 'END'))
+    parser.add_argument('--format', choices=['wide', 'long'], default='wide',
+                        help='In "wide" format each column that is not a covariate is '
+                             'the response of one unit. In "long" format units are '
+                             'stacked and identified by --unit-column.')
+    parser.add_argument('--time-column',
+                        help='Column used as index of the data.')
+    parser.add_argument('--unit-column', default='unit',
+                        help='Column with unit identifiers in long format.')
+    parser.add_argument('--response-column', default='y',
+                        help='Column with the response variable in long format.')
+    parser.add_argument('--covariates', nargs='*', default=[],
+                        help='Columns used as covariates.')
+    parser.add_argument('--nseasons', nargs='*', default=None,
+                        metavar='PERIOD[:HARMONICS]',
+                        help='Seasonal periods, with "auto" harmonics chosen from the '
+                             'data, or "auto" to detect them.')
+    # `None` is a valid prior so the option is only set when given by the user.
+    parser.add_argument('--prior-level-sd', type=parse_prior_level_sd,
+                        default=argparse.SUPPRESS,
+                        help='Float value or "none" for automatic optimization.')
+    parser.add_argument('--no-standardize', dest='standardize', action='store_false')
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--n-jobs', type=int, default=1,
+                        help='Number of worker processes; 0 uses one per CPU.')
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help='Native (BLAS/OpenMP) threads of each worker process. '
+                             'Defaults to the CPUs divided by the number of workers.')
+    parser.add_argument('--mmap-file',
+                        help='Shares input data with workers through a memory-mapped '
+                             '.npy file in this path instead of shared memory.')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Do not report progress.')
+    return parser
+
+
+def get_units(data, args):
+    """
+    Builds the frame with data of all units and the (unit, rows, columns) slices
+    described by the command line arguments.
+    """
+    if args.format == 'wide':
+        if args.time_column is not None:
+            data = data.set_index(args.time_column)
+        return wide_unit_slices(data, args.covariates)
+    return long_unit_slices(data, args.unit_column, args.response_column,
+                            args.time_column, args.covariates)
+
+
+def get_model_kwargs(args):
+    """Builds the keyword arguments sent to `CausalImpact`."""
+    kwargs = {'standardize': args.standardize}
+    if args.nseasons is not None:
+        kwargs['nseasons'] = parse_nseasons(args.nseasons)
+    if hasattr(args, 'prior_level_sd'):
+        kwargs['prior_level_sd'] = args.prior_level_sd
+    return kwargs
+
+
+def main(argv=None):
+    """
+    Entry point of the `causalimpact` console script.
+
+    Returns
+    -------
+      int: exit status; 1 if some unit failed, 0 otherwise.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    data = read_input(args.input, args.time_column)
+    done = read_done_units(args.output)
+    frame, units = get_units(data, args)
+    units = [unit for unit in units if str(unit[0]) not in done]
+    pre_period = parse_period(args.pre_period, frame.index)
+    post_period = parse_period(args.post_period, frame.index)
+    kwargs = get_model_kwargs(args)
+    progress = Progress(len(units)) if not args.quiet else None
+    failed = 0
+    with SummaryWriter(args.output) as writer:
+        results = run_shared_batch(frame, units, pre_period, post_period,
+                                   n_jobs=args.n_jobs or None, alpha=args.alpha,
+                                   threads_per_worker=args.threads_per_worker,
+                                   path=args.mmap_file, **kwargs)
+        for unit, row, error in results:
+            if error is not None:
+                failed += 1
+                sys.stderr.write('\nunit {unit} failed: {error}\n'.format(
+                                 unit=unit, error=error))
+            else:
+                writer.write(row)
+            if progress is not None:
+                progress.update(failed=error is not None)
+    if progress is not None:
+        progress.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
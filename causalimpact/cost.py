@@ -0,0 +1,281 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cost model of Causal Impact analyses, used before fitting to choose between
+equivalent formulations of the default `UnobservedComponents` model, to warn about
+or refuse too expensive models and to schedule batches.
+
+Costs are predicted in seconds of a single core; the constants were calibrated with
+`benchmarks/bench_regression.py` on a commodity CPU, so they are rough estimates on
+other machines. Ratios between costs are more reliable.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import warnings
+
+# Seconds spent by each Kalman filter pass regardless of the data (Python overhead).
+PASS_OVERHEAD = 1.5e-4
+# Seconds spent by each time step of a filter pass as a polynomial of the state
+# dimension `m`: constant, m ** 2 and m ** 3 terms.
+STEP_COST = (8e-7, 1e-8, 1.2e-10)
+# Complex step differentiation runs filter passes with complex numbers, whose matrix
+# products take several times the real ones.
+COMPLEX_STEP_FACTOR = 4.
+# A smoother pass, as used by the analytic score, costs a few filter passes.
+SMOOTHER_FACTOR = 3.
+# Likelihood evaluations of the optimizer per iteration (line searches included).
+EVALS_PER_ITERATION = 1.2
+# Default `maxiter` of `statsmodels` fits.
+MAX_ITERATIONS = 50
+# Seconds of each simulation of the response regardless of its length.
+SIMULATION_OVERHEAD = 9e-4
+# Seconds of each simulated time step as a polynomial of the state dimension `m`:
+# constant and m ** 2 terms.
+SIMULATION_STEP_COST = (5e-7, 1e-9)
+# Seconds of drawing the initial state of each simulation, times m ** 3.
+SAMPLING_COST = 5e-9
+
+
+class CostBudgetWarning(UserWarning):
+    """Warns that the predicted cost of an analysis is above the chosen budget."""
+
+
+def model_dimensions(k_exog, nseasons=None, mle_regression=True):
+    """
+    Dimensions of the default local level model.
+
+    Args
+    ----
+      k_exog: int.
+          Number of covariates.
+      nseasons: list of dicts.
+          Same as `nseasons` of `CausalImpact`; "auto" harmonics count as the default
+          `floor(period / 2)`, an upper bound of the ones chosen, whereas "auto"
+          seasons, unknown before their detection, count as none.
+      mle_regression: bool.
+          Whether the regression coefficients are parameters of the model (`True`) or
+          states of the Kalman filter (`False`).
+
+    Returns
+    -------
+      tuple:
+        k_states: int.
+            State dimension.
+        k_params: int.
+            Number of parameters estimated by the optimizer.
+    """
+    if not nseasons or nseasons == 'auto':
+        nseasons = []
+    harmonics = [season.get('harmonics', 'auto') for season in nseasons]
+    harmonics = [
+        int(season['period'] // 2) if count == 'auto' else count
+        for season, count in zip(nseasons, harmonics)
+    ]
+    k_states = 1 + 2 * sum(harmonics)
+    # Irregular, level and one variance for each seasonal component.
+    k_params = 2 + len(nseasons)
+    if mle_regression:
+        k_params += k_exog
+    else:
+        k_states += k_exog
+    return k_states, k_params
+
+
+def pass_cost(n_obs, k_states, complex_step=False):
+    """Predicted seconds of one Kalman filter pass."""
+    constant, quadratic, cubic = STEP_COST
+    factor = COMPLEX_STEP_FACTOR if complex_step else 1.
+    step = constant + factor * (quadratic * k_states ** 2 + cubic * k_states ** 3)
+    return PASS_OVERHEAD + n_obs * step
+
+
+def fit_cost(n_obs, k_states, k_params, analytic_score=False):
+    """
+    Predicted seconds of fitting a model by maximum likelihood.
+
+    The optimizer needs more iterations the more parameters it searches over, and each
+    iteration evaluates the likelihood and its gradient. Numerical gradients take one
+    extra (complex) filter pass per parameter whereas the analytic score takes one
+    smoother pass.
+
+    Args
+    ----
+      n_obs: int.
+          Number of points of the pre-intervention period.
+      k_states: int.
+          State dimension, as returned by `model_dimensions`.
+      k_params: int.
+          Number of parameters estimated by the optimizer.
+      analytic_score: bool.
+          Same as `analytic_score` of `CausalImpact`.
+
+    Returns
+    -------
+      cost: float.
+    """
+    iterations = min(MAX_ITERATIONS, 4 + 3 * k_params)
+    evals = EVALS_PER_ITERATION * iterations
+    if analytic_score:
+        passes, complex_passes = evals * (1 + SMOOTHER_FACTOR), 0
+    else:
+        passes, complex_passes = evals, evals * k_params
+    # The results of the fit are smoothed once more.
+    passes += SMOOTHER_FACTOR
+    return (passes * pass_cost(n_obs, k_states) +
+            complex_passes * pass_cost(n_obs, k_states, complex_step=True))
+
+
+def choose_mle_regression(n_obs, k_exog, nseasons=None, analytic_score=False):
+    """
+    Chooses whether the regression coefficients of the default model should be
+    parameters estimated by the optimizer or states estimated by the Kalman filter,
+    whichever `fit_cost` predicts to be cheaper.
+
+    Few coefficients are cheaper as states, as the optimizer then searches over the
+    variances only and converges in a few iterations; many of them are cheaper as
+    parameters, as the cost of each filter step grows with the cube of the state
+    dimension. The states are only chosen when the pre-intervention period is long
+    enough for their diffuse initialization, which discards the first `k_states`
+    points from the likelihood.
+
+    Args
+    ----
+      n_obs: int.
+          Number of points of the pre-intervention period.
+      k_exog: int.
+          Number of covariates.
+      nseasons: list of dicts.
+      analytic_score: bool.
+
+    Returns
+    -------
+      mle_regression: bool.
+    """
+    if not k_exog:
+        return True
+    states_dims = model_dimensions(k_exog, nseasons, mle_regression=False)
+    if n_obs < 2 * states_dims[0]:
+        return True
+    params_dims = model_dimensions(k_exog, nseasons, mle_regression=True)
+    as_params = fit_cost(n_obs, *params_dims, analytic_score=analytic_score)
+    as_states = fit_cost(n_obs, *states_dims, analytic_score=analytic_score)
+    return as_params <= as_states
+
+
+def simulation_cost(n_post, k_states, n_sims=1000):
+    """
+    Predicted seconds of simulating `n_sims` responses over the post-intervention
+    period, as done by `simulated_y`. Each simulation draws its initial state from the
+    last predicted state distribution, which takes a decomposition of its covariance.
+    """
+    constant, quadratic = SIMULATION_STEP_COST
+    step = constant + quadratic * k_states ** 2
+    per_simulation = (SIMULATION_OVERHEAD + SAMPLING_COST * k_states ** 3 +
+                      n_post * step)
+    return n_sims * per_simulation
+
+
+def estimate_cost(n_pre, n_post, k_exog=0, model_args=None, n_sims=1000, model=None):
+    """
+    Predicts the size and cost of a Causal Impact analysis before running it.
+
+    Args
+    ----
+      n_pre: int.
+          Number of points of the pre-intervention period.
+      n_post: int.
+          Number of points of the post-intervention period.
+      k_exog: int.
+          Number of covariates.
+      model_args: dict.
+          Arguments of `CausalImpact` such as `nseasons`, `mle_regression`,
+          `analytic_score` and `fit_method`.
+      n_sims: int.
+          Number of simulations of the response.
+      model: `UnobservedComponents`.
+          Customized model, if any. Its dimensions are used instead of the ones of the
+          default model.
+
+    Returns
+    -------
+      dict of:
+        k_states: int.
+            State dimension.
+        k_params: int.
+            Number of parameters estimated by the optimizer.
+        mle_regression: bool.
+            Whether regression coefficients are parameters.
+        fit_seconds: float.
+        simulation_seconds: float.
+        total_seconds: float.
+    """
+    model_args = model_args or {}
+    analytic_score = model_args.get('analytic_score', False)
+    if model is not None:
+        k_states, k_params = model.k_states, model.k_params
+        mle_regression = model.mle_regression
+    else:
+        nseasons = model_args.get('nseasons')
+        mle_regression = model_args.get('mle_regression', 'auto')
+        if mle_regression == 'auto':
+            mle_regression = choose_mle_regression(n_pre, k_exog, nseasons,
+                                                   analytic_score)
+        k_states, k_params = model_dimensions(k_exog, nseasons, mle_regression)
+    if model_args.get('fit_method') == 'filter' or model_args.get('params') is not None:
+        fit_seconds = pass_cost(n_pre, k_states)
+    else:
+        fit_seconds = fit_cost(n_pre, k_states, k_params, analytic_score)
+    simulation_seconds = simulation_cost(n_post, k_states, n_sims)
+    return {
+        'k_states': k_states,
+        'k_params': k_params,
+        'mle_regression': mle_regression,
+        'fit_seconds': fit_seconds,
+        'simulation_seconds': simulation_seconds,
+        'total_seconds': fit_seconds + simulation_seconds
+    }
+
+
+def check_budget(estimate, budget, action='warn'):
+    """
+    Warns or raises if the predicted cost of an analysis is above `budget`.
+
+    Args
+    ----
+      estimate: dict.
+          As returned by `estimate_cost`.
+      budget: float.
+          Maximum predicted seconds; `None` means no budget.
+      action: str.
+          Either "warn", which issues a `CostBudgetWarning`, or "raise".
+
+    Raises
+    ------
+      ValueError: if `action` is "raise" and the cost is above the budget.
+    """
+    if budget is None or estimate['total_seconds'] <= budget:
+        return
+    message = (
+        'Predicted cost of {total:.2f}s ({fit:.2f}s fitting, {sims:.2f}s simulating) '
+        'is above the budget of {budget:.2f}s; the model has {k_states} states and '
+        '{k_params} parameters. Consider fewer seasonal harmonics or covariates.'
+    ).format(total=estimate['total_seconds'], fit=estimate['fit_seconds'],
+             sims=estimate['simulation_seconds'], budget=budget,
+             k_states=estimate['k_states'], k_params=estimate['k_params'])
+    if action == 'raise':
+        raise ValueError(message)
+    warnings.warn(message, CostBudgetWarning)
@@ -0,0 +1,189 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Selects the control series, or donors, used as covariates of `CausalImpact` among
+many candidates by their similarity to the response in the pre-intervention period.
+
+Candidates are read in blocks of columns, each block is scored against the response
+with one matrix product and only the best `k` scores seen so far are kept, so memory
+is bounded by the size of a block whatever the number of candidates. Candidates may
+be `.npy` or Parquet files larger than memory.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+
+from causalimpact.misc import get_pyarrow
+from causalimpact.misc import standardize as standardize_data
+from causalimpact.periods import PeriodResolver
+
+
+def select_donors(target, candidates, pre_period, k=10, standardize=True,
+                  block_size=1000, names=None):
+    """
+    Scores every candidate control series against `target` over the pre-intervention
+    period and returns the `k` most similar ones along with `target`, ready to be sent
+    to `CausalImpact`.
+
+    With `standardize=True` the pre-intervention data of `target` and of each block of
+    candidates is standardized with `causalimpact.misc.standardize` and the score is
+    their correlation, `z_target' Z / n`. Otherwise the score is minus the root mean
+    squared distance between `target` and each candidate, computed from
+    `|y|^2 - 2 y' X + |X|^2`, which also favors controls at the level of `target`.
+
+    Candidates with missing values, which `CausalImpact` doesn't accept in
+    covariates, or constant in the pre-intervention period when standardized, are
+    never selected.
+
+    Args
+    ----
+      target: pandas Series or 1-D numpy array.
+          Response, with the pre and post-intervention periods.
+      candidates: pandas DataFrame, 2-D numpy array or str.
+          One column for each candidate and the same rows as `target`, matched by
+          position. A str is the path of a `.npy` file, which is memory mapped, or of a
+          Parquet file, whose columns are read in blocks.
+      pre_period: list.
+          First and last points of the pre-intervention period in the index of
+          `target`, or positions if it's a numpy array.
+      k: int.
+          Number of controls returned.
+      standardize: bool.
+          Whether scores are correlations of standardized data or distances of the
+          original data.
+      block_size: int.
+          Number of candidates read and scored at once.
+      names: list.
+          Names of the candidates of numpy arrays and `.npy` files. Defaults to
+          "x<position>".
+
+    Returns
+    -------
+      data: pandas DataFrame.
+          `target` followed by the selected controls, from the most similar one, with
+          the index of `target`.
+      scores: pandas Series.
+          Score of each selected control.
+
+    Raises
+    ------
+      ValueError: if `k` or `block_size` is not a positive integer.
+                  if `candidates` is an array that is not 2-D.
+                  if `candidates` doesn't have the same rows as `target`.
+                  if some point of `pre_period` is not present in the index of
+                      `target`.
+
+    Examples:
+    ---------
+      >>> data, scores = select_donors(sales['target'], 'markets.npy',
+      ...                              ['20180101', '20180311'], k=20)
+      >>> ci = CausalImpact(data, ['20180101', '20180311'], ['20180312', '20180410'])
+    """
+    for arg, value in [('k', k), ('block_size', block_size)]:
+        if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or (
+                value < 1):
+            raise ValueError('{arg} must be a positive integer.'.format(arg=arg))
+    if not isinstance(target, pd.Series):
+        target = pd.Series(np.asarray(target, dtype=float), name='y')
+    reader = _CandidatesReader(candidates, names)
+    if reader.n_rows != len(target):
+        raise ValueError('candidates must have the same number of rows as target: '
+                         '{n_rows} != {n_target}.'.format(n_rows=reader.n_rows,
+                                                          n_target=len(target)))
+    start, end = PeriodResolver(target.index).resolve_periods([pre_period])[0]
+    y = target.values[start: end + 1].astype(float)
+    # Points without response don't count in the scores.
+    observed = ~np.isnan(y)
+    y = y[observed]
+    if standardize:
+        y = standardize_data(pd.DataFrame(y))[0].values[:, 0]
+    best_scores = np.empty(0)
+    best_idx = np.empty(0, dtype=int)
+    for offset, block in reader.blocks(block_size):
+        valid = ~np.isnan(block).any(axis=0)
+        X = block[start: end + 1][observed]
+        if standardize:
+            X = standardize_data(pd.DataFrame(X))[0].values
+            scores = y.dot(X) / len(y)
+        else:
+            distances = (y.dot(y) - 2 * y.dot(X) + np.sum(X ** 2, axis=0)) / len(y)
+            scores = -np.sqrt(np.maximum(distances, 0))
+        valid &= np.isfinite(scores)
+        best_scores = np.concatenate([best_scores, scores[valid]])
+        best_idx = np.concatenate([best_idx, offset + np.flatnonzero(valid)])
+        if len(best_scores) > k:
+            keep = np.argpartition(-best_scores, k - 1)[:k]
+            best_scores, best_idx = best_scores[keep], best_idx[keep]
+    order = np.argsort(-best_scores, kind='mergesort')
+    best_scores, best_idx = best_scores[order], best_idx[order]
+    selected = [reader.names[idx] for idx in best_idx]
+    data = pd.DataFrame(reader.columns(best_idx), index=target.index, columns=selected)
+    data.insert(0, target.name if target.name is not None else 'y', target.values)
+    return data, pd.Series(best_scores, index=selected, name='score')
+
+
+class _CandidatesReader(object):
+    """Reads blocks of columns of candidates without loading all of them."""
+    def __init__(self, candidates, names=None):
+        self._parquet_file = None
+        self._frame = None
+        self._array = None
+        if isinstance(candidates, pd.DataFrame):
+            self._frame = candidates
+            self.names = list(candidates.columns)
+            self.n_rows = len(candidates)
+            return
+        if isinstance(candidates, str) and candidates.endswith(('.parquet', '.pq')):
+            pyarrow = get_pyarrow()
+            self._parquet_file = pyarrow.parquet.ParquetFile(candidates)
+            metadata = self._parquet_file.schema_arrow.pandas_metadata or {}
+            # Indexes stored by pandas are not candidates.
+            index_columns = [column for column in metadata.get('index_columns', [])
+                             if isinstance(column, str)]
+            self.names = [name for name in self._parquet_file.schema_arrow.names if
+                          name not in index_columns]
+            self.n_rows = self._parquet_file.metadata.num_rows
+            return
+        if isinstance(candidates, str):
+            candidates = np.load(candidates, mmap_mode='r')
+        self._array = np.asarray(candidates)
+        if self._array.ndim != 2:
+            raise ValueError('candidates must be a 2-D array.')
+        self.names = (['x{}'.format(idx) for idx in range(self._array.shape[1])] if
+                      names is None else list(names))
+        self.n_rows = self._array.shape[0]
+
+    def blocks(self, block_size):
+        """Yields the position of the first column and values of each block."""
+        for offset in range(0, len(self.names), block_size):
+            yield offset, self.columns(np.arange(offset, min(offset + block_size,
+                                                             len(self.names))))
+
+    def columns(self, positions):
+        """Values of the columns at `positions` as a float array."""
+        positions = np.asarray(positions, dtype=int)
+        if self._frame is not None:
+            return self._frame.iloc[:, positions].to_numpy(dtype=float)
+        if self._parquet_file is not None:
+            names = [self.names[idx] for idx in positions]
+            table = self._parquet_file.read(columns=names)
+            return np.column_stack([
+                table.column(name).to_numpy(zero_copy_only=False).astype(float)
+                for name in names
+            ]) if names else np.empty((self.n_rows, 0))
+        return np.asarray(self._array[:, positions], dtype=float)
@@ -0,0 +1,233 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Exports results of many Causal Impact analyses to partitioned Parquet or Arrow IPC
+datasets and reads them back through memory maps.
+
+Each dataset directory contains two tables:
+  - "inferences": long table with the columns of `inferences` keyed by "unit" and
+    "time".
+  - "summary": wide table with one row per unit holding every `summary_data` metric as
+    "{metric}_{average|cumulative}" plus "p_value".
+
+Both are stored as a sequence of part files, one per flushed batch of units. Requires
+`pyarrow` (`pip install pycausalimpact[parquet]`).
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import numpy as np
+
+from causalimpact.misc import get_pyarrow
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+TABLES = ['inferences', 'summary']
+
+
+def inferences_table(unit, inferences):
+    """
+    Converts the `inferences` DataFrame of one unit into an Arrow table keyed by unit
+    and time. Columns are built straight from the underlying numpy arrays, so float
+    columns are not copied.
+
+    Args
+    ----
+      unit: object.
+          Identifier of the analyzed unit.
+      inferences: pandas DataFrame.
+          As computed in `Inferences._compile_posterior_inferences`.
+
+    Returns
+    -------
+      table: `pyarrow.Table`.
+    """
+    pa = get_pyarrow()
+    columns = [pa.repeat(unit, len(inferences)), pa.array(inferences.index.values)]
+    names = ['unit', 'time']
+    for name in inferences.columns:
+        columns.append(pa.array(inferences[name].values, from_pandas=False))
+        names.append(name)
+    return pa.Table.from_arrays(columns, names=names)
+
+
+def summary_table(units, summaries, p_values):
+    """
+    Stacks the `summary_data` of several units into one wide Arrow table.
+
+    Args
+    ----
+      units: list.
+          Identifiers of the analyzed units.
+      summaries: list of pandas DataFrame.
+          `summary_data` of each unit; all of them share the same index and columns.
+      p_values: list of float.
+
+    Returns
+    -------
+      table: `pyarrow.Table` with one row per unit.
+    """
+    pa = get_pyarrow()
+    template = summaries[0]
+    values = np.stack([summary.values.ravel() for summary in summaries])
+    names = ['{metric}_{stat}'.format(metric=metric, stat=stat)
+             for metric in template.index for stat in template.columns]
+    columns = [pa.array(units)]
+    columns.extend(pa.array(values[:, idx]) for idx in range(values.shape[1]))
+    columns.append(pa.array(np.asarray(p_values, dtype=float)))
+    return pa.Table.from_arrays(columns, names=['unit'] + names + ['p_value'])
+
+
+class ResultsWriter(object):
+    """
+    Writes results of many Causal Impact analyses to a dataset directory. Results are
+    buffered and every `batch_size` units they are written as new part files of the
+    "inferences" and "summary" tables. Opening a writer on an existing dataset appends
+    new parts to it.
+
+    Args
+    ----
+      path: str.
+          Dataset directory.
+      format: str.
+          Either "parquet" or "arrow" (Arrow IPC file format).
+      batch_size: int.
+          How many units to buffer before writing a new part file.
+
+    Examples:
+    ---------
+      >>> with ResultsWriter('results', format='arrow') as writer:
+      ...     for unit, data in units:
+      ...         writer.write(unit, CausalImpact(data, pre_period, post_period))
+      >>> summary = read_results('results', 'summary').to_pandas()
+    """
+    def __init__(self, path, format='parquet', batch_size=256):
+        if format not in FORMATS:
+            raise ValueError('format must be one of: {formats}.'.format(
+                             formats=', '.join(sorted(FORMATS))))
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1.')
+        self._pa = get_pyarrow()
+        self.path = path
+        self.format = format
+        self.batch_size = batch_size
+        for table in TABLES:
+            directory = os.path.join(path, table)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+        self._n_parts = len(_list_parts(os.path.join(path, 'summary')))
+        self._clear()
+
+    def _clear(self):
+        self._units = []
+        self._inferences = []
+        self._summaries = []
+        self._p_values = []
+
+    def write(self, unit, ci):
+        """
+        Buffers the results of one unit.
+
+        Args
+        ----
+          unit: object.
+          ci: `CausalImpact` with posterior inferences already processed.
+        """
+        self._units.append(unit)
+        self._inferences.append(inferences_table(unit, ci.inferences))
+        self._summaries.append(ci.summary_data)
+        self._p_values.append(ci.p_value)
+        if len(self._units) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered results as new part files."""
+        if not self._units:
+            return
+        tables = {
+            'inferences': self._pa.concat_tables(self._inferences),
+            'summary': summary_table(self._units, self._summaries, self._p_values)
+        }
+        filename = 'part-{n:05d}{ext}'.format(n=self._n_parts, ext=FORMATS[self.format])
+        for name, table in tables.items():
+            self._write_table(table, os.path.join(self.path, name, filename))
+        self._n_parts += 1
+        self._clear()
+
+    def _write_table(self, table, path):
+        if self.format == 'parquet':
+            self._pa.parquet.write_table(table, path)
+        else:
+            with self._pa.OSFile(path, 'wb') as sink:
+                with self._pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _list_parts(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith('part-') and
+                  os.path.splitext(name)[1] in FORMATS.values())
+
+
+def read_results(path, table='summary', columns=None):
+    """
+    Reads back one of the tables written by `ResultsWriter`. Files are memory-mapped;
+    Arrow IPC parts are read without copying their buffers.
+
+    Args
+    ----
+      path: str.
+          Dataset directory.
+      table: str.
+          Either "summary" or "inferences".
+      columns: list of str.
+          If not `None`, only these columns are read.
+
+    Returns
+    -------
+      table: `pyarrow.Table`. Use its `to_pandas` method for a pandas DataFrame.
+
+    Raises
+    ------
+      ValueError: if `table` is not valid or the dataset has no part files.
+    """
+    if table not in TABLES:
+        raise ValueError('table must be either "summary" or "inferences".')
+    pa = get_pyarrow()
+    parts = _list_parts(os.path.join(path, table))
+    if not parts:
+        raise ValueError('No results found in {path}.'.format(path=path))
+    tables = []
+    for part in parts:
+        if part.endswith(FORMATS['parquet']):
+            tables.append(pa.parquet.read_table(part, columns=columns,
+                                                memory_map=True))
+        else:
+            result = pa.ipc.open_file(pa.memory_map(part, 'r')).read_all()
+            tables.append(result.select(columns) if columns is not None else result)
+    return pa.concat_tables(tables)
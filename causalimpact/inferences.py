@@ -20,6 +20,8 @@ based model.
 
 from __future__ import absolute_import, division, print_function
 
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
 
@@ -457,3 +459,189 @@ class Inferences(object):
         # was expected had no effect taken place.
         signal = min(np.sum(sim_sum > y_post_sum), np.sum(sim_sum < y_post_sum))
         return signal / (self.n_sims + 1)
+
+    def compare_responses(self, responses):
+        """
+        Analyzes alternative post-intervention responses, such as variants of the same
+        metric, against the forecasts and simulations of the already processed
+        analysis, without fitting or simulating again. All of them are processed at
+        once; the results of each response are the same as if it were the response of
+        the analysis.
+
+        Args
+        ----
+          responses: pandas DataFrame, numpy array or callable.
+              One column per response and one row per post-intervention point. A
+              callable receives `post_data` and returns them. Columns of a DataFrame
+              name the responses; otherwise they're numbered.
+
+        Returns
+        -------
+          tuple:
+            summary: pandas DataFrame.
+                Indexed by response, with columns "{metric}_{average|cumulative}" for
+                each metric in `summary_data` and "p_value".
+            effects: pandas DataFrame.
+                Indexed as `post_data`, with a column for each pair of metric
+                (point_effects, point_effects_lower, point_effects_upper,
+                post_cum_effects, post_cum_effects_lower, post_cum_effects_upper) and
+                response.
+
+        Raises
+        ------
+          ValueError: if `responses` don't have one row per post-intervention point.
+        """
+        if callable(responses):
+            responses = responses(self.post_data)
+        if isinstance(responses, pd.Series):
+            responses = responses.to_frame()
+        if not isinstance(responses, pd.DataFrame):
+            values = np.asarray(responses, dtype=float)
+            responses = pd.DataFrame(values.reshape(len(values), -1))
+        n_post = len(self.post_data)
+        if len(responses) != n_post:
+            raise ValueError('responses must have {n_post} rows, one for each '
+                             'post-intervention point.'.format(n_post=n_post))
+        responses = responses.astype(float)
+        y = responses.values
+        lower, upper = self.lower_upper_percentile
+        infers = self.inferences.loc[self.post_data.index]
+        preds = infers['post_preds'].values[:, None]
+        cum_sims = np.cumsum(self.simulated_y, axis=1)
+        # Percentiles of `cum_y - cum_sims` are `cum_y` minus the opposite percentiles
+        # of `cum_sims`, so the simulations are summarized only once for all responses.
+        cum_sims_lower, cum_sims_upper = np.percentile(cum_sims, [lower, upper], axis=0)
+        cum_y = responses.cumsum().values
+        effects = OrderedDict([
+            ('point_effects', y - preds),
+            ('point_effects_lower', y - infers['post_preds_upper'].values[:, None]),
+            ('point_effects_upper', y - infers['post_preds_lower'].values[:, None]),
+            ('post_cum_effects', cum_y - np.cumsum(preds, axis=0)),
+            ('post_cum_effects_lower', cum_y - cum_sims_upper[:, None]),
+            ('post_cum_effects_upper', cum_y - cum_sims_lower[:, None])
+        ])
+        effects = pd.concat(
+            [pd.DataFrame(values, index=self.post_data.index, columns=responses.columns)
+             for values in effects.values()],
+            axis=1, keys=list(effects)
+        )
+
+        summary = self._summary_table(
+            responses.sum().values, responses.mean().values, preds.sum(), len(y),
+            self.simulated_y.sum(axis=1)[:, None], responses.columns)
+        return summary, effects
+
+    def summarize_periods(self, horizons=None, freq=None):
+        """
+        Summarizes the first points of the post-intervention period for each of
+        several horizons, or buckets of it of a given frequency, such as weekly or
+        monthly totals. Their distributions come from the simulations already run for
+        the analysis, so nothing is fitted or simulated again.
+
+        Args
+        ----
+          horizons: list of int.
+              Numbers of post-intervention points, such as `[7, 14, 28]`.
+          freq: str.
+              Frequency of the buckets, such as "W" or "M", as in
+              `pandas.DataFrame.resample`; requires a `DatetimeIndex`.
+
+        Returns
+        -------
+          summary: pandas DataFrame.
+              Indexed by horizon or by bucket label, with columns
+              "{metric}_{average|cumulative}" for each metric in `summary_data` and
+              "p_value"; the metrics of each horizon or bucket are the ones the
+              analysis would report if it were the whole post-intervention period.
+
+        Raises
+        ------
+          ValueError: if not exactly one of `horizons` and `freq` is sent.
+                      if some horizon is not between 1 and the post-intervention
+                          length.
+                      if `freq` is sent and data is not indexed by dates.
+
+        Examples:
+        ---------
+          >>> ci.summarize_periods(horizons=[7, 14, 28])
+          >>> ci.summarize_periods(freq='W')
+        """
+        if (horizons is None) == (freq is None):
+            raise ValueError('Either horizons or freq must be sent.')
+        y = self.post_data.iloc[:, 0]
+        preds = self.inferences.loc[self.post_data.index, 'post_preds'].values
+        n_post = len(y)
+        if horizons is not None:
+            horizons = np.asarray(horizons, dtype=int)
+            if horizons.min() < 1 or horizons.max() > n_post:
+                raise ValueError('horizons must be between 1 and {n_post}.'.format(
+                                 n_post=n_post))
+            starts = np.zeros(len(horizons), dtype=int)
+            ends = horizons
+            index = pd.Index(horizons, name='horizon')
+        else:
+            if not isinstance(y.index, pd.DatetimeIndex):
+                raise ValueError('freq can only be used with data indexed by dates.')
+            buckets = pd.Series(np.arange(n_post), index=y.index).resample(freq)
+            starts = buckets.min().dropna().astype(int)
+            ends = buckets.max().dropna().astype(int).values + 1
+            index = starts.index
+            starts = starts.values
+        cum_y = np.concatenate([[0], y.fillna(0).cumsum().values])
+        counts = np.concatenate([[0], y.notna().cumsum().values])
+        cum_preds = np.concatenate([[0], np.cumsum(preds)])
+        cum_sims = np.concatenate([np.zeros((len(self.simulated_y), 1)),
+                                   np.cumsum(self.simulated_y, axis=1)], axis=1)
+        actual_sum = cum_y[ends] - cum_y[starts]
+        return self._summary_table(
+            actual_sum, actual_sum / (counts[ends] - counts[starts]),
+            cum_preds[ends] - cum_preds[starts], ends - starts,
+            cum_sims[:, ends] - cum_sims[:, starts], index)
+
+    def _summary_table(self, actual_sum, actual_mean, pred_sum, n_points, sim_sums,
+                       index):
+        """
+        Summary metrics of several sets of post-intervention points at once, computed
+        as in `_summarize_posterior_inferences` and `_compute_p_value`.
+
+        Args
+        ----
+          actual_sum, actual_mean: numpy array.
+              Sum and mean of the observed response of each set.
+          pred_sum: numpy array.
+              Sum of the predicted response of each set.
+          n_points: numpy array.
+              Number of points of each set.
+          sim_sums: numpy array.
+              Sum of the simulated response of each set, one row per simulation.
+          index: pandas Index.
+              Labels of the sets.
+
+        Returns
+        -------
+          summary: pandas DataFrame.
+              Indexed by `index`, with columns "{metric}_{average|cumulative}" for each
+              metric in `summary_data` and "p_value".
+        """
+        lower, upper = self.lower_upper_percentile
+        sims_lower, sims_upper = np.percentile(sim_sums, [lower, upper], axis=0)
+        stats = OrderedDict([
+            ('average', [actual_mean, pred_sum / n_points, sims_lower / n_points,
+                         sims_upper / n_points]),
+            ('cumulative', [actual_sum, pred_sum, sims_lower, sims_upper])
+        ])
+        summary = {}
+        for stat, (actual, pred, pred_lower, pred_upper) in stats.items():
+            abs_effects = [actual - pred, actual - pred_upper, actual - pred_lower]
+            values = ([actual, pred, pred_lower, pred_upper] + abs_effects +
+                      [effect / pred for effect in abs_effects])
+            for metric, value in zip(self.summary_data.index, values):
+                summary['{metric}_{stat}'.format(metric=metric, stat=stat)] = (
+                    np.broadcast_to(value, (len(index),)))
+        # Same counts as in `_compute_p_value`, for all sets at once.
+        signal = np.minimum(np.sum(sim_sums > actual_sum, axis=0),
+                            np.sum(sim_sums < actual_sum, axis=0))
+        summary['p_value'] = signal / (self.n_sims + 1)
+        columns = ['{metric}_{stat}'.format(metric=metric, stat=stat)
+                   for metric in self.summary_data.index for stat in stats]
+        return pd.DataFrame(summary, index=index, columns=columns + ['p_value'])
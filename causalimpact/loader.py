@@ -0,0 +1,236 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Loads long high-frequency series, such as per-second event counts, aggregated to a
+lower frequency in a single pass over chunks of the input, so the raw series is never
+held in memory.
+
+Each chunk is reduced to partial aggregates (sum, count, min, max) of its buckets and
+only these are kept; partials of buckets split between chunks are combined at the
+end. Chunks need not be sorted.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+
+from causalimpact.main import CausalImpact
+from causalimpact.misc import get_pyarrow
+from causalimpact.periods import parse_index
+
+AGGREGATIONS = ('sum', 'mean', 'min', 'max', 'count')
+# Partial aggregates each aggregation is computed from.
+_PARTIALS = {
+    'sum': ('sum', 'count'),
+    'mean': ('sum', 'count'),
+    'min': ('min', 'count'),
+    'max': ('max', 'count'),
+    'count': ('count',)
+}
+# How partial aggregates of the same bucket are combined.
+_COMBINE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def load_resampled(path, freq, how='sum', time_column=None, columns=None,
+                   date_format=None, chunksize=1000000, start=None, step=None,
+                   fill_value=None):
+    """
+    Reads a CSV, Parquet or `.npy` file in chunks and aggregates it to `freq`.
+
+    Args
+    ----
+      path: str.
+          Input file; Parquet is chosen by the ".parquet" and ".pq" extensions and
+          numpy by ".npy". Other files are read as CSV.
+      freq: str.
+          pandas frequency of the output, such as "H" or "D".
+      how: str or dict.
+          Aggregation of all columns, one of `AGGREGATIONS`, or a dict from column to
+          aggregation, such as `{'events': 'sum', 'x1': 'mean'}`. Columns missing
+          from the dict are summed.
+      time_column: str.
+          Column with time points of CSV and Parquet files. Defaults to the first
+          column, or to the stored index of Parquet files written by pandas.
+      columns: list.
+          Columns to keep, in order; the first one is the response. Defaults to all
+          of them. For `.npy` files, names of the columns of the array.
+      date_format: str.
+          Format of time points stored as strings. If `None` it's guessed for each
+          chunk, so ambiguous formats such as day first should be sent.
+      chunksize: int.
+          Number of rows read at once.
+      start, step: str or pandas Timestamp, str or pandas Timedelta.
+          Time of the first row and spacing between rows of `.npy` files, which have
+          no time column.
+      fill_value: float.
+          Value of buckets without any input points, such as 0 for event counts. If
+          `None` they're NaN, which is only accepted in the response.
+
+    Returns
+    -------
+      data: pandas DataFrame.
+          Aggregated data indexed by dates spaced by `freq`, validated as
+          `CausalImpact` input.
+
+    Raises
+    ------
+      ValueError: if `how` has an unknown aggregation.
+                  if `start` or `step` is missing for `.npy` files.
+                  if the aggregated data is not valid `CausalImpact` input.
+
+    Examples:
+    ---------
+      >>> data = load_resampled('events.csv', 'H', how={'events': 'sum', 'x1': 'mean'},
+      ...                       time_column='ts', fill_value=0)
+      >>> ci = CausalImpact(data, pre_period, post_period)
+    """
+    if path.endswith('.npy'):
+        if start is None or step is None:
+            raise ValueError('start and step are required to read .npy files.')
+        chunks = _npy_chunks(path, columns, chunksize, start, step)
+    elif path.endswith(('.parquet', '.pq')):
+        chunks = _parquet_chunks(path, time_column, columns, chunksize, date_format)
+    else:
+        chunks = _csv_chunks(path, time_column, columns, chunksize, date_format)
+    data = resample_chunks(chunks, freq, how, fill_value)
+    return CausalImpact.__new__(CausalImpact)._format_input_data(data)
+
+
+def resample_chunks(chunks, freq, how='sum', fill_value=None):
+    """
+    Aggregates chunks of a series to `freq` keeping only partial aggregates of each
+    chunk in memory.
+
+    Args
+    ----
+      chunks: iterable of pandas DataFrame.
+          Numeric columns indexed by dates; all chunks have the same columns.
+      freq: str.
+      how: str or dict.
+      fill_value: float.
+          Same as in `load_resampled`.
+
+    Returns
+    -------
+      data: pandas DataFrame.
+          One row for each bucket from the first to the last one with input points.
+
+    Raises
+    ------
+      ValueError: if `how` has an unknown aggregation.
+                  if there are no chunks.
+    """
+    parts = {}
+    columns = None
+    for chunk in chunks:
+        if columns is None:
+            columns = list(chunk.columns)
+            aggregations = _process_how(how, columns)
+            parts = dict((partial, []) for column in columns
+                         for partial in _PARTIALS[aggregations[column]])
+        if len(chunk):
+            resampler = chunk.resample(freq, origin='epoch')
+            for partial, frames in parts.items():
+                frames.append(getattr(resampler, partial)())
+    if columns is None:
+        raise ValueError('Input data has no rows.')
+    if not parts['count']:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([]), dtype=float)
+    # Buckets split between chunks have one partial from each of them.
+    combined = dict((partial, getattr(pd.concat(frames).resample(freq, origin='epoch'),
+                                      _COMBINE[partial])())
+                    for partial, frames in parts.items())
+    count = combined['count']
+    data = pd.DataFrame(index=count.index)
+    for column in columns:
+        aggregation = aggregations[column]
+        if aggregation == 'count':
+            data[column] = count[column].astype(float)
+            continue
+        if aggregation == 'mean':
+            values = combined['sum'][column] / count[column]
+        else:
+            values = combined[aggregation][column]
+        values = values.astype(float).where(count[column] > 0)
+        data[column] = values if fill_value is None else values.fillna(fill_value)
+    return data
+
+
+def _process_how(how, columns):
+    """Aggregation of each column."""
+    aggregations = (dict((column, how) for column in columns) if
+                    not isinstance(how, dict) else
+                    dict((column, how.get(column, 'sum')) for column in columns))
+    unknown = sorted(set(aggregations.values()) - set(AGGREGATIONS))
+    if unknown:
+        raise ValueError('how must be one of {aggregations}; got {unknown}.'.format(
+                         aggregations=', '.join(AGGREGATIONS),
+                         unknown=', '.join(map(str, unknown))))
+    return aggregations
+
+
+def _to_datetime(index, date_format):
+    """Time points of a chunk as dates."""
+    if isinstance(index, pd.DatetimeIndex):
+        return index
+    if index.dtype == object:
+        return parse_index(index, date_format)
+    return pd.to_datetime(index, format=date_format)
+
+
+def _csv_chunks(path, time_column, columns, chunksize, date_format):
+    usecols = None
+    if columns is not None and time_column is not None:
+        usecols = [time_column] + list(columns)
+    dtype = {time_column: str} if time_column is not None else None
+    reader = pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.set_index(time_column or chunk.columns[0])
+        if columns is not None:
+            chunk = chunk[list(columns)]
+        chunk.index = _to_datetime(chunk.index, date_format)
+        yield chunk
+
+
+def _parquet_chunks(path, time_column, columns, chunksize, date_format):
+    pyarrow = get_pyarrow()
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    read_columns = None
+    if columns is not None and time_column is not None:
+        read_columns = [time_column] + list(columns)
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=read_columns):
+        chunk = batch.to_pandas()
+        if time_column is not None:
+            chunk = chunk.set_index(time_column)
+        elif not isinstance(chunk.index, pd.DatetimeIndex):
+            chunk = chunk.set_index(chunk.columns[0])
+        if columns is not None:
+            chunk = chunk[list(columns)]
+        chunk.index = _to_datetime(chunk.index, date_format)
+        yield chunk
+
+
+def _npy_chunks(path, columns, chunksize, start, step):
+    array = np.load(path, mmap_mode='r')
+    if array.ndim == 1:
+        array = array[:, None]
+    start = pd.Timestamp(start)
+    step = pd.Timedelta(step)
+    for offset in range(0, len(array), chunksize):
+        values = np.asarray(array[offset: offset + chunksize])
+        index = start + step * np.arange(offset, offset + len(values))
+        yield pd.DataFrame(values, index=pd.DatetimeIndex(index), columns=columns)
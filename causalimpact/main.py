@@ -23,9 +23,13 @@ import numpy as np
 import pandas as pd
 from statsmodels.tsa.statespace.structural import UnobservedComponents
 
+from causalimpact.cost import (check_budget, choose_mle_regression,
+                               estimate_cost)
 from causalimpact.inferences import Inferences
 from causalimpact.misc import standardize
+from causalimpact.periods import PeriodResolver, parse_index
 from causalimpact.plot import Plot
+from causalimpact.seasonality import detect_seasonality, resolve_harmonics
 from causalimpact.summary import Summary
 
 
@@ -152,13 +156,106 @@ class CausalImpact(BaseCausal):
             harmonics should be used to express the final value, such as:
             `nseasons=[{'period': 7, 'harmonics': 3}, {'period': 30, 'harmonics': 5}]`.
             If no value is used for `harmonics`, its total amount `h` will be considered
-            to be :math:`floor(s/2)`. Default value is [] meaning no seasonal component
-            should be modeled in the fitting process. For more information, please refer
-            to statsmodels docs:
+            to be :math:`floor(s/2)`, which makes large models for long periods such as
+            a yearly one on daily data. With `'harmonics': 'auto'` the smallest number
+            of harmonics that captures the seasonality of the pre-intervention response
+            is chosen instead (`causalimpact.seasonality.select_harmonics`) and stored
+            in `model_args['nseasons']`. With `nseasons='auto'`, the periods themselves
+            and their harmonics are detected from the pre-intervention response
+            (`causalimpact.seasonality.detect_seasonality`) and stored likewise.
+            Default value is [] meaning no seasonal component should be modeled in the
+            fitting process. For more information, please refer to statsmodels docs:
 
             https://www.statsmodels.org/dev/generated/statsmodels.tsa.statespace.structural.UnobservedComponents.html
             If a custom model is used then it should already contain the definition of
             the seasonal components.
+        concentrate_scale: bool.
+            If `True`, the irregular variance of the default model is concentrated out
+            of the likelihood so the optimizer searches over one parameter less, which
+            mostly pays off with `prior_level_sd=None`. Bounds of the level are then
+            expressed relative to the estimated scale. Defaults to `False`.
+        analytic_score: bool.
+            If `True`, the optimizer of the default model uses the gradient of the
+            log-likelihood computed analytically from one Kalman smoother pass instead
+            of numerical differentiation, which takes one extra filter pass per
+            parameter. It pays off with many covariates or seasonal components.
+            Cannot be combined with `concentrate_scale`. Defaults to `False`.
+        mle_regression: bool or str.
+            Whether the regression coefficients of the default model are parameters
+            estimated by the optimizer (`True`, reported as "beta.<covariate>" in
+            `trained_model.params`) or states estimated by the Kalman filter
+            (`False`, reported in `trained_model.smoothed_state`). States have a
+            diffuse initialization, so they don't only change the fit time but also
+            the estimates and the width of the prediction intervals. "auto" chooses
+            the formulation predicted to fit faster given the shape of the
+            pre-intervention data: few covariates are cheaper as states, many of them
+            as parameters; fixed `params` keep the coefficients as parameters.
+            Defaults to `True`.
+        steady_state_tol: float.
+            If sent, the likelihood of the default model switches to fixed-gain
+            updates once the covariances of the Kalman filter are within this
+            relative tolerance of their steady state, such as 1e-9, which makes each
+            likelihood evaluation of long pre-intervention periods several times
+            cheaper; see `causalimpact.models.SteadyStateUnobservedComponents`. The
+            regression coefficients are then parameters unless `mle_regression=False`
+            and the final filter pass, which the inferences use, is exact. Cannot be
+            combined with `concentrate_scale` nor `analytic_score`. Defaults to
+            `None`.
+        coarse_factor: int.
+            If sent, the default model is first fitted on means of this many
+            consecutive pre-intervention points, such as 24 for days of hourly data,
+            and its estimates, with variances rescaled to the full resolution, start
+            a shorter optimization on all the points; see
+            `causalimpact.models.fit_multiresolution`. It pays off with long
+            pre-intervention periods of high frequency data. Cannot be combined with
+            `concentrate_scale` nor `start_params`, as the coarse fit is what starts
+            the optimization on all the points. Defaults to `None`.
+        cost_budget: float.
+            Maximum cost, in predicted seconds of fitting and simulating, of the
+            analysis. It's checked before fitting with `causalimpact.cost`, which
+            also reports the state dimension and number of parameters of the model;
+            large `freq_seasonal` components, whose default number of harmonics is
+            `floor(period / 2)`, are the usual culprits. Defaults to `None`, no
+            budget.
+        cost_budget_action: str.
+            Either "warn", the default, which issues a `CostBudgetWarning` when the
+            predicted cost is above `cost_budget`, or "raise", which raises a
+            `ValueError` instead.
+        cov_type: str.
+            Covariance estimator of the parameters of the model, as in
+            `statsmodels` `fit` method. It's not needed for the inferences so by default
+            it's not computed ("none"); use for instance `cov_type='opg'` to have
+            standard errors available in `trained_model.bse`.
+        fit_method: str.
+            Either "mle", the default, which optimizes the parameters of the model by
+            maximum likelihood, or "filter", which skips the optimization and runs a
+            single Kalman filter pass over the pre-intervention data at fixed
+            parameters. The latter is much faster and is meant for cases where
+            reasonable parameters are already known, such as the ones of a previous fit
+            of the same series.
+        params: dict, pandas Series or array.
+            Fixed parameters used when `fit_method='filter'`; sending them implies
+            that method. Either an array with one value for each name in
+            `model.param_names` or a mapping from some of these names to values, such
+            as `previous_ci.trained_model.params`. Parameters not sent are taken from
+            `model.start_params`, except for the regression coefficients and the
+            irregular variance, which come from a least squares fit of the response
+            on the covariates, and "sigma2.level", which is set to the square of
+            `prior_level_sd` unless it's `None`.
+        post_responses: pandas DataFrame, numpy array or callable.
+            Alternative post-intervention responses, one column per response, such as
+            other variants of the same metric, or a callable that builds them from
+            `post_data`. They're analyzed against the same fit and simulations as the
+            response of the analysis, and their results are stored in
+            `responses_summary` and `responses_effects`; see
+            `Inferences.compare_responses`.
+        date_format: str.
+            `strftime` format of an index of date strings, such as "%d/%m/%Y %H:%M",
+            also used for periods sent as date strings. By default it's guessed from
+            the first date so that the index is parsed at once, and date strings of
+            the periods are parsed as `pandas.Timestamp` does (month first). Formats
+            that cannot be guessed are parsed date by date, which is much slower on
+            long series.
 
     Returns
     -------
@@ -225,14 +322,69 @@ class CausalImpact(BaseCausal):
       >>> ci = CausalImpact(data, pre_period, post_period, model=ucm)
     """
     def __init__(self, data, pre_period, post_period, model=None, alpha=0.05, **kwargs):
+        self._prepare(data, pre_period, post_period, model, alpha, **kwargs)
+        self._fit_model()
+        self._process_posterior_inferences()
+
+    @classmethod
+    def arun(cls, data, pre_period, post_period, model=None, alpha=0.05,
+             executor=None, runner=None, **kwargs):
+        """
+        Asynchronous version of the constructor (Python 3.6+). Fitting, simulation and
+        inferences run as separate stages in `executor`, so the event loop is never
+        blocked and a cancelled task stops at the next stage boundary.
+
+        Args
+        ----
+          executor: `concurrent.futures.Executor`.
+              Where stages are run. `None` uses the executor of `runner`; a
+              `ProcessPoolExecutor` is recommended for CPU parallelism.
+          runner: `causalimpact.aio.AsyncRunner`.
+              Bounds how many analyses run concurrently. `None` uses a runner shared
+              by all calls, limited to the number of CPUs.
+          Remaining arguments are the same as in the constructor.
+
+        Returns
+        -------
+          coroutine: resolves to the processed `CausalImpact` object.
+
+        Examples:
+        ---------
+          >>> ci = await CausalImpact.arun(data, pre_period, post_period)
+        """
+        from causalimpact.aio import get_default_runner
+
+        runner = runner if runner is not None else get_default_runner()
+        return runner.run(data, pre_period, post_period, model=model, alpha=alpha,
+                          executor=executor, cls=cls, **kwargs)
+
+    def _prepare(self, data, pre_period, post_period, model, alpha, **kwargs):
+        """
+        Validates input data and builds the model, leaving the object ready to be
+        fitted. This is the first stage of the constructor.
+        """
         checked_input = self._process_input_data(
             data, pre_period, post_period, model, alpha, **kwargs
         )
         super(CausalImpact, self).__init__(**checked_input)
         self.model_args = checked_input['model_args']
         self.model = checked_input['model']
-        self._fit_model()
-        self._process_posterior_inferences()
+        budget = self.model_args.get('cost_budget')
+        if budget is not None:
+            check_budget(self._estimate_cost(), budget,
+                         self.model_args.get('cost_budget_action', 'warn'))
+
+    def _estimate_cost(self):
+        """
+        Predicts the size and cost of the analysis with `causalimpact.cost`.
+
+        Returns
+        -------
+          dict as returned by `causalimpact.cost.estimate_cost`.
+        """
+        return estimate_cost(len(self.pre_data), len(self.post_data),
+                             self.pre_data.shape[1] - 1, self.model_args,
+                             n_sims=self.n_sims, model=self.model)
 
     @property
     def model_args(self):
@@ -288,8 +440,39 @@ class CausalImpact(BaseCausal):
         Uses the built model, prepares the arguments and fits the kalman filter for the
         inferences phase.
         """
-        fit_args = self._process_fit_args()
-        self.trained_model = self.model.fit(**fit_args)
+        fit_method = self.model_args.get('fit_method')
+        if fit_method is None and self.model_args.get('params') is not None:
+            fit_method = 'filter'
+        if fit_method == 'filter':
+            self.trained_model = self.model.filter(
+                self._process_filter_params(),
+                cov_type=self.model_args.get('cov_type', 'none')
+            )
+        elif self.model_args.get('concentrate_scale'):
+            # `causalimpact.models` extends statsmodels internals of recent releases, so
+            # it's only imported when its options are used.
+            from causalimpact.models import fit_concentrated
+
+            fit_args = self._process_fit_args()
+            for key in ['bounds', 'standardize', 'nseasons', 'prior_level_sd']:
+                fit_args.pop(key, None)
+            self.trained_model = fit_concentrated(
+                self.model, level_sd=self.model_args.get('prior_level_sd', 0.01),
+                **fit_args
+            )
+        elif self.model_args.get('coarse_factor'):
+            from causalimpact.models import fit_multiresolution
+
+            fit_args = self._process_fit_args()
+            for key in ['bounds', 'standardize', 'nseasons', 'prior_level_sd']:
+                fit_args.pop(key, None)
+            self.trained_model = fit_multiresolution(
+                self.model, self.model_args['coarse_factor'],
+                level_sd=self.model_args.get('prior_level_sd', 0.01), **fit_args
+            )
+        else:
+            fit_args = self._process_fit_args()
+            self.trained_model = self.model.fit(**fit_args)
 
     def _standardize_pre_post_data(self):
         """
@@ -310,11 +493,18 @@ class CausalImpact(BaseCausal):
         """
         self._compile_posterior_inferences()
         self._summarize_posterior_inferences()
+        post_responses = self.model_args.get('post_responses')
+        if post_responses is not None:
+            self.responses_summary, self.responses_effects = self.compare_responses(
+                post_responses)
 
     def _get_default_model(self):
         """Constructs default local level unobserved states model using input data and
         `self.model_args`.
 
+        The regression coefficients are either parameters or states of the model
+        according to `mle_regression`; see `causalimpact.cost.choose_mle_regression`.
+
         Returns
         -------
           model: `UnobservedComponents` built using pre-intervention data as training
@@ -324,8 +514,29 @@ class CausalImpact(BaseCausal):
         y = data.iloc[:, 0]
         X = data.iloc[:, 1:] if data.shape[1] > 1 else None
         freq_seasonal = self.model_args.get('nseasons')
-        model = UnobservedComponents(endog=y, level='llevel', exog=X,
-                                     freq_seasonal=freq_seasonal)
+        analytic_score = self.model_args.get('analytic_score', False)
+        mle_regression = self.model_args.get('mle_regression', True)
+        steady_state_tol = self.model_args.get('steady_state_tol')
+        if mle_regression == 'auto' and (steady_state_tol is not None or
+                                         self.model_args.get('params') is not None):
+            # Regression states would make the covariances time-varying and fixed
+            # params may set the regression coefficients.
+            mle_regression = True
+        elif mle_regression == 'auto':
+            mle_regression = choose_mle_regression(
+                len(y), 0 if X is None else X.shape[1], freq_seasonal, analytic_score)
+        if analytic_score:
+            from causalimpact.models import AnalyticScoreUnobservedComponents
+            model_class = AnalyticScoreUnobservedComponents
+        elif steady_state_tol is not None:
+            from causalimpact.models import SteadyStateUnobservedComponents
+            model_class = SteadyStateUnobservedComponents
+        else:
+            model_class = UnobservedComponents
+        model = model_class(endog=y, level='llevel', exog=X, freq_seasonal=freq_seasonal,
+                            mle_regression=mle_regression)
+        if steady_state_tol is not None:
+            model.ssm.tolerance = steady_state_tol
         return model
 
     def _process_input_data(self, data, pre_period, post_period, model, alpha, **kwargs):
@@ -366,6 +577,9 @@ class CausalImpact(BaseCausal):
         Raises
         ------
           ValueError: if input arguments is `None`.
+                      if `concentrate_scale`, `analytic_score`, `mle_regression`,
+                          `steady_state_tol` or `coarse_factor` is used with a
+                          customized model.
         """
         input_args = locals().copy()
         model = input_args.pop('model')
@@ -373,13 +587,24 @@ class CausalImpact(BaseCausal):
         if none_args:
             raise ValueError('{args} input cannot be empty'.format(
                              args=', '.join(none_args)))
-        processed_data = self._format_input_data(data)
+        date_format = kwargs.pop('date_format', None)
+        processed_data = self._format_input_data(data, date_format=date_format)
         pre_data, post_data = self._process_pre_post_data(processed_data, pre_period,
-                                                          post_period)
+                                                          post_period, date_format)
         alpha = self._process_alpha(alpha)
         model_args = self._process_model_args(**kwargs)
+        if not model:
+            model_args['nseasons'] = self._process_auto_nseasons(
+                model_args['nseasons'], pre_data)
         if model:
             model = self._process_input_model(model)
+            defaults = [('concentrate_scale', False), ('analytic_score', False),
+                        ('mle_regression', True), ('steady_state_tol', None),
+                        ('coarse_factor', None)]
+            for arg, default in defaults:
+                if model_args.get(arg, default) != default:
+                    raise ValueError('{arg} can only be used with the default '
+                                     'model.'.format(arg=arg))
         return {
             'data': processed_data,
             'pre_period': pre_period,
@@ -391,6 +616,29 @@ class CausalImpact(BaseCausal):
             'model_args':  model_args
         }
 
+    def _process_auto_nseasons(self, nseasons, pre_data):
+        """
+        Replaces `nseasons="auto"` by the seasonal components detected in the
+        pre-intervention response, and "auto" harmonics by the number chosen for
+        it, with `causalimpact.seasonality`. Covariates are fitted along so that the
+        seasonality they already explain isn't modeled again.
+
+        Args
+        ----
+          nseasons: list of dicts or "auto".
+          pre_data: pandas DataFrame.
+
+        Returns
+        -------
+          nseasons: list of dicts.
+        """
+        exog = pre_data.iloc[:, 1:] if pre_data.shape[1] > 1 else None
+        if nseasons == 'auto':
+            return detect_seasonality(pre_data.iloc[:, 0], exog=exog)
+        if any(season.get('harmonics') == 'auto' for season in nseasons):
+            return resolve_harmonics(pre_data.iloc[:, 0], nseasons, exog)
+        return nseasons
+
     def _process_fit_args(self):
         """
         Process the input that will be used in the fitting process for the model.
@@ -414,13 +662,30 @@ class CausalImpact(BaseCausal):
               prior_level_sd: float.
                   Prior value to be used as reference for the fitting process.
 
+              cov_type: str.
+                  How the covariance of the parameters is computed. Defaults to "none"
+                  as it's not used by the inferences; send for instance "opg" or
+                  "approx" to get standard errors in `trained_model.bse`.
+
         Returns
         -------
           model_args: dict
               The arguments that will be used in the `fit` method.
         """
         fit_args = self.model_args.copy()
+        fit_args.pop('fit_method', None)
+        fit_args.pop('concentrate_scale', None)
+        fit_args.pop('analytic_score', None)
+        fit_args.pop('mle_regression', None)
+        fit_args.pop('steady_state_tol', None)
+        fit_args.pop('coarse_factor', None)
+        fit_args.pop('cost_budget', None)
+        fit_args.pop('cost_budget_action', None)
+        fit_args.pop('post_responses', None)
         fit_args.setdefault('disp', False)
+        # The covariance of the parameters is not used by the inferences and costs
+        # extra likelihood evaluations, so it's only computed when asked for.
+        fit_args.setdefault('cov_type', 'none')
         level_sd = fit_args.get('prior_level_sd', 0.01)
         n_params = len(self.model.param_names)
         level_idx = [idx for (idx, name) in enumerate(self.model.param_names) if
@@ -437,6 +702,75 @@ class CausalImpact(BaseCausal):
         fit_args.setdefault('bounds', bounds)
         return fit_args
 
+    def _process_filter_params(self):
+        """
+        Process the fixed parameters used by the filter pass that replaces the fitting
+        process when `fit_method='filter'`.
+
+        Args
+        ----
+          self:
+            model: `UnobservedComponents` from statsmodels.
+            model_args: dict.
+              params: dict, pandas Series or array.
+                  Input parameters, either complete or indexed by name.
+              prior_level_sd: float.
+                  Standard deviation of the level used if it's not in `params`.
+
+        Returns
+        -------
+          params: np.array
+              One value for each name in `model.param_names`.
+
+        Raises
+        ------
+          ValueError: if `params` contains unknown names or has a different length than
+                      the parameters of the model.
+        """
+        param_names = list(self.model.param_names)
+        params = np.array(self.model.start_params, dtype=float)
+        beta_idx = [idx for (idx, name) in enumerate(param_names) if
+                    name.startswith('beta.')]
+        if self.model.k_exog:
+            # `start_params` regresses the covariates on the residuals of a HP filter,
+            # which is only a rough starting point for the optimizer. As there's no
+            # optimization here, betas and the irregular variance come from a least
+            # squares fit with intercept, which mimics a nearly constant level. When
+            # the betas are states, the filter estimates them instead.
+            endog = np.asarray(self.model.endog, dtype=float).ravel()
+            mask = ~np.isnan(endog)
+            design = np.column_stack([np.ones(mask.sum()), self.model.exog[mask]])
+            coefs = np.linalg.lstsq(design, endog[mask], rcond=None)[0]
+            if beta_idx:
+                params[beta_idx] = coefs[1:]
+            if 'sigma2.irregular' in param_names:
+                params[param_names.index('sigma2.irregular')] = np.var(
+                    endog[mask] - design.dot(coefs))
+        level_sd = self.model_args.get('prior_level_sd', 0.01)
+        if level_sd is not None and 'sigma2.level' in param_names:
+            # Bounds of the fitting process apply to untransformed parameters, which
+            # are standard deviations, so the prior is a standard deviation as well.
+            params[param_names.index('sigma2.level')] = level_sd ** 2
+        input_params = self.model_args.get('params')
+        if input_params is None:
+            return params
+        if hasattr(input_params, 'items'):
+            for name, value in input_params.items():
+                if name not in param_names:
+                    raise ValueError(
+                        'Unknown parameter "{name}". Model parameters are: '
+                        '{names}.'.format(name=name, names=', '.join(param_names))
+                    )
+                params[param_names.index(name)] = value
+            return params
+        input_params = np.asarray(input_params, dtype=float)
+        if input_params.shape != params.shape:
+            raise ValueError(
+                'params must have {n} values, one for each of: {names}.'.format(
+                    n=len(param_names), names=', '.join(param_names))
+            )
+        return input_params
+
     def _validate_y(self, y):
         """
         Validates if input response variable is correct and doesn't have invalid input.
@@ -530,7 +864,15 @@ class CausalImpact(BaseCausal):
         ----
           kwargs:
             standardize: bool.
-            nseasons: list of dicts.
+            nseasons: list of dicts or "auto".
+            fit_method: str.
+            params: dict, pandas Series or array.
+            concentrate_scale: bool.
+            analytic_score: bool.
+            mle_regression: bool or str.
+            cost_budget: float.
+            cost_budget_action: str.
+            post_responses: pandas DataFrame, numpy array or callable.
             other keys used in fitting process.
 
         Returns
@@ -543,7 +885,21 @@ class CausalImpact(BaseCausal):
         Raises
         ------
           ValueError: if standardize is not of type `bool`.
-                      if nseasons doesn't follow the pattern [{str key: number}].
+                      if nseasons doesn't follow the pattern [{str key: number}]
+                          or "auto" harmonics.
+                      if concentrate_scale is not of type `bool`.
+                      if analytic_score is not of type `bool` or is used with
+                          concentrate_scale.
+                      if mle_regression is neither of type `bool` nor "auto".
+                      if steady_state_tol is not a positive number or is used with
+                          analytic_score or concentrate_scale.
+                      if coarse_factor is not an integer greater than 1 or is used
+                          with concentrate_scale or start_params.
+                      if cost_budget is not a positive number.
+                      if cost_budget_action is not "warn" nor "raise".
+                      if fit_method is not "mle" nor "filter".
+                      if params is sent with fit_method "mle".
+                      if post_responses is neither array-like nor callable.
         """
         standardize = kwargs.get('standardize')
         if standardize is None:
@@ -554,7 +910,7 @@ class CausalImpact(BaseCausal):
         nseasons = kwargs.get('nseasons')
         if nseasons is None:
             nseasons = []
-        for season in nseasons:
+        for season in [] if nseasons == 'auto' else nseasons:
             if not isinstance(season, dict):
                 raise ValueError(
                     'nseasons must be a list of dicts with the required key "period" '
@@ -562,22 +918,73 @@ class CausalImpact(BaseCausal):
                 )
             if 'period' not in season:
                 raise ValueError('nseasons dicts must contain the key "period" defined.')
-            if 'harmonics' in season:
-                if season.get('harmonics') > season['period'] / 2:
+            if 'harmonics' in season and season['harmonics'] != 'auto':
+                if isinstance(season['harmonics'], str):
+                    raise ValueError('nseasons harmonics must be a number or "auto".')
+                if season['harmonics'] > season['period'] / 2:
                     raise ValueError(
                         'Total harmonics must be less or equal than periods '
                         'divided by 2.'
                     )
         kwargs['nseasons'] = nseasons
+        if not isinstance(kwargs.get('concentrate_scale', False), bool):
+            raise ValueError('concentrate_scale argument must be of type bool.')
+        if not isinstance(kwargs.get('analytic_score', False), bool):
+            raise ValueError('analytic_score argument must be of type bool.')
+        if kwargs.get('analytic_score') and kwargs.get('concentrate_scale'):
+            raise ValueError('analytic_score cannot be used with concentrate_scale.')
+        mle_regression = kwargs.get('mle_regression', True)
+        if not isinstance(mle_regression, bool) and mle_regression != 'auto':
+            raise ValueError('mle_regression must be either a bool or "auto".')
+        steady_state_tol = kwargs.get('steady_state_tol')
+        if steady_state_tol is not None:
+            if (isinstance(steady_state_tol, bool) or
+                    not isinstance(steady_state_tol, (int, float)) or
+                    steady_state_tol <= 0):
+                raise ValueError('steady_state_tol must be a positive number.')
+            if kwargs.get('analytic_score') or kwargs.get('concentrate_scale'):
+                raise ValueError('steady_state_tol cannot be used with analytic_score '
+                                 'nor concentrate_scale.')
+        coarse_factor = kwargs.get('coarse_factor')
+        if coarse_factor is not None:
+            if (isinstance(coarse_factor, bool) or
+                    not isinstance(coarse_factor, (int, np.integer)) or
+                    coarse_factor < 2):
+                raise ValueError('coarse_factor must be an integer greater than 1.')
+            if kwargs.get('concentrate_scale'):
+                raise ValueError('coarse_factor cannot be used with concentrate_scale.')
+            if kwargs.get('start_params') is not None:
+                raise ValueError('coarse_factor cannot be used with start_params.')
+        cost_budget = kwargs.get('cost_budget')
+        if cost_budget is not None and (isinstance(cost_budget, bool) or
+                                        not isinstance(cost_budget, (int, float)) or
+                                        cost_budget <= 0):
+            raise ValueError('cost_budget must be a positive number.')
+        if kwargs.get('cost_budget_action', 'warn') not in ('warn', 'raise'):
+            raise ValueError('cost_budget_action must be either "warn" or "raise".')
+        fit_method = kwargs.get('fit_method')
+        if fit_method not in (None, 'mle', 'filter'):
+            raise ValueError('fit_method must be either "mle" or "filter".')
+        if fit_method == 'mle' and kwargs.get('params') is not None:
+            raise ValueError('params can only be used when fit_method is "filter".')
+        post_responses = kwargs.get('post_responses')
+        if post_responses is not None and not (callable(post_responses) or
+                                               hasattr(post_responses, '__len__')):
+            raise ValueError('post_responses must be either array-like or callable.')
         return kwargs
 
-    def _format_input_data(self, data):
+    def _format_input_data(self, data, n_responses=1, date_format=None):
         """
         Validates and formats input data.
 
         Args
         ----
           data: `numpy.array` or `pandas.DataFrame`.
+          n_responses: int.
+              Number of leading columns that are response variables; the remaining
+              ones are covariates.
+          date_format: str.
+              Format of the dates of a string index; guessed if `None`.
 
         Returns
         -------
@@ -590,6 +997,7 @@ class CausalImpact(BaseCausal):
                       if input `data` has non-numeric values.
                       if input `data` has less than 3 points.
                       if input covariates have NAN values.
+                      if the index doesn't match `date_format`.
         """
         if not isinstance(data, pd.DataFrame):
             try:
@@ -598,20 +1006,21 @@ class CausalImpact(BaseCausal):
                 raise ValueError(
                     'Could not transform input data to pandas DataFrame.'
                 )
-        self._validate_y(data.iloc[:, 0])
+        for idx in range(n_responses):
+            self._validate_y(data.iloc[:, idx])
         # Must contain only numeric values
         if not data.applymap(np.isreal).values.all():
             raise ValueError('Input data must contain only numeric values.')
         # Covariates cannot have NAN values
-        if data.shape[1] > 1:
-            if data.iloc[:, 1:].isna().values.any():
+        if data.shape[1] > n_responses:
+            if data.iloc[:, n_responses:].isna().values.any():
                 raise ValueError('Input data cannot have NAN values.')
         # If index is a string of dates, try to convert it to datetimes which helps
         # in plotting.
-        data = self._convert_index_to_datetime(data)
+        data = self._convert_index_to_datetime(data, date_format)
         return data
 
-    def _convert_index_to_datetime(self, data):
+    def _convert_index_to_datetime(self, data, date_format=None):
         """
         If input data has index of string dates, i.e, '20180101', '20180102'..., try
         to convert it to datetime specifically, which results in
@@ -621,23 +1030,33 @@ class CausalImpact(BaseCausal):
         ----
           data: pandas DataFrame
               Input data used in causal impact analysis.
+          date_format: str.
+              Format of the dates; if `None` it's guessed from the first date and the
+              index is kept as strings when it can't be parsed.
 
         Returns
         -------
           data: pandas DataFrame
               Same input data with potentially new index of type DateTime.
+
+        Raises
+        ------
+          ValueError: if `date_format` is sent and the index doesn't match it.
         """
         if isinstance(data.index.values[0], str):
             try:
-                data.set_index(pd.to_datetime(data.index), inplace=True)
+                data.set_index(parse_index(data.index, date_format), inplace=True)
             except ValueError:
-                pass
+                if date_format is not None:
+                    raise ValueError('Input data index does not match date_format '
+                                     '"{date_format}".'.format(date_format=date_format))
         return data
 
-    def _process_pre_post_data(self, data, pre_period, post_period):
+    def _process_pre_post_data(self, data, pre_period, post_period, date_format=None):
         """
         Checks `pre_period`, `post_period` and returns data sliced accordingly to  each
-        period.
+        period. Both periods are resolved to positions with a single search on the
+        index and the data is sliced by position.
 
         Args
         ----
@@ -645,6 +1064,8 @@ class CausalImpact(BaseCausal):
           pre_period: list.
               Contains either `int` or `str` values.
           post_period: same as `pre_period`.
+          date_format: str.
+              Format of periods sent as date strings.
 
         Returns
         -------
@@ -654,9 +1075,18 @@ class CausalImpact(BaseCausal):
         Raises
         ------
           ValueError: if pre_period last value is bigger than post intervention period.
+                      if period values are not present in data.
         """
-        checked_pre_period = self._process_period(pre_period, data)
-        checked_post_period = self._process_period(post_period, data)
+        self._process_period(pre_period, data)
+        self._process_period(post_period, data)
+        resolver = PeriodResolver(data.index, date_format)
+        pre_positions, post_positions = resolver.resolve_periods([pre_period,
+                                                                  post_period])
+        # Integer periods are checked as index values and the others as positions.
+        checked_pre_period = (pre_period if isinstance(pre_period[0], int)
+                              else list(pre_positions))
+        checked_post_period = (post_period if isinstance(post_period[0], int)
+                               else list(post_positions))
 
         if checked_pre_period[1] > checked_post_period[0]:
             raise ValueError(
@@ -671,8 +1101,8 @@ class CausalImpact(BaseCausal):
         if checked_post_period[1] < checked_post_period[0]:
             raise ValueError('post_period last number must be bigger than its first.')
         result = [
-            data.loc[pre_period[0]: pre_period[1], :],
-            data.loc[post_period[0]: post_period[1], :]
+            resolver.take(data, pre_positions),
+            resolver.take(data, post_positions)
         ]
         return result
 
@@ -696,7 +1126,6 @@ class CausalImpact(BaseCausal):
         ------
           ValueError: if input `period` is not of type list.
                       if input doesn't have two elements.
-                      if period date values are not present in data.
         """
         if not isinstance(period, list):
             raise ValueError('Input period must be of type list.')
@@ -714,35 +1143,4 @@ class CausalImpact(BaseCausal):
             (isinstance(period[1], pd.Timestamp) and isinstance(period[1], pd.Timestamp))
         ):
             raise ValueError('Input must contain either int, str or pandas Timestamp')
-        # Tests whether the input period is indeed present in the input data index.
-        for point in period:
-            if point not in data.index:
-                if isinstance(point, pd.Timestamp):
-                    point = point.strftime('%Y%m%d')
-                raise ValueError("{point} not present in input data index.".format(
-                    point=str(point)
-                    )
-                )
-        if isinstance(period[0], str) or isinstance(period[0], pd.Timestamp):
-            period = self._convert_str_period_to_int(period, data)
         return period
-
-    def _convert_str_period_to_int(self, period, data):
-        """
-        Converts string values from `period` to integer offsets from `data`.
-
-        Args
-        ----
-          period: list of str or pandas timestamps
-          data: pandas DataFrame.
-
-        Returns
-        -------
-          period: list of int.
-              Where each value is the correspondent integer based value in `data` index.
-        """
-        result = []
-        for date in period:
-            offset = data.index.get_loc(date)
-            result.append(offset)
-        return result
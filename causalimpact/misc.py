@@ -88,7 +88,9 @@ def get_reference_model(model, endog, exog):
     """
     Build an `UnobservedComponents` model using as reference the input `model`. We need
     an exactly similar object as `model` but instantiated with different `endog` and
-    `exog`.
+    `exog`. The formulation of the regression is kept, so the state vector of `model`
+    (which includes the regression coefficients when `model.mle_regression` is
+    `False`) can initialize simulations of `ref_model`.
 
     Args
     ----
@@ -112,3 +114,28 @@ def get_reference_model(model, endog, exog):
         model_args['exog'] = exog
     ref_model = UnobservedComponents(**model_args)
     return ref_model
+
+
+def get_pyarrow():
+    """
+    As `pyarrow` is an optional dependency we import it only when required. Used by
+    every module that reads or writes Parquet and Arrow files.
+
+    Returns
+    -------
+      pyarrow: module.
+          `pyarrow` with its `ipc` and `parquet` submodules loaded.
+
+    Raises
+    ------
+      ImportError: if `pyarrow` is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('pyarrow is required for reading and writing Parquet or Arrow '
+                          'files. Please install it with '
+                          '"pip install pycausalimpact[parquet]".')
+    return pyarrow
@@ -0,0 +1,610 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Alternative parametrizations and scores of the default `UnobservedComponents` model
+that make its maximum likelihood estimation cheaper.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+from statsmodels.tsa.statespace.kalman_filter import (INVERT_UNIVARIATE,
+                                                      SOLVE_LU)
+from statsmodels.tsa.statespace.kalman_smoother import (
+    SMOOTHER_DISTURBANCE, SMOOTHER_DISTURBANCE_COV)
+from statsmodels.tsa.statespace.structural import UnobservedComponents
+
+# Minimum number of observations of the coarse model of `fit_multiresolution`.
+MIN_COARSE_NOBS = 10
+# Options of `loglike` and `score` of statsmodels models, with their defaults.
+LOGLIKE_ARGS = [('transformed', True), ('includes_fixed', False),
+                ('complex_step', False)]
+SCORE_ARGS = [('transformed', True), ('includes_fixed', False),
+              ('score_method', 'approx'), ('approx_complex_step', None),
+              ('approx_centered', False)]
+
+
+def _handle_args(options, *args, **kwargs):
+    """
+    Reads the `options` of `loglike` or `score` from positional arguments, which the
+    optimizers of statsmodels send as a dict, or from keyword arguments.
+
+    Returns
+    -------
+      tuple with the value of each option followed by the remaining `kwargs`.
+    """
+    names = [name for name, _ in options]
+    if args:
+        flags = args[0] if isinstance(args[0], dict) else dict(zip(names, args))
+        for name in flags:
+            if name in kwargs:
+                raise TypeError("got multiple values for keyword argument "
+                                "'{name}'".format(name=name))
+        values = [flags.get(name, default) for name, default in options]
+    else:
+        values = [kwargs.pop(name, default) for name, default in options]
+    return tuple(values) + (kwargs,)
+
+
+class ConcentratedUnobservedComponents(UnobservedComponents):
+    """
+    `UnobservedComponents` whose irregular variance (the scale) is concentrated out of
+    the likelihood, so the optimizer searches over one parameter less. The remaining
+    variances are expressed as ratios to the scale and named "ratio.<component>";
+    the scale itself is estimated by the filter and available as `results.scale`.
+
+    Arguments are the same as in `UnobservedComponents`.
+
+    Raises
+    ------
+      ValueError: if the model has no irregular component.
+    """
+    def __init__(self, endog, *args, **kwargs):
+        super(ConcentratedUnobservedComponents, self).__init__(endog, *args, **kwargs)
+        if not self.irregular:
+            raise ValueError('Concentrating the scale requires an irregular component.')
+        self.k_params -= 1
+        self.ssm.filter_concentrated = True
+
+    @property
+    def param_names(self):
+        names = super(ConcentratedUnobservedComponents, self).param_names[1:]
+        return [
+            'ratio.' + name[len('sigma2.'):] if name.startswith('sigma2.') else name
+            for name in names
+        ]
+
+    @property
+    def start_params(self):
+        params = np.array(super(ConcentratedUnobservedComponents, self).start_params,
+                          dtype=float)
+        params[1:1 + self.k_state_cov] /= max(params[0], 1e-10)
+        return params[1:]
+
+    def transform_params(self, unconstrained):
+        return super(ConcentratedUnobservedComponents, self).transform_params(
+            np.r_[1., unconstrained])[1:]
+
+    def untransform_params(self, constrained):
+        return super(ConcentratedUnobservedComponents, self).untransform_params(
+            np.r_[1., constrained])[1:]
+
+    def update(self, params, transformed=True, includes_fixed=False,
+               complex_step=False):
+        params = self.handle_params(params, transformed=transformed,
+                                    includes_fixed=includes_fixed)
+        super(ConcentratedUnobservedComponents, self).update(
+            np.r_[1., params], transformed=True, includes_fixed=True,
+            complex_step=complex_step)
+
+    def expand_params(self, params, scale):
+        """
+        Converts parameters of this model into the ones of the equivalent
+        `UnobservedComponents` model.
+
+        Args
+        ----
+          params: array of parameters of this model.
+          scale: float.
+              Irregular variance, such as `results.scale`.
+
+        Returns
+        -------
+          params: np.array.
+        """
+        params = np.r_[1., params] * scale
+        params[1 + self.k_state_cov:] /= scale
+        return params
+
+
+class AnalyticScoreUnobservedComponents(UnobservedComponents):
+    """
+    `UnobservedComponents` whose score (the gradient of the log-likelihood) is computed
+    analytically from one disturbance smoother pass instead of by numerical
+    differentiation, which takes one extra filter pass per parameter. It applies to
+    models whose parameters are all variances or regression coefficients, such as the
+    default local level + regression + frequency-seasonal model.
+
+    For a variance `s2` of disturbances `u_t`, the score is
+    `sum_t(E[u_t ** 2 | y] - s2) / (2 * s2 ** 2)` and for a regression coefficient
+    `sum_t(x_t * E[e_t | y]) / h`, where `e_t` is the irregular disturbance and `h` its
+    variance (Koopman and Shephard, 1992). Observations discarded from the likelihood
+    by `loglikelihood_burn` are accounted for by subtracting the score of a model of
+    only those observations.
+
+    Arguments are the same as in `UnobservedComponents`. The numerical scores remain
+    available with `score_method` (or `optim_score` in `fit`) "approx" or "harvey".
+
+    Raises
+    ------
+      ValueError: if the model has no irregular component or has cycle or
+          autoregressive components.
+    """
+    _score_param_defaults = [True, False, 'analytic', None, False]
+
+    def __init__(self, endog, *args, **kwargs):
+        super(AnalyticScoreUnobservedComponents, self).__init__(endog, *args, **kwargs)
+        if not self.irregular or self.cycle or self.autoregressive:
+            raise ValueError('Analytic score requires an irregular component and '
+                             'parameters that are variances or regression '
+                             'coefficients only.')
+        self._burn_model = None
+
+    def fit(self, *args, **kwargs):
+        kwargs.setdefault('optim_score', 'analytic')
+        return super(AnalyticScoreUnobservedComponents, self).fit(*args, **kwargs)
+
+    def score(self, params, *args, **kwargs):
+        (transformed, includes_fixed, method, approx_complex_step,
+         approx_centered, kwargs) = _handle_args(SCORE_ARGS, *args, **kwargs)
+        method = kwargs.pop('method', method)
+        if method != 'analytic':
+            return super(AnalyticScoreUnobservedComponents, self).score(
+                params, transformed=transformed, includes_fixed=includes_fixed,
+                score_method=method, approx_complex_step=approx_complex_step,
+                approx_centered=approx_centered, **kwargs)
+        out = self.handle_params(params, transformed=transformed,
+                                 includes_fixed=includes_fixed,
+                                 return_jacobian=not transformed)
+        if transformed:
+            params = out
+        else:
+            params, transform_score = out
+        score = self._disturbance_score(self, params)
+        burn = min(self.loglikelihood_burn, self.nobs)
+        if burn:
+            score -= self._disturbance_score(self._get_burn_model(burn), params)
+        if not transformed:
+            score = np.dot(transform_score, score)
+        if self._has_fixed_params and not includes_fixed:
+            score = score[self._free_params_index]
+        return score
+
+    def _get_burn_model(self, burn):
+        """Model of the first `burn` observations, built once."""
+        if self._burn_model is None:
+            init_kwds = self._get_init_kwds()
+            init_kwds['endog'] = self.endog[:burn, 0]
+            if self.exog is not None:
+                init_kwds['exog'] = self.exog[:burn]
+            self._burn_model = UnobservedComponents(**init_kwds)
+        return self._burn_model
+
+    @staticmethod
+    def _disturbance_score(model, params):
+        """
+        Score of the full log-likelihood of `model`, ignoring `loglikelihood_burn`.
+
+        Args
+        ----
+          model: `UnobservedComponents` with the same parameters as this model.
+          params: np.array of transformed parameters, including fixed ones.
+
+        Returns
+        -------
+          score: np.array.
+        """
+        params = np.asarray(params, dtype=float)
+        model.update(params, transformed=True, includes_fixed=True)
+        # The low level filter and smoother skip building results objects, which would
+        # copy every filter output.
+        model.ssm._filter()
+        smoothed = model.ssm._smooth(SMOOTHER_DISTURBANCE | SMOOTHER_DISTURBANCE_COV)
+        score = np.zeros(len(params))
+        h = params[0]
+        measurement = np.asarray(smoothed.smoothed_measurement_disturbance)[0]
+        measurement_var = np.asarray(smoothed.smoothed_measurement_disturbance_cov)[0, 0]
+        score[0] = 0.5 * np.sum(measurement ** 2 + measurement_var - h) / h ** 2
+        offset = 1
+        k_variances = model.k_state_cov
+        if k_variances:
+            # Variances of frequency-seasonal components are shared by all of their
+            # harmonics.
+            if model._repeat_any_var:
+                groups = np.repeat(np.arange(k_variances), model._var_repetitions)
+            else:
+                groups = np.arange(k_variances)
+            variances = params[offset:offset + k_variances][groups]
+            disturbance = np.asarray(smoothed.smoothed_state_disturbance)
+            disturbance_var = np.diagonal(
+                np.asarray(smoothed.smoothed_state_disturbance_cov), axis1=0, axis2=1).T
+            per_state = 0.5 * np.sum(
+                disturbance ** 2 + disturbance_var - variances[:, None], axis=1
+            ) / variances ** 2
+            score[offset:offset + k_variances] = np.bincount(groups, per_state,
+                                                             minlength=k_variances)
+            offset += k_variances
+        if model.mle_regression and model.k_exog:
+            score[offset:offset + model.k_exog] = model.exog.T.dot(measurement) / h
+        return score
+
+
+class SteadyStateUnobservedComponents(UnobservedComponents):
+    """
+    `UnobservedComponents` whose log-likelihood switches to fixed-gain updates once
+    the covariance recursions of the Kalman filter converge to their steady state.
+
+    statsmodels already does so for time-invariant models, but the regression of the
+    default model with `mle_regression=True` is a time-varying observation intercept
+    that disables it, even though covariances don't depend on intercepts. Here the
+    first observations are filtered by statsmodels until the predicted state
+    covariance `P` changes by less than `ssm.tolerance`; the remaining ones only
+    update the state mean with the steady-state gain `K`:
+
+        a[t + 1] = A a[t] + K (y[t] - d[t]),  A = T - K Z
+
+    which is computed in blocks of `block_size` points with a few matrix products
+    instead of one filter step per point, so it also runs with the complex parameters
+    of complex step differentiation. If the covariances don't converge or there are
+    missing values after the first observations, the likelihood is computed by
+    statsmodels as usual. Filtering and smoothing are never changed.
+
+    Arguments are the same as in `UnobservedComponents`; the tolerance is set in
+    `model.ssm.tolerance` afterwards, as in statsmodels.
+    """
+    block_size = 64
+    # Initial number of observations filtered by statsmodels, doubled while the
+    # covariances haven't converged up to a quarter of all of them.
+    min_head = 100
+
+    def __init__(self, endog, *args, **kwargs):
+        super(SteadyStateUnobservedComponents, self).__init__(endog, *args, **kwargs)
+        self._head_models = {}
+
+    def loglike(self, params, *args, **kwargs):
+        transformed, includes_fixed, complex_step, kwargs = _handle_args(
+            LOGLIKE_ARGS, *args, **kwargs)
+        if kwargs or not self._steady_state_applies():
+            return super(SteadyStateUnobservedComponents, self).loglike(
+                params, transformed=transformed, includes_fixed=includes_fixed,
+                complex_step=complex_step, **kwargs)
+        params = self.handle_params(params, transformed=transformed,
+                                    includes_fixed=includes_fixed)
+        self.update(params, transformed=True, includes_fixed=True,
+                    complex_step=complex_step)
+        filter_args = {}
+        if complex_step:
+            filter_args['inversion_method'] = INVERT_UNIVARIATE | SOLVE_LU
+        # Each evaluation starts from a short head as parameters tried by the
+        # optimizer may converge at very different rates.
+        n_head = max(self.min_head, 2 * (self.loglikelihood_burn + 1))
+        while n_head <= self.nobs // 4:
+            loglike = self._steady_state_loglike(params, n_head, complex_step,
+                                                 filter_args)
+            if loglike is not None:
+                return loglike
+            n_head *= 2
+        return self.ssm.loglike(complex_step=complex_step, **filter_args)
+
+    def _steady_state_applies(self):
+        """Whether covariances of the filter don't depend on time."""
+        ssm = self.ssm
+        return (ssm.k_endog == 1 and not ssm.filter_concentrated and
+                all(ssm[name].ndim < 3 for name in ['design', 'obs_cov', 'transition',
+                                                    'selection', 'state_cov']) and
+                not np.any(ssm['state_intercept']))
+
+    def _steady_state_loglike(self, params, n_head, complex_step, filter_args):
+        """
+        Log-likelihood of the first `n_head` observations from statsmodels plus the
+        fixed-gain one of the others, `None` if covariances haven't converged.
+        """
+        head = self._get_head_model(n_head)
+        head.update(params, transformed=True, includes_fixed=True,
+                    complex_step=complex_step)
+        results = head.ssm.filter(complex_step=complex_step, **filter_args)
+        cov = results.predicted_state_cov
+        if not _converged(cov, self.ssm.tolerance):
+            return None
+        intercept = self.ssm['obs_intercept']
+        intercept = intercept[0, n_head:] if intercept.ndim == 2 else intercept[0]
+        residuals = self.endog[n_head:, 0] - intercept
+        if np.isnan(residuals).any():
+            return self.ssm.loglike(complex_step=complex_step, **filter_args)
+        design = self.ssm['design'][0]
+        transition = self.ssm['transition']
+        cov = cov[..., -1]
+        forecast_var = design.dot(cov).dot(design) + self.ssm['obs_cov'][0, 0]
+        gain = transition.dot(cov).dot(design) / forecast_var
+        forecasts = _fixed_gain_forecasts(
+            transition - np.outer(gain, design), gain, design,
+            results.predicted_state[:, -1], residuals, self.block_size)
+        errors = residuals - forecasts
+        loglike = -0.5 * (len(errors) * np.log(2 * np.pi * forecast_var) +
+                          np.sum(errors ** 2) / forecast_var)
+        burn = min(head.loglikelihood_burn, n_head)
+        return np.sum(results.llf_obs[burn:]) + loglike
+
+    def _get_head_model(self, n_head):
+        """Model of the first `n_head` observations, built once for each length."""
+        if n_head not in self._head_models:
+            init_kwds = self._get_init_kwds()
+            init_kwds['endog'] = self.endog[:n_head, 0]
+            if self.exog is not None:
+                init_kwds['exog'] = self.exog[:n_head]
+            self._head_models[n_head] = UnobservedComponents(**init_kwds)
+        return self._head_models[n_head]
+
+
+def _converged(cov, tolerance):
+    """
+    Whether the last predicted state covariance of `cov` is within `tolerance` of its
+    limit, relative to its size. Covariances converge geometrically, so the distance
+    to the limit is extrapolated from the last change and the rate of convergence
+    between the middle and the end of the series.
+    """
+    n_steps = cov.shape[-1] - 1
+    middle = n_steps // 2
+    scale = max(np.max(np.abs(cov[..., -1])), 1.)
+    last = np.max(np.abs(cov[..., -1] - cov[..., -2]))
+    previous = np.max(np.abs(cov[..., middle] - cov[..., middle - 1]))
+    # Changes within rounding errors don't decrease any further.
+    if last <= 8 * np.finfo(float).eps * scale:
+        return True
+    if not 0 < last < previous:
+        return False
+    rate = (last / previous) ** (1. / (n_steps - middle))
+    distance = last * rate / (1 - rate)
+    return distance <= tolerance * scale
+
+
+def _fixed_gain_forecasts(transition, gain, design, state, residuals, block_size):
+    """
+    One-step forecasts `Z a[t]` of the recursion `a[t + 1] = A a[t] + K r[t]`
+    starting from `a[0] = state`, where `transition` is `A`, `gain` is `K`, `design`
+    is `Z` and `residuals` is `r`.
+
+    Within a block of `b` points, `Z a[t0 + j] = Z A^j a[t0] +
+    sum_{i < j} Z A^(j - 1 - i) K r[t0 + i]`, a product with a lower triangular
+    Toeplitz matrix, and the state is carried from block to block with `A^b`.
+    """
+    n_obs = len(residuals)
+    k_states = len(state)
+    dtype = np.result_type(transition, gain, residuals, state)
+    # design_powers[j] = Z A^j and gain_powers[:, j] = A^j K.
+    design_powers = np.empty((block_size, k_states), dtype=dtype)
+    gain_powers = np.empty((k_states, block_size), dtype=dtype)
+    design_powers[0] = design
+    gain_powers[:, 0] = gain
+    for idx in range(1, block_size):
+        design_powers[idx] = design_powers[idx - 1].dot(transition)
+        gain_powers[:, idx] = transition.dot(gain_powers[:, idx - 1])
+    impulse = design_powers.dot(gain)
+    toeplitz = np.zeros((block_size, block_size), dtype=dtype)
+    for lag in range(1, block_size):
+        rows = np.arange(lag, block_size)
+        toeplitz[rows, rows - lag] = impulse[lag - 1]
+    n_blocks = -(-n_obs // block_size)
+    blocks = np.zeros(n_blocks * block_size, dtype=residuals.dtype)
+    blocks[:n_obs] = residuals
+    blocks = blocks.reshape(n_blocks, block_size)
+    # Contribution of each block to the state at the start of the next one.
+    carried = blocks.dot(gain_powers[:, ::-1].T)
+    block_transition = np.linalg.matrix_power(transition, block_size)
+    states = np.empty((n_blocks, k_states), dtype=dtype)
+    for idx in range(n_blocks):
+        states[idx] = state
+        state = block_transition.dot(state) + carried[idx]
+    forecasts = states.dot(design_powers.T) + blocks.dot(toeplitz.T)
+    return forecasts.ravel()[:n_obs]
+
+
+def fit_concentrated(model, level_sd=0.01, max_iter=5, tol=1e-3, **fit_args):
+    """
+    Fits `model` by maximum likelihood with its scale concentrated out and returns the
+    results of the equivalent `UnobservedComponents` at the estimated parameters.
+
+    Without bounds in the level, this is the same maximization as fitting `model`
+    directly, in one dimension less. The level standard deviation of the default model
+    is bounded to `level_sd` +- 20% though (bounds apply to untransformed parameters,
+    which are standard deviations), and as the concentrated model estimates the ratio
+    of the level variance to the scale, the bounds are divided by the square root of
+    the scale and refreshed, warm starting the optimizer, until the estimated scale
+    stops changing or for at most `max_iter` fits. `model` is then fitted with the
+    usual bounds starting from the last estimate, which takes few iterations and
+    reaches the same optimum as fitting it directly.
+
+    Args
+    ----
+      model: `UnobservedComponents`.
+      level_sd: float.
+          Same as `prior_level_sd` of `CausalImpact`; `None` means no bounds.
+      max_iter: int.
+          Maximum number of fits while the scale doesn't converge.
+      tol: float.
+          Relative change of the scale under which it's considered converged.
+      fit_args: arguments sent to the `fit` method; `cov_type` is used only by the
+          final fit or filter pass of `model`. `start_params`, if sent, are parameters
+          of `model` whose irregular variance is taken as the initial scale.
+
+    Returns
+    -------
+      results: `UnobservedComponentsResultsWrapper` of `model`.
+    """
+    init_kwds = model._get_init_kwds()
+    init_kwds['endog'] = model.data.orig_endog
+    if model.exog is not None:
+        init_kwds['exog'] = model.data.orig_exog
+    concentrated = ConcentratedUnobservedComponents(**init_kwds)
+    cov_type = fit_args.pop('cov_type', 'none')
+    user_start_params = fit_args.pop('start_params', None)
+    fit_args.setdefault('disp', False)
+    names = concentrated.param_names
+    level_idx = names.index('ratio.level') if 'ratio.level' in names else None
+    bounded = level_idx is not None and level_sd is not None
+    k_variances = 1 + concentrated.k_state_cov
+    if user_start_params is not None:
+        # The irregular variance is the scale the other variances are relative to.
+        user_start_params = np.asarray(user_start_params, dtype=float)
+        start_params = user_start_params[1:].copy()
+        start_params[:k_variances - 1] /= max(user_start_params[0], 1e-10)
+    else:
+        # `start_params` gives the same variance to the irregular and seasonal
+        # components, so ratios start relative to the sum of all variances instead,
+        # otherwise they may drive the scale to zero.
+        variances = np.asarray(model.start_params[:k_variances], dtype=float)
+        start_params = concentrated.start_params
+        start_params[:k_variances - 1] = variances[1:] / max(variances.sum(), 1e-10)
+    scale = concentrated.filter(start_params).scale
+    for _ in range(max_iter):
+        bounds = [(None, None)] * len(names)
+        if bounded:
+            bounds[level_idx] = (level_sd / 1.2 / np.sqrt(scale),
+                                 level_sd * 1.2 / np.sqrt(scale))
+            start_params[level_idx] = np.clip(np.sqrt(start_params[level_idx]),
+                                              *bounds[level_idx]) ** 2
+        results = concentrated.fit(start_params=start_params, bounds=bounds,
+                                   cov_type='none', **fit_args)
+        converged = not bounded or abs(results.scale / scale - 1) < tol
+        scale = results.scale
+        start_params = np.asarray(results.params, dtype=float)
+        if converged:
+            break
+    params = concentrated.expand_params(start_params, scale)
+    if not bounded:
+        return model.filter(params, cov_type=cov_type)
+    # Bounds relative to the scale match the usual ones only at the scale they were
+    # computed with, so the estimate is refined under the usual bounds, which takes a
+    # few iterations of `model` and doesn't leave a lower optimum.
+    bounds = [(None, None)] * len(params)
+    bounds[1] = (level_sd / 1.2, level_sd * 1.2)
+    params[1] = np.clip(np.sqrt(params[1]), *bounds[1]) ** 2
+    return model.fit(start_params=params, bounds=bounds, cov_type=cov_type, **fit_args)
+
+
+def fit_multiresolution(model, factor, level_sd=0.01, **fit_args):
+    """
+    Fits `model` by maximum likelihood starting from the estimates of a coarse model
+    fitted to means of `factor` consecutive observations, such as days of hourly data.
+
+    The coarse model has the level and regression of `model`, the latter as states,
+    and is about `factor` times cheaper to fit. Means of `k` points of a local level
+    with level variance `q` follow a local level with level variance `k q`, which
+    gives the level variance of `model`. The regression coefficients are the last
+    smoothed states of the coarse model and the irregular variance `h` is taken from
+    the first differences of the full resolution residuals `r`, whose variance is
+    `q + 2 h`. Regression coefficients that are parameters of `model` are then
+    refined by one filter pass at full resolution with them as states. Seasonal
+    components mostly average out, so they're left out of the coarse model and their
+    variances start from a fraction of the irregular one.
+
+    Args
+    ----
+      model: `UnobservedComponents`.
+      factor: int.
+          Number of consecutive observations averaged by the coarse model. The oldest
+          ones are left out of it if `model.nobs` is not a multiple of `factor`.
+      level_sd: float.
+          Same as `prior_level_sd` of `CausalImpact`; `None` means no bounds. Bounds of
+          the coarse level are scaled by `sqrt(factor)`.
+      fit_args: arguments sent to the `fit` method of both models; `cov_type` is used
+          only by `model`. `start_params` can't be sent since the coarse fit gives
+          them.
+
+    Returns
+    -------
+      results: `UnobservedComponentsResults` of `model`.
+
+    Raises
+    ------
+      ValueError: if the coarse model has fewer than `MIN_COARSE_NOBS` observations.
+                  if `start_params` is sent.
+    """
+    if fit_args.get('start_params') is not None:
+        raise ValueError('start_params cannot be sent as the coarse fit gives them.')
+    n_coarse = model.nobs // factor
+    if n_coarse < MIN_COARSE_NOBS:
+        raise ValueError('Averaging {factor} points leaves {n_coarse} observations to '
+                         'fit, fewer than {min_nobs}.'.format(
+                             factor=factor, n_coarse=n_coarse,
+                             min_nobs=MIN_COARSE_NOBS))
+    endog = model.endog[:, 0]
+    exog = model.exog
+    level = model._get_init_kwds()['level']
+    start = model.nobs - n_coarse * factor
+    coarse = UnobservedComponents(
+        _block_means(endog[start:], factor), level=level,
+        exog=None if exog is None else _block_means(exog[start:], factor),
+        mle_regression=False)
+    cov_type = fit_args.pop('cov_type', 'none')
+    fit_args.pop('start_params', None)
+    fit_args.setdefault('disp', False)
+    names = model.param_names
+    bounds = [(None, None)] * len(names)
+    coarse_bounds = [(None, None)] * len(coarse.param_names)
+    if 'sigma2.level' in names and level_sd is not None:
+        bounds[names.index('sigma2.level')] = (level_sd / 1.2, level_sd * 1.2)
+        coarse_bounds[coarse.param_names.index('sigma2.level')] = (
+            level_sd / 1.2 * np.sqrt(factor), level_sd * 1.2 * np.sqrt(factor))
+    coarse_results = coarse.fit(bounds=coarse_bounds, cov_type='none', **fit_args)
+    estimates = dict(zip(coarse.param_names, np.asarray(coarse_results.params)))
+    level_var = estimates.get('sigma2.level', 0.) / factor
+    residuals = endog
+    if exog is not None:
+        beta = coarse_results.smoothed_state[-exog.shape[1]:, -1]
+        residuals = endog - exog.dot(beta)
+    # Starting from a zero variance, the optimizer couldn't move it.
+    irregular_var = max((np.nanvar(np.diff(residuals)) - level_var) / 2,
+                        1e-6 * np.nanvar(residuals))
+    start_params = np.array(model.start_params, dtype=float)
+    for idx, name in enumerate(names):
+        if name == 'sigma2.level':
+            start_params[idx] = level_var
+        elif name == 'sigma2.irregular':
+            start_params[idx] = irregular_var
+        elif name.startswith('sigma2.'):
+            # Seasonal components usually change much more slowly than the noise,
+            # and variances that end up near zero take many iterations to get there.
+            start_params[idx] = irregular_var / 100
+        if bounds[idx] != (None, None):
+            start_params[idx] = np.clip(np.sqrt(start_params[idx]), *bounds[idx]) ** 2
+    if model.mle_regression and exog is not None:
+        k_exog = exog.shape[1]
+        init_kwds = model._get_init_kwds()
+        init_kwds.update(endog=endog, exog=exog, mle_regression=False)
+        states = UnobservedComponents(**init_kwds)
+        start_params[-k_exog:] = states.filter(
+            start_params[:-k_exog]).filtered_state[-k_exog:, -1]
+    return model.fit(start_params=start_params, bounds=bounds, cov_type=cov_type,
+                     **fit_args)
+
+
+def _block_means(values, factor):
+    """Means of blocks of `factor` rows of `values` ignoring missing values."""
+    blocks = values.reshape((-1, factor) + values.shape[1:])
+    counts = np.sum(~np.isnan(blocks), axis=1)
+    with np.errstate(invalid='ignore'):
+        return np.nansum(blocks, axis=1) / counts
@@ -0,0 +1,149 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Analyzes several response metrics of the same intervention against shared covariates.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import copy
+from collections import OrderedDict
+
+import pandas as pd
+
+from causalimpact.batch import summary_row
+from causalimpact.cost import check_budget
+from causalimpact.main import BaseCausal, CausalImpact
+from causalimpact.misc import standardize
+from causalimpact.parallel import ThreadingPolicy
+
+
+class MultiCausalImpact(object):
+    """
+    Runs one Causal Impact analysis per response metric, all of them with the same
+    covariates. Input data, periods and arguments are validated once, covariates are
+    standardized once, and the analyses of the metrics run in parallel.
+
+    Args
+    ----
+      data: pandas DataFrame.
+          Holds the response metrics and the covariates as named columns.
+      pre_period: list.
+      post_period: list.
+      metrics: list.
+          Columns of the response metrics.
+      covariates: list.
+          Columns of the `X` covariates shared by all metrics. Defaults to none.
+      alpha: float.
+      n_jobs: int.
+          Number of worker processes. If 1, metrics are analyzed in the current process
+          and if `None` it's chosen by `causalimpact.parallel.ThreadingPolicy`.
+      threads_per_worker: int.
+          Native (BLAS/OpenMP) threads each worker may use.
+      kwargs: arguments of `CausalImpact` used by every metric, such as `nseasons`
+          and `prior_level_sd`. "auto" seasons are resolved for each metric.
+
+    Attributes
+    ----------
+      results: OrderedDict.
+          `CausalImpact` object of each metric, with posterior inferences processed.
+      summary_data: pandas DataFrame.
+          One row per metric with the columns described in
+          `causalimpact.batch.summary_row`.
+
+    Raises
+    ------
+      ValueError: if `metrics` is empty or some column is not present in `data`.
+                  if any argument is invalid, as in `CausalImpact`.
+
+    Examples:
+    ---------
+      >>> multi = MultiCausalImpact(data, pre_period, post_period,
+      ...                           metrics=['revenue', 'orders'], covariates=['x1'])
+      >>> multi.summary_data[['abs_effect_cumulative', 'p_value']]
+      >>> multi.results['revenue'].plot()
+    """
+    def __init__(self, data, pre_period, post_period, metrics, covariates=None,
+                 alpha=0.05, n_jobs=None, threads_per_worker=None, **kwargs):
+        metrics = list(metrics)
+        covariates = list(covariates or [])
+        if not metrics:
+            raise ValueError('metrics cannot be empty.')
+        missing = [str(column) for column in metrics + covariates
+                   if column not in data.columns]
+        if missing:
+            raise ValueError('{columns} not present in input data.'.format(
+                             columns=', '.join(missing)))
+        analyses = self._prepare(data, pre_period, post_period, metrics, covariates,
+                                 alpha, **kwargs)
+        policy = ThreadingPolicy(n_jobs, threads_per_worker, n_tasks=len(analyses))
+        analyses = list(policy.map(_run_metric, analyses))
+        self.results = OrderedDict(zip(metrics, analyses))
+        self.summary_data = pd.DataFrame(
+            [summary_row(metric, ci) for metric, ci in self.results.items()]
+        ).set_index('unit').rename_axis('metric')
+
+    def _prepare(self, data, pre_period, post_period, metrics, covariates, alpha,
+                 **kwargs):
+        """
+        Validates the inputs and builds the model of each metric, ready to be fitted.
+
+        Returns
+        -------
+          analyses: list of `CausalImpact`, one for each metric.
+        """
+        base = CausalImpact.__new__(CausalImpact)
+        date_format = kwargs.pop('date_format', None)
+        processed = base._format_input_data(data[metrics + covariates],
+                                            n_responses=len(metrics),
+                                            date_format=date_format)
+        pre_data, post_data = base._process_pre_post_data(processed, pre_period,
+                                                          post_period, date_format)
+        alpha = base._process_alpha(alpha)
+        model_args = base._process_model_args(**kwargs)
+        if model_args['standardize']:
+            normed_pre_data, (mu, sig) = standardize(pre_data)
+            normed_post_data = (post_data - mu) / sig
+        analyses = []
+        for metric in metrics:
+            columns = [metric] + covariates
+            ci = CausalImpact.__new__(CausalImpact)
+            BaseCausal.__init__(ci, processed[columns], pre_period, post_period,
+                                pre_data[columns], post_data[columns], alpha)
+            if model_args['standardize']:
+                ci.normed_pre_data = normed_pre_data[columns]
+                ci.normed_post_data = normed_post_data[columns]
+                ci.mu_sig = (mu[metric], sig[metric])
+            metric_args = copy.copy(model_args)
+            metric_args['nseasons'] = ci._process_auto_nseasons(
+                model_args['nseasons'], ci.pre_data)
+            # Set directly as the setter would standardize the data again.
+            ci._model_args = metric_args
+            ci.model = None
+            budget = metric_args.get('cost_budget')
+            if budget is not None:
+                check_budget(ci._estimate_cost(), budget,
+                             metric_args.get('cost_budget_action', 'warn'))
+            analyses.append(ci)
+        return analyses
+
+
+def _run_metric(ci):
+    """Fits and processes the analysis of one metric; worker function of
+    `MultiCausalImpact`."""
+    ci._fit_model()
+    ci._process_posterior_inferences()
+    return ci
@@ -0,0 +1,231 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Coordinates worker processes and native (BLAS/OpenMP) thread pools in parallel runs.
+
+Each numpy/scipy call used by the Kalman filter and by the simulations may start a
+BLAS thread pool as large as the machine. Running several analyses in parallel
+processes then oversubscribes the CPUs, so every parallel path of this package splits
+the available cores between processes and the threads of each process.
+
+Thread pools are limited through `threadpoolctl` when it's installed
+(`pip install pycausalimpact[parallel]`). Otherwise the usual environment variables are
+set, which only affects libraries that were not loaded yet.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import contextlib
+import multiprocessing
+import os
+
+THREAD_ENV_VARS = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'BLIS_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+]
+
+# Keeps the limits applied by `init_worker` alive during the life of the worker.
+_worker_limits = None
+
+
+def cpu_count():
+    """Number of CPUs available to the current process."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+
+def plan_workers(n_tasks=None, n_jobs=None, threads_per_worker=None, n_cpus=None):
+    """
+    Chooses how many worker processes to start and how many native threads each one
+    may use. Independent analyses scale better with processes than with BLAS threads,
+    so by default there's one single-threaded worker per CPU; spare CPUs, as when there
+    are fewer tasks than CPUs, are given to the threads of each worker.
+
+    Args
+    ----
+      n_tasks: int.
+          Number of analyses to run. `None` means unknown.
+      n_jobs: int.
+          Number of processes. `None` chooses it automatically.
+      threads_per_worker: int.
+          Native threads of each process. `None` chooses it automatically.
+      n_cpus: int.
+          Available CPUs. `None` uses `cpu_count()`.
+
+    Returns
+    -------
+      tuple:
+        n_jobs: int.
+        threads_per_worker: int.
+
+    Raises
+    ------
+      ValueError: if `n_jobs` or `threads_per_worker` is lower than 1.
+    """
+    if n_jobs is not None and n_jobs < 1:
+        raise ValueError('n_jobs must be at least 1.')
+    if threads_per_worker is not None and threads_per_worker < 1:
+        raise ValueError('threads_per_worker must be at least 1.')
+    n_cpus = n_cpus or cpu_count()
+    if n_jobs is None:
+        n_jobs = max(1, n_cpus // (threads_per_worker or 1))
+        if n_tasks is not None:
+            n_jobs = max(1, min(n_jobs, n_tasks))
+    if threads_per_worker is None:
+        threads_per_worker = max(1, n_cpus // n_jobs)
+    return n_jobs, threads_per_worker
+
+
+def limit_threads(n_threads):
+    """
+    Limits native thread pools of the current process until the returned object is
+    garbage collected or, when used as a context manager, until the block ends.
+
+    Args
+    ----
+      n_threads: int.
+
+    Returns
+    -------
+      limits: `threadpoolctl.threadpool_limits` if available; a context manager that
+          does nothing otherwise.
+    """
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return _null_limits()
+    return threadpool_limits(limits=n_threads)
+
+
+@contextlib.contextmanager
+def _null_limits():
+    yield
+
+
+def init_worker(n_threads):
+    """
+    Initializer of worker processes that limits their native thread pools, including
+    the ones of libraries loaded later on or of processes started by the worker.
+    """
+    global _worker_limits
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)
+    _worker_limits = limit_threads(n_threads)
+
+
+class ThreadingPolicy(object):
+    """
+    Processes times threads split used by the parallel paths of the package.
+
+    Args
+    ----
+      n_jobs: int.
+          Number of worker processes; `None` chooses it from the number of CPUs.
+      threads_per_worker: int.
+          Native threads per worker; `None` splits the CPUs evenly between workers.
+      n_tasks: int.
+          Number of tasks, if known, so that no more workers than tasks are started.
+
+    Examples:
+    ---------
+      >>> policy = ThreadingPolicy(n_jobs=8)
+      >>> pool = multiprocessing.Pool(policy.n_jobs, initializer=policy.initializer,
+      ...                             initargs=policy.initargs)
+      >>> executor = policy.process_executor()
+      >>> results = list(policy.map(fit, tasks))
+    """
+    def __init__(self, n_jobs=None, threads_per_worker=None, n_tasks=None):
+        # Tasks running in the current process are only limited if asked to.
+        self._local_threads = threads_per_worker
+        self.n_jobs, self.threads_per_worker = plan_workers(
+            n_tasks=n_tasks, n_jobs=n_jobs, threads_per_worker=threads_per_worker)
+
+    @property
+    def initializer(self):
+        return init_worker
+
+    @property
+    def initargs(self):
+        return (self.threads_per_worker,)
+
+    def pool(self, initializer=None, initargs=None):
+        """
+        `multiprocessing.Pool` whose workers follow the policy. A custom `initializer`
+        must call `init_worker` itself.
+        """
+        return multiprocessing.Pool(
+            self.n_jobs, initializer=initializer or self.initializer,
+            initargs=self.initargs if initargs is None else initargs)
+
+    def local_limits(self):
+        """Thread limits of tasks running in the current process, if any was chosen."""
+        return (limit_threads(self._local_threads) if self._local_threads is not None
+                else _null_limits())
+
+    def map(self, func, iterable, ordered=True, initializer=None, initargs=None):
+        """
+        Applies `func` to each item of `iterable`, in the current process under
+        `local_limits` if there's a single job and in a `pool` otherwise, which is
+        always closed when the results are consumed or the generator is discarded.
+
+        Args
+        ----
+          func: callable.
+              Must be picklable if there's more than one job.
+          iterable: iterable.
+          ordered: bool.
+              Whether results follow the order of `iterable`; otherwise they're
+              yielded as soon as they're ready.
+          initializer, initargs: custom initializer of the workers; see `pool`.
+
+        Returns
+        -------
+          generator of the results of `func`.
+
+        Examples:
+        ---------
+          >>> results = list(ThreadingPolicy(n_jobs=4).map(fit, tasks))
+        """
+        if self.n_jobs == 1:
+            with self.local_limits():
+                for item in iterable:
+                    yield func(item)
+            return
+        pool = self.pool(initializer, initargs)
+        try:
+            imap = pool.imap if ordered else pool.imap_unordered
+            for result in imap(func, iterable):
+                yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def process_executor(self):
+        """`concurrent.futures.ProcessPoolExecutor` whose workers follow the policy."""
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(self.n_jobs, initializer=self.initializer,
+                                   initargs=self.initargs)
+
+    def __repr__(self):
+        return 'ThreadingPolicy(n_jobs={n_jobs}, threads_per_worker={threads})'.format(
+            n_jobs=self.n_jobs, threads=self.threads_per_worker)
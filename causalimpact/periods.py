@@ -0,0 +1,214 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Parsing of date indexes and resolution of periods to positions of the input data.
+
+Indexes of dates or integers are resolved by binary search on their int64 values,
+which avoids building the hash table of the index and lets periods slice the data by
+position. Other indexes fall back to pandas lookups.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+
+# Key of values that cannot be in the index, such as strings in an integer index.
+_MISSING = np.iinfo(np.int64).min
+
+
+def parse_index(index, date_format=None):
+    """
+    Converts an index of date strings to a `pandas.DatetimeIndex`.
+
+    Without `date_format`, the format is guessed from the first value so that the
+    whole index is parsed with it instead of element by element, which is much
+    slower for formats other than ISO 8601. If no guess matches all values, each
+    one is parsed on its own as `pandas.to_datetime` does.
+
+    Args
+    ----
+      index: pandas Index of str.
+      date_format: str.
+          `strftime` format of the dates, such as "%d/%m/%Y %H:%M".
+
+    Returns
+    -------
+      index: pandas DatetimeIndex.
+
+    Raises
+    ------
+      ValueError: if the index cannot be parsed as dates.
+    """
+    if date_format is not None:
+        return pd.to_datetime(index, format=date_format)
+    # Month first is tried first, as pandas does, and day first when it fails.
+    formats = [_guess_format(index[0], dayfirst) for dayfirst in (False, True)]
+    for guessed in sorted(set(formats) - {None}, key=formats.index):
+        try:
+            return pd.to_datetime(index, format=guessed)
+        except ValueError:
+            # Dates may have several formats, such as with and without times.
+            pass
+    return pd.to_datetime(index)
+
+
+def _guess_format(value, dayfirst=False):
+    """Format of a date string as guessed by pandas, `None` if it's not a date."""
+    try:
+        from pandas.tseries.api import guess_datetime_format
+    except ImportError:
+        try:
+            from pandas._libs.tslibs.parsing import guess_datetime_format
+        except ImportError:
+            return None
+    try:
+        return guess_datetime_format(value, dayfirst=dayfirst)
+    except (TypeError, ValueError):
+        return None
+
+
+class PeriodResolver(object):
+    """
+    Resolves values of periods to positions of a data index.
+
+    Args
+    ----
+      index: pandas Index.
+      date_format: str.
+          Format of the periods sent as date strings; parsed as `pandas.Timestamp`
+          does if `None`.
+
+    Attributes
+    ----------
+      searchable: bool.
+          Whether the index is made of unique increasing dates or integers, which are
+          resolved by binary search. Other indexes are resolved with `get_loc`.
+
+    Examples:
+    ---------
+      >>> resolver = PeriodResolver(data.index)
+      >>> resolver.resolve_periods([['20180101', '20180310'], ['20180311', '20180410']])
+      array([[ 0, 68],
+             [69, 99]])
+    """
+    def __init__(self, index, date_format=None):
+        self.index = index
+        self.date_format = date_format
+        self._keys = None
+        # Nanoseconds in each unit of `asi8`, which is not always ns with pandas 2.
+        self._ns_per_key = 1
+        if isinstance(index, pd.DatetimeIndex):
+            self._keys = index.asi8
+            unit = np.datetime_data(index.values.dtype)[0]
+            self._ns_per_key = int(np.timedelta64(1, unit) // np.timedelta64(1, 'ns'))
+        elif index.dtype == np.int64:
+            self._keys = np.asarray(index)
+        self.searchable = (self._keys is not None and len(self._keys) > 0 and
+                           bool(np.all(np.diff(self._keys) > 0)))
+
+    def positions(self, points):
+        """
+        Positions of index values.
+
+        Args
+        ----
+          points: list.
+              Values of the index; dates may be `str` or `pd.Timestamp`.
+
+        Returns
+        -------
+          positions: numpy array of int.
+
+        Raises
+        ------
+          ValueError: if some point is not present in the index.
+        """
+        if not self.searchable:
+            return np.array([self._get_loc(point) for point in points])
+        keys = np.array([self._key(point) for point in points], dtype=np.int64)
+        positions = np.searchsorted(self._keys, keys)
+        found = np.minimum(positions, len(self._keys) - 1)
+        missing = (positions == len(self._keys)) | (self._keys[found] != keys)
+        for point, key, miss in zip(points, keys, missing):
+            if miss or key == _MISSING:
+                _raise_missing(point)
+        return positions
+
+    def resolve_periods(self, periods):
+        """
+        Positions of the first and last points of many periods with a single search.
+
+        Args
+        ----
+          periods: list of lists of two points.
+
+        Returns
+        -------
+          positions: numpy array of shape (len(periods), 2).
+
+        Raises
+        ------
+          ValueError: if some point is not present in the index.
+        """
+        points = [point for period in periods for point in period]
+        return self.positions(points).reshape(-1, 2)
+
+    def take(self, data, positions):
+        """
+        Rows of `data` from the first to the last position, both included. When the
+        index is searchable, slices by position so the result is a view whenever
+        pandas allows it.
+        """
+        if self.searchable:
+            return data.iloc[positions[0]: positions[1] + 1]
+        return data.loc[self.index[positions[0]]: self.index[positions[1]]]
+
+    def _key(self, point):
+        """int64 value of `point` in the index, `_MISSING` if it can't be there."""
+        if isinstance(self.index, pd.DatetimeIndex):
+            if not isinstance(point, (str, pd.Timestamp)):
+                return _MISSING
+            try:
+                point = (pd.Timestamp(point) if self.date_format is None else
+                         pd.to_datetime(point, format=self.date_format))
+            except ValueError:
+                return _MISSING
+            if self.index.tz is not None:
+                point = (point.tz_localize(self.index.tz) if point.tz is None
+                         else point.tz_convert(self.index.tz))
+            elif point.tz is not None:
+                return _MISSING
+            # Points between two values of the unit of the index can't be in it.
+            if point.value % self._ns_per_key:
+                return _MISSING
+            return point.value // self._ns_per_key
+        if (isinstance(point, (int, np.integer)) and not isinstance(point, bool) and
+                _MISSING < point <= np.iinfo(np.int64).max):
+            return point
+        return _MISSING
+
+    def _get_loc(self, point):
+        if point not in self.index:
+            _raise_missing(point)
+        return self.index.get_loc(point)
+
+
+def _raise_missing(point):
+    if isinstance(point, pd.Timestamp):
+        point = point.strftime('%Y%m%d')
+    raise ValueError('{point} not present in input data index.'.format(
+                     point=str(point)))
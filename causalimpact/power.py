@@ -0,0 +1,158 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Power analysis of Causal Impact: how likely an effect of a given size is to be detected
+and the minimum detectable effect (MDE) for each length of the post-intervention
+period.
+
+Neither the fit nor the simulated responses depend on the observed post-intervention
+response, so each simulated response plays the role of the response that would be
+observed without any effect. Effects are added to all of them at once and tested with
+the same p-value as `CausalImpact`, against the same simulations.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+
+from causalimpact.main import CausalImpact
+
+
+def power_analysis(data, pre_period, post_period, effects, post_lengths=None,
+                   power=0.8, relative=True, alpha=0.05, **kwargs):
+    """
+    Fits the model once and computes the detection probability of each effect size and
+    post-intervention length.
+
+    Args
+    ----
+      data: numpy.array, pandas.DataFrame.
+          The response of the post-intervention period is not used and can be missing,
+          but covariates, if any, must be present as they're used in the forecasts.
+      pre_period: list.
+      post_period: list.
+      effects, post_lengths, power, relative: same as in `power_curve`.
+      alpha: float.
+          Significance level of the test.
+      kwargs: arguments of `CausalImpact`, such as `nseasons` and `prior_level_sd`.
+
+    Returns
+    -------
+      tuple as returned by `power_curve`.
+
+    Examples:
+    ---------
+      >>> curve, mde = power_analysis(data, pre_period, post_period,
+      ...                             effects=[0.01, 0.02, 0.05, 0.1])
+    """
+    ci = CausalImpact.__new__(CausalImpact)
+    ci._prepare(data, pre_period, post_period, None, alpha, **kwargs)
+    ci._fit_model()
+    return power_curve(ci, effects, post_lengths, power, relative)
+
+
+def power_curve(ci, effects, post_lengths=None, power=0.8, relative=True):
+    """
+    Detection probability of effects added to the post-intervention period of a
+    fitted analysis, using its simulated responses.
+
+    An effect is detected when the p-value of the analysis is lower than `ci.alpha`.
+    Its probability is the fraction of simulated responses whose p-value, once the
+    effect is added to them, is that low; at a zero effect, it's the false positive
+    rate of the analysis.
+
+    Args
+    ----
+      ci: `CausalImpact`.
+          Fitted analysis; its posterior inferences need not be processed.
+      effects: list of float.
+          Effect sizes added to each post-intervention point.
+      post_lengths: list of int.
+          Lengths of the post-intervention period, counted from its first point.
+          Defaults to every length up to the whole period.
+      power: float.
+          Detection probability that defines the minimum detectable effect.
+      relative: bool.
+          If `True`, effects are relative to the predicted response, e.g. 0.05 is a
+          5% lift; absolute otherwise.
+
+    Returns
+    -------
+      tuple:
+        curve: pandas DataFrame.
+            Detection probability indexed by effect, with one column per length.
+        mde: pandas Series.
+            Minimum positive effect detected with probability `power`, indexed by
+            length.
+
+    Raises
+    ------
+      ValueError: if `power` is not between 0 and 1.
+                  if some length is not between 1 and the post-intervention length.
+    """
+    if not 0 < power < 1:
+        raise ValueError('power must be between 0 and 1.')
+    n_post = len(ci.post_data)
+    if post_lengths is None:
+        post_lengths = range(1, n_post + 1)
+    post_lengths = np.asarray(post_lengths, dtype=int)
+    if post_lengths.min() < 1 or post_lengths.max() > n_post:
+        raise ValueError('post_lengths must be between 1 and {n_post}.'.format(
+                         n_post=n_post))
+    effects = np.asarray(effects, dtype=float)
+    cum_sims = np.cumsum(ci.simulated_y, axis=1)[:, post_lengths - 1]
+    if relative:
+        scale = np.cumsum(_predicted_response(ci))[post_lengths - 1]
+    else:
+        scale = post_lengths.astype(float)
+    n_sims = len(cum_sims)
+    # A p-value below alpha means fewer than `max_count` simulations on one side.
+    max_count = int(np.ceil(ci.alpha * (n_sims + 1)))
+    cum_sims.sort(axis=0)
+    curve = np.empty((len(effects), len(post_lengths)))
+    for idx, sorted_sums in enumerate(cum_sims.T):
+        observed = sorted_sums[:, None] + effects * scale[idx]
+        below = np.searchsorted(sorted_sums, observed, side='left')
+        above = n_sims - np.searchsorted(sorted_sums, observed, side='right')
+        curve[:, idx] = (np.minimum(below, above) < max_count).mean(axis=0)
+    columns = pd.Index(post_lengths, name='post_length')
+    mde = _minimum_effect(cum_sims, max_count, power) / scale
+    return (pd.DataFrame(curve, index=pd.Index(effects, name='effect'), columns=columns),
+            pd.Series(mde, index=columns, name='mde'))
+
+
+def _minimum_effect(sorted_sums, max_count, power):
+    """
+    Smallest effect on the cumulative response that is detected as a positive effect
+    in a fraction `power` of the simulations, for each column of `sorted_sums`.
+
+    A sum is detected once it reaches the `max_count`-th largest simulated sum, so the
+    effect has to move the sum `ceil(power * n_sims)` places from the top up to it.
+    """
+    n_sims = len(sorted_sums)
+    threshold = sorted_sums[n_sims - max_count]
+    effect = threshold - sorted_sums[n_sims - int(np.ceil(power * n_sims))]
+    # Keeps the threshold reached after rounding the sum of effect and simulation.
+    return effect + 4 * np.spacing(np.abs(threshold))
+
+
+def _predicted_response(ci):
+    """Predicted post-intervention response, in the scale of the input data."""
+    exog = ci.post_data if ci.mu_sig is None else ci.normed_post_data
+    forecast = ci.trained_model.get_forecast(
+        steps=len(ci.post_data), exog=exog.iloc[:, 1:]).predicted_mean
+    return np.asarray(ci._unstardardize(forecast))
@@ -0,0 +1,448 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Data-driven specification of the seasonal components of the default model.
+
+Each harmonic of a `freq_seasonal` component adds two states to the Kalman filter, so
+`floor(period / 2)` harmonics of a yearly period on daily data make a model of hundreds
+of states whereas smooth seasonal patterns only need a few of them.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+
+# Degree of the polynomial removed along with the harmonics, which keeps slow level
+# changes from being taken for long period harmonics.
+TREND_DEGREE = 3
+# Residual degrees of freedom kept when capping the number of candidate harmonics of
+# short series.
+MIN_DOF = 10
+# Weighted least squares iterations of the fit of the noise spectrum.
+NOISE_ITERATIONS = 3
+# Periodogram peaks of each series proposed as candidate periods.
+CANDIDATES = 5
+
+
+def harmonic_design(n_obs, period, harmonics):
+    """
+    Cosine and sine regressors of the first `harmonics` harmonics of `period`.
+
+    Returns
+    -------
+      design: np.array of shape (n_obs, 2 * harmonics), cosines first.
+    """
+    angles = (2 * np.pi / period) * np.outer(np.arange(n_obs),
+                                             np.arange(1, harmonics + 1))
+    return np.hstack([np.cos(angles), np.sin(angles)])
+
+
+def harmonic_statistics(y, period, harmonics, nuisance=None):
+    """
+    Fits the harmonics of `period` by least squares, along with a cubic trend and the
+    `nuisance` regressors, and tests each of them.
+
+    Unlike FFT bins, the harmonics of any (non integer) period are fitted exactly
+    whatever the length of the series, and the joint fit keeps the trend and other
+    seasonal components from leaking into them. Each harmonic is tested against the
+    noise level at its frequency (`noise_spectrum`) rather than the overall residual
+    variance, so slow random walks, whose low frequencies are strong, aren't mistaken
+    for long seasonal periods. Observations where any response is missing are left
+    out.
+
+    Args
+    ----
+      y: np.array of shape (n_obs,) or (n_obs, n_series).
+          Responses, which share the regressors.
+      period: float.
+      harmonics: int.
+          Number of candidate harmonics.
+      nuisance: np.array of shape (n_obs, k).
+          Other regressors, such as covariates or other seasonal components.
+
+    Returns
+    -------
+      tuple of np.arrays of shape (harmonics, n_series):
+        energy: float.
+            Variance explained by each harmonic, half its squared amplitude.
+        p_value: float.
+            Probability of a larger amplitude when the harmonic is absent.
+    """
+    (a, b), p_value = _fit_harmonics(y, period, harmonics, nuisance)
+    return (a ** 2 + b ** 2) / 2, p_value
+
+
+def _fit_harmonics(y, period, harmonics, nuisance=None):
+    """
+    Implements `harmonic_statistics`.
+
+    Returns
+    -------
+      tuple:
+        coefs: tuple of np.arrays of shape (harmonics, n_series).
+            Cosine and sine coefficients.
+        p_value: np.array of shape (harmonics, n_series).
+    """
+    y = np.asarray(y, dtype=float)
+    y = y.reshape(len(y), -1)
+    n_obs = y.shape[0]
+    trend = np.linspace(-1, 1, n_obs)[:, None] ** np.arange(TREND_DEGREE + 1)
+    columns = [trend] if nuisance is None else [trend, np.asarray(nuisance, float)]
+    k_nuisance = sum(column.shape[1] for column in columns)
+    design = np.hstack(columns + [harmonic_design(n_obs, period, harmonics)])
+    observed = np.isfinite(y).all(axis=1)
+    y, design, n_obs = y[observed], design[observed], observed.sum()
+    # The sine of the harmonic `period / 2` of even periods is zero; it's left out with
+    # a null coefficient and a unit variance. Normal equations are solved directly as
+    # the design is well conditioned.
+    kept = np.sqrt(np.sum(design ** 2, axis=0)) > 1e-8 * np.sqrt(n_obs)
+    cov = np.eye(design.shape[1])
+    cov[np.ix_(kept, kept)] = np.linalg.inv(design[:, kept].T.dot(design[:, kept]))
+    coefs = np.zeros((design.shape[1], y.shape[1]))
+    coefs[kept] = cov[np.ix_(kept, kept)].dot(design[:, kept].T.dot(y))
+    cos_idx = np.arange(k_nuisance, k_nuisance + harmonics)
+    sin_idx = cos_idx + harmonics
+    a, b = coefs[cos_idx], coefs[sin_idx]
+    caa = cov[cos_idx, cos_idx][:, None]
+    cbb = cov[sin_idx, sin_idx][:, None]
+    cab = cov[cos_idx, sin_idx][:, None]
+    # Wald statistic, the quadratic form of the inverse of each 2 x 2 block of the
+    # covariance, halved: exponential when the noise level is known.
+    det = np.maximum(caa * cbb - cab ** 2, 1e-300)
+    statistic = (cbb * a ** 2 - 2 * cab * a * b + caa * b ** 2) / det / 2
+    leverage = fourier_leverage(design[:, kept], cov[np.ix_(kept, kept)])
+    noise, dof = noise_spectrum(y - design.dot(coefs),
+                                np.arange(1, harmonics + 1) / period, leverage)
+    # With an estimated noise level of `dof` degrees of freedom, the ratio follows an
+    # F distribution with 2 and `2 * dof` degrees of freedom.
+    p_value = (1 + statistic / noise / dof) ** -dof
+    return (a, b), p_value
+
+
+def fourier_leverage(design, cov):
+    """
+    Fraction of the power at each Fourier frequency that a least squares fit of
+    `design` removes from the residuals, the leverage of the cosine and sine of the
+    frequency. It's close to 1 at the fitted harmonics and at the lowest frequencies,
+    taken by the trend, and close to 0 elsewhere.
+
+    Args
+    ----
+      design: np.array of shape (n_obs, k).
+      cov: np.array of shape (k, k).
+          Inverse of `design.T.dot(design)`.
+
+    Returns
+    -------
+      leverage: np.array of shape ((n_obs - 1) // 2,), from the first Fourier
+          frequency.
+    """
+    n_obs = design.shape[0]
+    transform = np.fft.rfft(design, axis=0)[1:(n_obs + 1) // 2]
+    leverage = (np.sum(transform.real.dot(cov) * transform.real, axis=1) +
+                np.sum(transform.imag.dot(cov) * transform.imag, axis=1))
+    return np.clip(leverage / n_obs, 0., 1.)
+
+
+def noise_spectrum(residuals, frequencies, leverage):
+    """
+    Noise variance at each of `frequencies`, from the spectrum of a local level model,
+    `s2_level / (2 - 2 * cos(w)) + s2_irregular` at angular frequency `w`, fitted to
+    the periodogram of the least squares `residuals`. It's the null model of the
+    seasonal components as it's the model of `CausalImpact` without them; its level
+    makes the low frequencies of random walks strong, so they aren't mistaken for long
+    seasonal periods. The periodogram is corrected for the power removed by the fit,
+    given by its `leverage`, and frequencies where most of it was removed are left
+    out.
+
+    The two variances are fitted by weighted least squares, the variance of each
+    periodogram value being its squared expectation, a few times.
+
+    Args
+    ----
+      residuals: np.array of shape (n_obs, n_series).
+      frequencies: np.array of frequencies in cycles per observation.
+      leverage: np.array, as returned by `fourier_leverage`.
+
+    Returns
+    -------
+      tuple of np.arrays of shape (len(frequencies), n_series):
+        noise: float.
+        dof: float.
+            Equivalent number of periodogram values averaged by each noise level,
+            the inverse of its relative variance.
+    """
+    n_obs = residuals.shape[0]
+    n_bins = (n_obs - 1) // 2
+    periodogram = np.abs(np.fft.rfft(residuals, axis=0)[1:n_bins + 1]) ** 2 / n_obs
+    kept = leverage < 0.5
+    values = periodogram[kept] / (1 - leverage[kept])[:, None]
+
+    def basis(frequencies):
+        return np.column_stack([1 / (2 - 2 * np.cos(2 * np.pi * frequencies)),
+                                np.ones(len(frequencies))])
+
+    design = basis(np.arange(1, n_bins + 1)[kept] / n_obs)
+    expected = np.tile(values.mean(axis=0), (len(values), 1))
+    for _ in range(NOISE_ITERATIONS):
+        weights = 1 / np.maximum(expected, 1e-300) ** 2
+        information = np.einsum('bi,bk,bj->kij', design, weights, design)
+        target = np.einsum('bi,bk,bk->ki', design, weights, values)
+        coefs = np.linalg.solve(information, target[..., None])[..., 0]
+        # Negative variances are replaced by the fit of the other one alone.
+        for idx in range(2):
+            negative = coefs[:, idx] < 0
+            other = 1 - idx
+            coefs[negative, idx] = 0.
+            coefs[negative, other] = (target[negative, other] /
+                                      information[negative, other, other])
+        coefs = np.maximum(coefs, 0.)
+        expected = np.maximum(design.dot(coefs.T), 1e-300)
+    at_frequencies = basis(np.asarray(frequencies, dtype=float))
+    noise = at_frequencies.dot(coefs.T)
+    variance = np.einsum('fi,kij,fj->fk', at_frequencies, np.linalg.inv(information),
+                         at_frequencies)
+    dof = noise ** 2 / np.maximum(variance, 1e-300)
+    return np.maximum(noise, 1e-300), dof
+
+
+def select_harmonics(y, period, exog=None, other_seasons=None, energy=0.95,
+                     alpha=0.01):
+    """
+    Smallest number of harmonics of `period` that captures the seasonal signal of `y`.
+
+    Harmonics are significant when their p-value is below `alpha` divided by the
+    number of candidate ones (Bonferroni), so pure noise and series shorter than a
+    period take a single harmonic. The selected number is the smallest one whose first
+    harmonics explain `energy` of the variance of all the significant ones.
+
+    Args
+    ----
+      y: np.array or pandas Series of shape (n_obs,) or (n_obs, n_series).
+          Response, such as the pre-intervention data.
+      period: float.
+      exog: np.array or pandas DataFrame of shape (n_obs, k).
+          Covariates, whose seasonality doesn't need to be modeled again.
+      other_seasons: list of dicts.
+          Other seasonal components with their number of harmonics, as `nseasons` of
+          `CausalImpact`, fitted along with the candidate harmonics.
+      energy: float.
+          Fraction of the seasonal variance to capture.
+      alpha: float.
+          Significance level.
+
+    Returns
+    -------
+      harmonics: int, or np.array of ints when `y` is 2-dimensional.
+    """
+    y = np.asarray(y, dtype=float)
+    n_obs = y.shape[0]
+    nuisance = [] if exog is None else [np.asarray(exog, float).reshape(n_obs, -1)]
+    for season in other_seasons or []:
+        nuisance.append(harmonic_design(n_obs, season['period'], season['harmonics']))
+    nuisance = np.hstack(nuisance) if nuisance else None
+    max_harmonics = _max_harmonics(n_obs, period, nuisance)
+    # Harmonics of periods longer than the series can't be told from its trend.
+    if max_harmonics <= 1 or n_obs < period:
+        return 1 if y.ndim == 1 else np.ones(y.shape[1], dtype=int)
+    harmonic_energy, p_value = harmonic_statistics(y, period, max_harmonics, nuisance)
+    harmonics = _count_harmonics(harmonic_energy, p_value < alpha / max_harmonics,
+                                 energy)
+    return int(harmonics[0]) if y.ndim == 1 else harmonics
+
+
+def _max_harmonics(n_obs, period, nuisance=None):
+    """Candidate harmonics of `period`, keeping `MIN_DOF` residual degrees of freedom."""
+    k_fixed = TREND_DEGREE + 1 + (0 if nuisance is None else nuisance.shape[1])
+    return min(int(period // 2), (n_obs - k_fixed - MIN_DOF) // 2)
+
+
+def _count_harmonics(harmonic_energy, significant, energy):
+    """
+    Smallest number of harmonics whose first ones explain `energy` of the variance of
+    the `significant` ones, 1 when none is.
+    """
+    captured = np.cumsum(np.where(significant, harmonic_energy, 0.), axis=0)
+    harmonics = np.argmax(captured >= energy * captured[-1], axis=0) + 1
+    harmonics[captured[-1] == 0] = 1
+    return harmonics
+
+
+def resolve_harmonics(y, nseasons, exog=None, **kwargs):
+    """
+    Replaces the "auto" number of harmonics of `nseasons` by the one chosen by
+    `select_harmonics`. Shorter periods are resolved first and fitted along with the
+    longer ones, whose harmonics would otherwise absorb them.
+
+    Args
+    ----
+      y: np.array or pandas Series.
+      nseasons: list of dicts.
+          Same as `nseasons` of `CausalImpact`.
+      exog: np.array or pandas DataFrame.
+      kwargs: `energy` and `alpha` of `select_harmonics`.
+
+    Returns
+    -------
+      nseasons: list of new dicts, in the same order.
+    """
+    nseasons = [dict(season) for season in nseasons]
+    for season in sorted(nseasons, key=lambda season: season['period']):
+        if season.get('harmonics') != 'auto':
+            continue
+        others = [
+            {'period': other['period'],
+             'harmonics': other.get('harmonics', int(other['period'] // 2))}
+            for other in nseasons
+            if other is not season and other.get('harmonics') != 'auto'
+        ]
+        season['harmonics'] = select_harmonics(y, season['period'], exog, others,
+                                               **kwargs)
+    return nseasons
+
+
+def candidate_periods(y, max_period, n_candidates=CANDIDATES):
+    """
+    Periods of the highest peaks of the periodogram of each series relative to its
+    noise spectrum (`noise_spectrum`), after removing a cubic trend, computed for all
+    series at once with FFTs. Peaks that pure noise would commonly reach, below the
+    log of the number of Fourier frequencies, are ignored. Periods are rounded to
+    integers.
+
+    Args
+    ----
+      y: np.array of shape (n_obs, n_series), without missing values.
+      max_period: int.
+      n_candidates: int.
+          Number of peaks kept for each series.
+
+    Returns
+    -------
+      candidates: np.array of shape (n_candidates, n_series) of periods, 0 where a
+          series has fewer peaks.
+    """
+    n_obs = y.shape[0]
+    n_bins = (n_obs - 1) // 2
+    trend = np.linspace(-1, 1, n_obs)[:, None] ** np.arange(TREND_DEGREE + 1)
+    cov = np.linalg.inv(trend.T.dot(trend))
+    residuals = y - trend.dot(cov.dot(trend.T.dot(y)))
+    bins = np.arange(1, n_bins + 1)
+    noise, _ = noise_spectrum(residuals, bins / n_obs, fourier_leverage(trend, cov))
+    periodogram = np.abs(np.fft.rfft(residuals, axis=0)[1:n_bins + 1]) ** 2 / n_obs
+    ratio = np.pad(periodogram / noise, ((1, 1), (0, 0)), mode='constant')
+    inner = ratio[1:-1]
+    periods = np.round(n_obs / bins).astype(int)[:, None]
+    peak = ((inner > ratio[:-2]) & (inner >= ratio[2:]) & (inner > np.log(n_bins)) &
+            (periods >= 2) & (periods <= max_period))
+    score = np.where(peak, inner, -np.inf)
+    top = np.argsort(-score, axis=0)[:n_candidates]
+    found = np.isfinite(np.take_along_axis(score, top, axis=0))
+    return np.where(found, periods[top, 0], 0)
+
+
+def detect_seasonality(y, periods=None, max_period=None, exog=None, energy=0.95,
+                       alpha=0.01, n_candidates=CANDIDATES):
+    """
+    Proposes the seasonal components, `nseasons` of `CausalImpact`, of one or many
+    series in one pass, without fitting any state space model.
+
+    Candidate periods are the peaks of the periodograms of the series
+    (`candidate_periods`), computed for all series at once, or the given `periods`.
+    Each of them is tested for all the series that have it as candidate at once with
+    `harmonic_statistics`: a period is kept when any of its harmonics is significant
+    at level `alpha`, Bonferroni corrected for the number of harmonics and of
+    candidate periods (or Fourier frequencies searched), and its significant
+    harmonics are then removed from the series before testing the next one. Periods
+    found in the periodograms are tested from the longest on, so that the peaks of
+    their higher harmonics, such as 3.5 for 7, are taken by them; given periods are
+    tested from the shortest on, so that long ones, whose many harmonics get close to
+    the ones of short periods, don't take them. Numbers of harmonics are chosen as in
+    `select_harmonics`.
+
+    Args
+    ----
+      y: np.array, pandas Series or DataFrame of shape (n_obs,) or (n_obs, n_series).
+          Responses, such as pre-intervention data. Missing values are linearly
+          interpolated.
+      periods: list of floats.
+          Candidate periods, such as `[7, 30.44, 365.25]` for daily data. Defaults to
+          the peaks of the periodograms.
+      max_period: int.
+          Longest candidate period; defaults to half the length of the series, as a
+          period is only detected over at least two cycles.
+      exog: np.array or pandas DataFrame of shape (n_obs, k).
+          Covariates shared by all series, whose seasonality doesn't need to be
+          modeled again.
+      energy: float.
+          Same as in `select_harmonics`.
+      alpha: float.
+          Significance level.
+      n_candidates: int.
+          Same as in `candidate_periods`.
+
+    Returns
+    -------
+      nseasons: list of dicts, or list of lists of dicts when `y` is 2-dimensional,
+          sorted by period.
+    """
+    y = np.array(y, dtype=float)
+    squeeze = y.ndim == 1
+    y = y.reshape(len(y), -1)
+    n_obs, n_series = y.shape
+    for column in range(n_series):
+        missing = ~np.isfinite(y[:, column])
+        if missing.all():
+            y[:, column] = 0.
+        elif missing.any():
+            y[missing, column] = np.interp(np.where(missing)[0],
+                                           np.where(~missing)[0], y[~missing, column])
+    nuisance = None if exog is None else np.asarray(exog, float).reshape(n_obs, -1)
+    max_period = min(max_period or n_obs // 2, n_obs // 2)
+    if periods is None:
+        if max_period < 2:
+            candidates = np.zeros((0, n_series))
+        else:
+            candidates = candidate_periods(y, max_period, n_candidates)
+    else:
+        periods = [period for period in periods if 2 <= period <= max_period]
+        candidates = np.repeat(np.array(periods, dtype=float)[:, None], n_series,
+                               axis=1)
+    if periods is None:
+        # Candidates are the best of all Fourier frequencies.
+        n_tests = np.full(n_series, max((n_obs - 1) // 2, 1))
+        order = np.unique(candidates[candidates > 0])[::-1]
+    else:
+        n_tests = np.full(n_series, max(len(periods), 1))
+        order = np.unique(candidates[candidates > 0])
+    nseasons = [[] for _ in range(n_series)]
+    for period in order:
+        columns = np.where((candidates == period).any(axis=0))[0]
+        harmonics = _max_harmonics(n_obs, period, nuisance)
+        if harmonics < 1:
+            continue
+        (a, b), p_value = _fit_harmonics(y[:, columns], period, harmonics, nuisance)
+        significant = p_value < alpha / (harmonics * n_tests[columns])
+        kept = significant.any(axis=0)
+        counts = _count_harmonics((a ** 2 + b ** 2) / 2, significant, energy)
+        a, b = np.where(significant, a, 0.), np.where(significant, b, 0.)
+        seasonal = harmonic_design(n_obs, period, harmonics).dot(np.vstack([a, b]))
+        y[:, columns[kept]] -= seasonal[:, kept]
+        period = int(period) if float(period).is_integer() else float(period)
+        for column, count in zip(columns[kept], counts[kept]):
+            nseasons[column].append({'period': period, 'harmonics': int(count)})
+    nseasons = [sorted(seasons, key=lambda season: season['period'])
+                for seasons in nseasons]
+    return nseasons[0] if squeeze else nseasons
@@ -0,0 +1,255 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Chooses the specification of the default model, such as its seasonal components or
+`prior_level_sd`, among several candidates fitted to the same pre-intervention data.
+
+Input data is validated and standardized once, candidates are fitted in parallel and
+only the chosen one is simulated to compute the posterior inferences.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import copy
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from causalimpact.cost import check_budget
+from causalimpact.main import CausalImpact
+from causalimpact.parallel import ThreadingPolicy
+
+CRITERIA = ('aic', 'bic', 'hqic', 'one_step')
+
+
+def candidate_grid(**options):
+    """
+    Builds every combination of the values of some arguments of `CausalImpact`.
+
+    Args
+    ----
+      options: lists of values of each argument.
+
+    Returns
+    -------
+      candidates: list of dicts.
+
+    Examples:
+    ---------
+      >>> candidate_grid(nseasons=[[], [{'period': 7}]], prior_level_sd=[0.01, None])
+      [{'nseasons': [], 'prior_level_sd': 0.01}, {'nseasons': [], ...
+    """
+    keys = sorted(options)
+    return [dict(zip(keys, values))
+            for values in itertools.product(*[options[key] for key in keys])]
+
+
+def select_model(data, pre_period, post_period, candidates, criterion='aic',
+                 alpha=0.05, n_jobs=None, threads_per_worker=None, **kwargs):
+    """
+    Fits the default model of each candidate specification to the pre-intervention
+    data, ranks them and processes the posterior inferences of the best one only.
+
+    Scores are computed from the log-likelihood of each point and the one-step-ahead
+    forecast errors of the Kalman filter. As the first points of models with diffuse
+    states (seasonal components, regression coefficients) don't count in the
+    likelihood, all candidates are scored on the points after the largest of these
+    burn-in periods, so that scores are comparable. For the same reason, the
+    regression of every candidate has the formulation chosen for the common arguments
+    when `mle_regression` is "auto".
+
+    Args
+    ----
+      data: numpy.array, pandas.DataFrame.
+      pre_period: list.
+      post_period: list.
+      candidates: list of dicts.
+          Arguments of `CausalImpact` of each candidate, such as `nseasons` and
+          `prior_level_sd`, which take precedence over `kwargs`; see `candidate_grid`.
+      criterion: str.
+          How candidates are ranked, lowest first: "aic", "bic" or "hqic" information
+          criteria, or "one_step", the mean squared one-step-ahead prediction error
+          of the (standardized, if so) pre-intervention response.
+      alpha: float.
+      n_jobs: int.
+          Number of worker processes. If 1, candidates are fitted in the current
+          process and if `None` it's chosen by `causalimpact.parallel.ThreadingPolicy`.
+      threads_per_worker: int.
+          Native (BLAS/OpenMP) threads each worker may use.
+      kwargs: arguments of `CausalImpact` shared by all candidates. `standardize` can
+          only be set here.
+
+    Returns
+    -------
+      tuple:
+        ci: `CausalImpact` of the best candidate with posterior inferences processed.
+        ranking: pandas DataFrame.
+            One row per candidate, indexed by its position in `candidates` and sorted
+            from best to worst, with columns "candidate", "k_states", "k_params",
+            "nobs", "llf", "aic", "bic", "hqic", "one_step" and "error", the reason why
+            the candidate couldn't be fitted, if so. Failed candidates come last.
+
+    Raises
+    ------
+      ValueError: if `candidates` is empty or some candidate sets `standardize`.
+                  if `criterion` is not one of `CRITERIA`.
+                  if no candidate could be fitted.
+
+    Examples:
+    ---------
+      >>> candidates = candidate_grid(
+      ...     nseasons=[[], [{'period': 7}], [{'period': 7}, {'period': 365}]],
+      ...     prior_level_sd=[0.01, 0.1, None])
+      >>> ci, ranking = select_model(data, pre_period, post_period, candidates)
+    """
+    if not candidates:
+        raise ValueError('candidates cannot be empty.')
+    if any('standardize' in candidate for candidate in candidates):
+        raise ValueError('standardize must be the same for all candidates and can only '
+                         'be sent as a common argument.')
+    if criterion not in CRITERIA:
+        raise ValueError('criterion must be one of {criteria}.'.format(
+                         criteria=', '.join(CRITERIA)))
+    base = CausalImpact.__new__(CausalImpact)
+    base._prepare(data, pre_period, post_period, None, alpha, **kwargs)
+    if kwargs.get('mle_regression') == 'auto':
+        # Criteria only compare likelihoods of the same formulation of the regression,
+        # which "auto" could choose differently for each candidate.
+        kwargs = dict(kwargs, mle_regression=base.model.mle_regression)
+    models = [_candidate_model(base, dict(kwargs, **candidate))
+              for candidate in candidates]
+    policy = ThreadingPolicy(n_jobs, threads_per_worker, n_tasks=len(models))
+    fits = list(policy.map(_fit_candidate, models))
+    ranking = _rank_candidates(candidates, models, fits, criterion)
+    if ranking['error'].iloc[0] is not None:
+        raise ValueError('No candidate could be fitted: {errors}'.format(
+                         errors='; '.join(ranking['error'])))
+    best = ranking.index[0]
+    ci = models[best]
+    if getattr(ci, 'trained_model', None) is None:
+        _restore_fit(ci, fits[best]['params'])
+    ci._process_posterior_inferences()
+    return ci, ranking
+
+
+def _candidate_model(base, kwargs):
+    """
+    Builds the default model of one candidate from the data already validated and
+    standardized in `base`.
+
+    Args
+    ----
+      base: `CausalImpact` prepared with the common arguments.
+      kwargs: dict of arguments of the candidate.
+
+    Returns
+    -------
+      ci: `CausalImpact` ready to be fitted, sharing the data of `base`.
+    """
+    ci = copy.copy(base)
+    model_args = ci._process_model_args(**copy.deepcopy(kwargs))
+    model_args['nseasons'] = ci._process_auto_nseasons(model_args['nseasons'],
+                                                       ci.pre_data)
+    # Set directly as the setter would standardize the data again.
+    ci._model_args = model_args
+    ci.model = None
+    budget = model_args.get('cost_budget')
+    if budget is not None:
+        check_budget(ci._estimate_cost(), budget,
+                     model_args.get('cost_budget_action', 'warn'))
+    return ci
+
+
+def _fit_candidate(ci):
+    """
+    Fits the model of one candidate. Used as the worker function of `select_model`;
+    failures are returned instead of raised so that one bad candidate doesn't stop the
+    selection, and only what's needed for scoring is sent back instead of the
+    results object.
+
+    Args
+    ----
+      ci: `CausalImpact` built by `_candidate_model`.
+
+    Returns
+    -------
+      dict of:
+        params: numpy array with the fitted parameters.
+        df_model: int, number of estimated parameters.
+        burn: int, points left out of the likelihood.
+        llf_obs: numpy array with the log-likelihood of each point.
+        forecasts_error: numpy array with the one-step-ahead forecast errors.
+        error: str or `None` if the fit succeeded.
+    """
+    try:
+        ci._fit_model()
+    except Exception as err:
+        return {'error': '{name}: {err}'.format(name=type(err).__name__, err=err)}
+    results = ci.trained_model
+    return {
+        'params': np.asarray(results.params),
+        'df_model': results.df_model,
+        'burn': results.loglikelihood_burn,
+        'llf_obs': np.asarray(results.llf_obs),
+        'forecasts_error': np.asarray(results.filter_results.forecasts_error[0]),
+        'error': None
+    }
+
+
+def _rank_candidates(candidates, models, fits, criterion):
+    """
+    Scores fitted candidates on the points after the largest burn-in period among
+    them and sorts them by `criterion`.
+
+    Returns
+    -------
+      ranking: pandas DataFrame as described in `select_model`.
+    """
+    fitted = [fit for fit in fits if fit['error'] is None]
+    burn = max([fit['burn'] for fit in fitted] or [0])
+    rows = []
+    for candidate, ci, fit in zip(candidates, models, fits):
+        row = {'candidate': candidate, 'k_states': ci.model.k_states,
+               'k_params': ci.model.k_params, 'error': fit['error']}
+        if fit['error'] is None:
+            errors = fit['forecasts_error'][burn:]
+            observed = ~np.isnan(errors)
+            nobs = observed.sum()
+            llf = fit['llf_obs'][burn:][observed].sum()
+            k = fit['df_model']
+            row.update(nobs=nobs, llf=llf, aic=2 * k - 2 * llf,
+                       bic=k * np.log(nobs) - 2 * llf,
+                       hqic=2 * k * np.log(np.log(nobs)) - 2 * llf,
+                       one_step=np.mean(errors[observed] ** 2))
+        rows.append(row)
+    columns = ['candidate', 'k_states', 'k_params', 'nobs', 'llf', 'aic', 'bic',
+               'hqic', 'one_step', 'error']
+    ranking = pd.DataFrame(rows, columns=columns)
+    return ranking.sort_values(criterion, kind='mergesort', na_position='last')
+
+
+def _restore_fit(ci, params):
+    """
+    Rebuilds the results of the fit of `ci` at `params`, as the results objects are
+    not sent back from worker processes. This is the same final Kalman filter (or
+    smoother) pass that the fit runs.
+    """
+    fit_method = ci.model_args.get('fit_method')
+    if fit_method is None and ci.model_args.get('params') is not None:
+        fit_method = 'filter'
+    method = ci.model.filter if fit_method == 'filter' else ci.model.smooth
+    ci.trained_model = method(params, cov_type=ci.model_args.get('cov_type', 'none'))
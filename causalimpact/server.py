@@ -0,0 +1,423 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Long-lived HTTP service for on-demand Causal Impact analyses, built on the standard
+library only (Python 3.7+).
+
+Endpoints
+---------
+  POST /analyze:
+      JSON body with the same arguments as `CausalImpact`:
+        {"data": [[y, x1, ...], ...] or {"y": [...], "x1": [...]},
+         "index": optional list used as data index,
+         "pre_period": [...], "post_period": [...], "alpha": 0.05,
+         "nseasons": [...], "prior_level_sd": 0.01, "standardize": true}
+      Answers with {"summary": {metric: {"average": .., "cumulative": ..}},
+      "p_value": ..}.
+  GET /stats:
+      Latency and throughput counters.
+
+Analyses run in a pool of warm worker processes, so each request pays neither the
+imports nor the process start. Requests arriving within `batch_window` seconds are
+grouped by model structure and each group is split in as many tasks as workers, at
+most, where every fit is warm-started from the parameters of the previous fit of the
+task.
+
+Run it with:
+  $ python -m causalimpact.server --port 8000 --workers 4
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import collections
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from causalimpact.main import CausalImpact
+from causalimpact.parallel import ThreadingPolicy, init_worker
+
+MODEL_KWARGS = ['nseasons', 'prior_level_sd', 'standardize', 'disp']
+
+
+def parse_request(payload):
+    """
+    Validates the body of an analysis request and converts it into the arguments of
+    `CausalImpact`.
+
+    Args
+    ----
+      payload: dict.
+          Decoded JSON body.
+
+    Returns
+    -------
+      dict of:
+        data: pandas DataFrame.
+        pre_period: list.
+        post_period: list.
+        alpha: float.
+        kwargs: dict with model arguments.
+
+    Raises
+    ------
+      ValueError: if required keys are missing or unknown keys are present.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError('Request body must be a JSON object.')
+    missing = [key for key in ['data', 'pre_period', 'post_period'] if key not in payload]
+    if missing:
+        raise ValueError('{keys} input cannot be empty'.format(keys=', '.join(missing)))
+    unknown = set(payload) - set(['data', 'index', 'pre_period', 'post_period', 'alpha'] +
+                                 MODEL_KWARGS)
+    if unknown:
+        raise ValueError('Unknown arguments: {keys}.'.format(
+                         keys=', '.join(sorted(unknown))))
+    try:
+        data = pd.DataFrame(payload['data'], index=payload.get('index'))
+    except (ValueError, TypeError):
+        raise ValueError('Could not transform input data to pandas DataFrame.')
+    return {
+        'data': data,
+        'pre_period': payload['pre_period'],
+        'post_period': payload['post_period'],
+        'alpha': float(payload.get('alpha', 0.05)),
+        'kwargs': dict((key, payload[key]) for key in MODEL_KWARGS if key in payload)
+    }
+
+
+def structure_key(request):
+    """
+    Requests whose models likely share the same components and parameters can be
+    fitted in the same batch. The key is computed before the data is processed, so
+    `nseasons="auto"` or "auto" harmonics, resolved from each response, and the
+    formulation of the regression may still differ within a batch; `analyze_batch`
+    only warm-starts models with the same parameters.
+    """
+    kwargs = request['kwargs']
+    return (
+        request['data'].shape[1],
+        json.dumps(kwargs.get('nseasons'), sort_keys=True),
+        kwargs.get('prior_level_sd', 0.01),
+        kwargs.get('standardize', True)
+    )
+
+
+def summary_result(ci):
+    """JSON serializable summary of a processed `CausalImpact`."""
+    return {
+        'summary': ci.summary_data.to_dict(orient='index'),
+        'p_value': float(ci.p_value)
+    }
+
+
+def analyze_batch(requests):
+    """
+    Runs a batch of requests sharing the same model structure. Each fit starts from
+    the parameters found for the previous request with the same parameter names,
+    which usually saves most optimizer iterations when series are alike.
+
+    Args
+    ----
+      requests: list of dicts as returned by `parse_request`.
+
+    Returns
+    -------
+      list of tuples (result, error) where exactly one value is not `None`.
+    """
+    results = []
+    params = None
+    param_names = None
+    for request in requests:
+        try:
+            ci = CausalImpact.__new__(CausalImpact)
+            ci._prepare(request['data'], request['pre_period'], request['post_period'],
+                        None, request['alpha'], **request['kwargs'])
+            # Requests with the same key may still build different parameters, as
+            # with `mle_regression="auto"`, so only alike models are warm-started.
+            if params is not None and list(ci.model.param_names) == param_names:
+                ci.model_args['start_params'] = params
+            ci._fit_model()
+            ci._process_posterior_inferences()
+        except Exception as err:
+            results.append((None, '{name}: {err}'.format(name=type(err).__name__,
+                                                         err=err)))
+            continue
+        params = np.asarray(ci.trained_model.params)
+        param_names = list(ci.model.param_names)
+        results.append((summary_result(ci), None))
+    return results
+
+
+def _warm_up():
+    """
+    Runs once in each worker process so that lazy imports and caches of pandas and
+    statsmodels are loaded before the first request arrives.
+    """
+    data = np.random.RandomState(0).randn(20, 2)
+    try:
+        CausalImpact(data, [0, 14], [15, 19])
+    except Exception:  # pragma: no cover
+        pass
+
+
+def _init_service_worker(n_threads):
+    init_worker(n_threads)
+    _warm_up()
+
+
+class ServiceStats(object):
+    """
+    Thread-safe counters of the service. Latencies of the last `window` requests are
+    used for the percentiles.
+    """
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self._start = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+
+    def record_batch(self):
+        with self._lock:
+            self.batches += 1
+
+    def record_request(self, latency, error=False):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            self._latencies.append(latency)
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.time() - self._start
+            latencies = np.array(self._latencies) * 1000.
+            result = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'batches': self.batches,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.,
+                'throughput_rps': self.requests / uptime if uptime > 0 else 0.,
+                'uptime_s': uptime
+            }
+        if len(latencies):
+            result['latency_ms'] = {
+                'mean': float(latencies.mean()),
+                'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)),
+                'max': float(latencies.max())
+            }
+        return result
+
+
+class AnalysisService(object):
+    """
+    Dispatches analysis requests to warm worker processes in micro-batches.
+
+    Args
+    ----
+      n_workers: int.
+          Number of worker processes. `None` uses the number of CPUs.
+      threads_per_worker: int.
+          Native (BLAS/OpenMP) threads of each worker. `None` splits the CPUs evenly
+          between workers.
+      batch_window: float.
+          Seconds to wait for more requests after the first one of a batch arrives.
+      max_batch_size: int.
+          Maximum requests dispatched together.
+    """
+    def __init__(self, n_workers=None, threads_per_worker=None, batch_window=0.01,
+                 max_batch_size=16):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be at least 1.')
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.stats = ServiceStats()
+        self.policy = ThreadingPolicy(n_workers, threads_per_worker)
+        self._executor = ProcessPoolExecutor(self.policy.n_jobs,
+                                             initializer=_init_service_worker,
+                                             initargs=self.policy.initargs)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._dispatch)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, request):
+        """
+        Args
+        ----
+          request: dict as returned by `parse_request`.
+
+        Returns
+        -------
+          future: `concurrent.futures.Future` resolved with the result of
+              `summary_result` or with a `ValueError` if the analysis failed.
+        """
+        future = Future()
+        self._queue.put((request, future, time.time()))
+        return future
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.time() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # Lets the dispatch loop stop after this batch is sent.
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _dispatch(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            groups = collections.OrderedDict()
+            for item in batch:
+                groups.setdefault(structure_key(item[0]), []).append(item)
+            for group in groups.values():
+                # Requests of a task run one after another, so a group is split
+                # between workers instead of keeping the rest of them idle.
+                n_chunks = min(self.policy.n_jobs, len(group))
+                for idx in np.array_split(np.arange(len(group)), n_chunks):
+                    chunk = [group[pos] for pos in idx]
+                    self.stats.record_batch()
+                    future = self._executor.submit(
+                        analyze_batch, [request for request, _, _ in chunk])
+                    future.add_done_callback(
+                        lambda future, chunk=chunk: self._resolve(chunk, future))
+
+    def _resolve(self, group, batch_future):
+        try:
+            results = batch_future.result()
+        except Exception as err:
+            results = [(None, '{name}: {err}'.format(name=type(err).__name__, err=err))
+                       ] * len(group)
+        for (_, future, start), (result, error) in zip(group, results):
+            self.stats.record_request(time.time() - start, error is not None)
+            if error is not None:
+                future.set_exception(ValueError(error))
+            else:
+                future.set_result(result)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._executor.shutdown()
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    """Serves the endpoints of the `AnalysisService` bound to the server."""
+    def _send_json(self, status, body):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.server.service.stats.snapshot())
+        else:
+            self._send_json(404, {'error': 'Not found.'})
+
+    def do_POST(self):
+        if self.path != '/analyze':
+            self._send_json(404, {'error': 'Not found.'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length).decode('utf-8'))
+            request = parse_request(payload)
+        except ValueError as err:
+            self._send_json(400, {'error': str(err)})
+            return
+        try:
+            result = self.server.service.submit(request).result()
+        except ValueError as err:
+            self._send_json(400, {'error': str(err)})
+            return
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=8000, **service_kwargs):
+    """
+    Builds the HTTP server along with its `AnalysisService`, available as the
+    `service` attribute of the server.
+
+    Args
+    ----
+      host: str.
+      port: int.
+          Use 0 to let the operating system choose a free port.
+      service_kwargs: arguments sent to `AnalysisService`.
+
+    Returns
+    -------
+      server: `ThreadingHTTPServer`.
+    """
+    server = ThreadingHTTPServer((host, port), AnalysisHandler)
+    server.service = AnalysisService(**service_kwargs)
+    return server
+
+
+def main(argv=None):  # pragma: no cover
+    parser = argparse.ArgumentParser(description='Causal Impact HTTP service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads-per-worker', type=int, default=None)
+    parser.add_argument('--batch-window', type=float, default=0.01)
+    parser.add_argument('--max-batch-size', type=int, default=16)
+    args = parser.parse_args(argv)
+    server = make_server(args.host, args.port, n_workers=args.workers,
+                         threads_per_worker=args.threads_per_worker,
+                         batch_window=args.batch_window,
+                         max_batch_size=args.max_batch_size)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,171 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Shares the input matrix of a batch of analyses across worker processes without
+copying it. The matrix is placed once either in `multiprocessing.shared_memory`
+(Python 3.8+) or in a memory-mapped `.npy` file, which is also used in a temporary
+directory when shared memory is not available, and workers receive a small `FrameRef`
+from which they build the data of each unit.
+"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Segments attached by the current process, so that each worker maps them only once.
+_attached = {}
+
+
+def _get_shared_memory(name=None, size=0):
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise ImportError('multiprocessing.shared_memory requires Python 3.8+; please '
+                          'use a memory-mapped file instead.')
+    if name is None:
+        return shared_memory.SharedMemory(create=True, size=max(size, 1))
+    if sys.version_info >= (3, 13):
+        # Attached segments are owned by the process that created them.
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class FrameRef(object):
+    """
+    Lightweight and picklable reference to a matrix shared by `SharedFrame`.
+
+    Args
+    ----
+      location: str.
+          Name of the shared memory segment or path of the `.npy` file.
+      kind: str.
+          Either "shm" or "npy".
+      shape: tuple.
+      index: pandas Index of the rows.
+      columns: list of column names.
+    """
+    def __init__(self, location, kind, shape, index, columns):
+        self.location = location
+        self.kind = kind
+        self.shape = shape
+        self.index = index
+        self.columns = list(columns)
+
+    @property
+    def values(self):
+        """Read-only view of the whole shared matrix."""
+        if self.location not in _attached:
+            if self.kind == 'npy':
+                array = np.load(self.location, mmap_mode='r')
+                _attached[self.location] = (None, array)
+            else:
+                shm = _get_shared_memory(self.location)
+                array = np.ndarray(self.shape, dtype=float, buffer=shm.buf)
+                array.flags.writeable = False
+                _attached[self.location] = (shm, array)
+        return _attached[self.location][1]
+
+    def take(self, rows, columns):
+        """
+        Builds the data of one unit from the shared matrix. Rows are always a view;
+        columns are a view as well when they are contiguous in the matrix.
+
+        Args
+        ----
+          rows: slice.
+          columns: list of column names.
+
+        Returns
+        -------
+          data: pandas DataFrame.
+        """
+        positions = [self.columns.index(column) for column in columns]
+        values = self.values[rows]
+        if positions == list(range(positions[0], positions[0] + len(positions))):
+            values = values[:, positions[0]:positions[0] + len(positions)]
+        else:
+            values = values[:, positions]
+        return pd.DataFrame(values, index=self.index[rows], columns=columns, copy=False)
+
+
+class SharedFrame(object):
+    """
+    Places the values of a numeric DataFrame in shared memory, or in a memory-mapped
+    `.npy` file when `path` is given, until `close` is called. Without
+    `multiprocessing.shared_memory` (Python < 3.8) the file is created in a temporary
+    directory.
+
+    Args
+    ----
+      data: pandas DataFrame.
+          All columns must be numeric; they are stored as floats.
+      path: str.
+          If not `None`, path of the `.npy` file used instead of shared memory.
+
+    Examples:
+    ---------
+      >>> with SharedFrame(data) as shared:
+      ...     pool = multiprocessing.Pool(4, initializer=init, initargs=(shared.ref,))
+    """
+    def __init__(self, data, path=None):
+        values = np.ascontiguousarray(data.values, dtype=float)
+        self._shm = None
+        self._tmpdir = None
+        if path is None:
+            try:
+                self._shm = _get_shared_memory(size=values.nbytes)
+            except ImportError:
+                self._tmpdir = tempfile.mkdtemp(prefix='causalimpact-')
+                path = os.path.join(self._tmpdir, 'data.npy')
+        self._path = path
+        if path is not None:
+            # `np.save` appends the extension if it's missing.
+            path = path if path.endswith('.npy') else path + '.npy'
+            self._path = path
+            np.save(path, values)
+            location, kind = path, 'npy'
+        else:
+            shared = np.ndarray(values.shape, dtype=float, buffer=self._shm.buf)
+            shared[:] = values
+            location, kind = self._shm.name, 'shm'
+        self.ref = FrameRef(location, kind, values.shape, data.index, data.columns)
+
+    def close(self):
+        """Releases the shared matrix."""
+        # Drops views attached by this process before releasing their buffer.
+        _attached.pop(self.ref.location, None)
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        elif self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+            self._path = None
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
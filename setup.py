@@ -80,6 +80,12 @@ extras_require = {
         'ipython',
         'jupyter'
     ],
+    'parquet': [
+        'pyarrow'
+    ],
+    'parallel': [
+        'threadpoolctl'
+    ],
     'testing': tests_require
 }
 
@@ -157,6 +163,11 @@ setup(
         'Programming Language :: Python :: Implementation :: CPython',
         'Topic :: Scientific/Engineering',
     ],
+    entry_points={
+        'console_scripts': [
+            'causalimpact=causalimpact.cli:main'
+        ]
+    },
     cmdclass={'test': PyTest},
     test_suite='tests'
 )
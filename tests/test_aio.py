@@ -0,0 +1,128 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module aio.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import mock
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.util.testing import assert_frame_equal
+
+from causalimpact import CausalImpact
+from causalimpact.batch import iter_wide_units
+
+aio = pytest.importorskip('causalimpact.aio')
+asyncio = aio.asyncio
+
+
+@pytest.fixture
+def data():
+    np.random.seed(1)
+    return pd.DataFrame(np.random.randn(100, 3), columns=['a', 'b', 'x1'])
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_arun(data):
+    ci = _run(CausalImpact.arun(data[['a', 'x1']], [0, 69], [70, 99]))
+    expected = CausalImpact(data[['a', 'x1']], [0, 69], [70, 99])
+    assert isinstance(ci, CausalImpact)
+    assert_frame_equal(ci.inferences[['preds', 'point_effects']],
+                       expected.inferences[['preds', 'point_effects']])
+    assert 0 <= ci.p_value <= 1
+
+
+def test_arun_w_process_executor(data):
+    with ProcessPoolExecutor(1) as executor:
+        ci = _run(CausalImpact.arun(data[['a', 'x1']], [0, 69], [70, 99],
+                                    executor=executor, nseasons=[{'period': 7}]))
+    assert ci.model.freq_seasonal_periods == [7]
+    assert ci.summary_data is not None
+
+
+def test_run_cancelled_between_stages(data):
+    fitting = threading.Event()
+    release = threading.Event()
+    fit_stage = aio._fit_stage
+
+    def blocking_fit_stage(*args):
+        fitting.set()
+        release.wait()
+        return fit_stage(*args)
+
+    async def cancel_during_fit():
+        task = asyncio.ensure_future(aio.AsyncRunner().run(data, [0, 69], [70, 99]))
+        while not fitting.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with mock.patch('causalimpact.aio._fit_stage', blocking_fit_stage), \
+            mock.patch('causalimpact.aio._simulation_stage') as simulation_mock:
+        _run(cancel_during_fit())
+    simulation_mock.assert_not_called()
+
+
+def test_run_batch_bounds_concurrency(data):
+    lock = threading.Lock()
+    running = [0, 0]
+    fit_stage = aio._fit_stage
+
+    def counting_fit_stage(*args):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.05)
+        try:
+            return fit_stage(*args)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    async def collect(runner, units):
+        return [result async for result in runner.run_batch(units, [0, 69], [70, 99])]
+
+    data.loc[:, 'b'] = 1.
+    units = list(iter_wide_units(data, ['x1'])) + [('c', data[['a', 'x1']])]
+    with ThreadPoolExecutor(8) as executor:
+        runner = aio.AsyncRunner(executor, max_concurrency=2)
+        with mock.patch('causalimpact.aio._fit_stage', counting_fit_stage):
+            results = _run(collect(runner, units))
+    assert running[1] == 2
+    results = dict((unit, (ci, error)) for unit, ci, error in results)
+    assert sorted(results) == ['a', 'b', 'c']
+    assert isinstance(results['a'][0], CausalImpact)
+    assert results['b'][0] is None
+    assert str(results['b'][1]) == 'Input response cannot be constant.'
+
+
+def test_async_runner_raises_invalid_concurrency():
+    with pytest.raises(ValueError):
+        aio.AsyncRunner(max_concurrency=0)
@@ -0,0 +1,135 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module backtest.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import mock
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.statespace.structural import UnobservedComponents
+
+from causalimpact import CausalImpact
+from causalimpact.backtest import backtest, backtest_folds
+
+
+@pytest.fixture
+def pre_data():
+    rs = np.random.RandomState(3)
+    X = 50 + rs.randn(150).cumsum()
+    y = 1.2 * X + rs.randn(150)
+    return pd.DataFrame({'y': y, 'X': X}, columns=['y', 'X'])
+
+
+def test_backtest_folds():
+    folds = backtest_folds(100, 20, n_folds=3)
+    assert folds == [(slice(0, 40), slice(40, 60)), (slice(0, 60), slice(60, 80)),
+                     (slice(0, 80), slice(80, 100))]
+    folds = backtest_folds(100, 20, n_folds=3, window='rolling')
+    assert folds == [(slice(0, 40), slice(40, 60)), (slice(20, 60), slice(60, 80)),
+                     (slice(40, 80), slice(80, 100))]
+
+    with pytest.raises(ValueError) as excinfo:
+        backtest_folds(100, 20, n_folds=3, min_train=50)
+    assert str(excinfo.value) == ('3 folds of 20 points leave 40 training points, less '
+                                  'than the minimum of 50.')
+    with pytest.raises(ValueError) as excinfo:
+        backtest_folds(100, 0)
+    assert str(excinfo.value) == 'horizon and n_folds must be at least 1.'
+    with pytest.raises(ValueError) as excinfo:
+        backtest_folds(100, 20, window='sliding')
+    assert str(excinfo.value) == 'window must be either "expanding" or "rolling".'
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_backtest(pre_data, n_jobs):
+    original = CausalImpact._compile_posterior_inferences
+
+    simulate = UnobservedComponents.simulate
+
+    # Seeded in each fold as workers may run folds in any order.
+    def _compile_posterior_inferences(self):
+        np.random.seed(1)
+        return original(self)
+
+    # Recent statsmodels don't draw the simulated shocks from the global numpy state.
+    def _simulate(self, *args, **kwargs):
+        kwargs.setdefault('random_state', np.random.randint(2 ** 31))
+        return simulate(self, *args, **kwargs)
+
+    with mock.patch.object(CausalImpact, '_format_input_data',
+                           wraps=CausalImpact._format_input_data,
+                           autospec=True) as format_mock, \
+            mock.patch.object(CausalImpact, '_compile_posterior_inferences',
+                              _compile_posterior_inferences), \
+            mock.patch.object(UnobservedComponents, 'simulate', _simulate):
+        folds = backtest(pre_data, [0, 119], [120, 149], horizon=20, n_folds=3,
+                         n_jobs=n_jobs)
+    format_mock.assert_called_once()
+    assert list(folds['test_start']) == [60, 80, 100]
+    assert list(folds['test_end']) == [79, 99, 119]
+    assert list(folds['train_end']) == [59, 79, 99]
+    assert folds['error'].isnull().all()
+    assert (folds['coverage'] >= 0.8).all()
+    assert folds['cum_covered'].all()
+
+    expected = CausalImpact(pre_data, [0, 79], [80, 99])
+    errors = pre_data['y'][80:100] - expected.inferences['post_preds'].loc[80:99]
+    np.testing.assert_allclose(folds['rmse'][1], np.sqrt(np.mean(errors ** 2)),
+                               rtol=1e-3)
+
+
+def test_backtest_warm_start(pre_data):
+    fit_args = []
+    original = CausalImpact._fit_model
+
+    def _fit_model(self):
+        fit_args.append(self.model_args.get('start_params'))
+        if len(fit_args) == 2:
+            raise ValueError('bad fold')
+        return original(self)
+
+    with mock.patch.object(CausalImpact, '_fit_model', _fit_model):
+        folds = backtest(pre_data, [0, 119], [120, 149], horizon=20, n_folds=3,
+                         window='rolling', n_jobs=1)
+    assert fit_args[0] is None
+    assert fit_args[1] is not None
+    # The failed fold doesn't reset the warm start.
+    np.testing.assert_array_equal(fit_args[2], fit_args[1])
+    assert list(folds['error']) == [None, 'ValueError: bad fold', None]
+    assert np.isnan(folds['coverage'][1])
+    assert list(folds['train_start']) == [0, 20, 40]
+
+
+@pytest.mark.parametrize('kwargs, warm_start', [
+    ({'concentrate_scale': True}, True),
+    ({'coarse_factor': 2}, False)
+])
+def test_backtest_warm_start_fit_options(pre_data, kwargs, warm_start):
+    fit_args = []
+    original = CausalImpact._fit_model
+
+    def _fit_model(self):
+        fit_args.append(self.model_args.get('start_params'))
+        return original(self)
+
+    with mock.patch.object(CausalImpact, '_fit_model', _fit_model):
+        folds = backtest(pre_data, [0, 119], [120, 149], horizon=20, n_folds=2,
+                         n_jobs=1, **kwargs)
+    assert fit_args[0] is None
+    assert (fit_args[1] is not None) == warm_start
+    assert folds['error'].isnull().all()
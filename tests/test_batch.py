@@ -0,0 +1,214 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module batch.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import io
+
+import mock
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.util.testing import assert_frame_equal
+
+from causalimpact import CausalImpact
+from causalimpact.batch import (Progress, SummaryWriter, iter_long_units,
+                                iter_wide_units, long_unit_slices,
+                                predicted_cost, read_done_units, run_batch,
+                                run_shared_batch, summary_row,
+                                wide_unit_slices)
+from causalimpact.parallel import ThreadingPolicy
+
+
+@pytest.fixture
+def wide_data():
+    np.random.seed(1)
+    data = pd.DataFrame(np.random.randn(100, 4), columns=['a', 'b', 'x1', 'x2'])
+    data['a'] += 10
+    return data
+
+
+@pytest.fixture
+def long_data(wide_data):
+    frames = []
+    for unit in ['a', 'b']:
+        frame = wide_data[[unit, 'x1', 'x2']].rename(columns={unit: 'y'})
+        frame['unit'] = unit
+        frame['time'] = np.arange(len(frame))
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_iter_wide_units(wide_data):
+    units = list(iter_wide_units(wide_data, ['x1', 'x2']))
+    assert [unit for unit, _ in units] == ['a', 'b']
+    assert_frame_equal(units[0][1], wide_data[['a', 'x1', 'x2']])
+    assert_frame_equal(units[1][1], wide_data[['b', 'x1', 'x2']])
+
+    units = list(iter_wide_units(wide_data))
+    assert [unit for unit, _ in units] == ['a', 'b', 'x1', 'x2']
+
+    with pytest.raises(ValueError) as excinfo:
+        list(iter_wide_units(wide_data, ['x3']))
+    assert str(excinfo.value) == 'x3 not present in input data.'
+
+
+def test_iter_long_units(long_data, wide_data):
+    units = list(iter_long_units(long_data, 'unit', 'y', 'time', ['x1', 'x2']))
+    assert [unit for unit, _ in units] == ['a', 'b']
+    expected = wide_data[['b', 'x1', 'x2']].rename(columns={'b': 'y'})
+    expected.index.name = 'time'
+    assert_frame_equal(units[1][1], expected)
+
+    units = list(iter_long_units(long_data, 'unit', 'y'))
+    assert list(units[1][1].columns) == ['y']
+    assert units[1][1].index[0] == 0
+
+    with pytest.raises(ValueError):
+        list(iter_long_units(long_data, 'region', 'y'))
+
+
+def test_summary_row(wide_data):
+    ci = CausalImpact(wide_data[['a', 'x1', 'x2']], [0, 69], [70, 99])
+    row = summary_row('a', ci)
+    assert list(row.keys())[:3] == ['unit', 'actual_average', 'actual_cumulative']
+    assert row['unit'] == 'a'
+    assert row['abs_effect_cumulative'] == ci.summary_data.loc['abs_effect',
+                                                               'cumulative']
+    assert row['p_value'] == ci.p_value
+    assert len(row) == 2 * len(ci.summary_data) + 2
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_run_batch(wide_data, n_jobs):
+    units = iter_wide_units(wide_data, ['x1', 'x2'])
+    results = list(run_batch(units, [0, 69], [70, 99], n_jobs=n_jobs,
+                             nseasons=[{'period': 7}]))
+    assert sorted(unit for unit, _, _ in results) == ['a', 'b']
+    for unit, row, error in results:
+        assert error is None
+        assert row['unit'] == unit
+        assert 0 <= row['p_value'] <= 1
+
+
+def test_run_batch_reports_failed_units(wide_data):
+    wide_data.loc[:, 'b'] = 1.
+    units = iter_wide_units(wide_data, ['x1', 'x2'])
+    results = dict((unit, (row, error)) for unit, row, error in
+                   run_batch(units, [0, 69], [70, 99]))
+    assert results['a'][1] is None
+    assert results['b'][0] is None
+    assert results['b'][1] == 'ValueError: Input response cannot be constant.'
+
+    with pytest.raises(ValueError):
+        list(run_batch([], [0, 69], [70, 99], n_jobs=0))
+
+
+def test_summary_writer_appends_and_resumes(tmpdir):
+    path = str(tmpdir.join('summary.csv'))
+    assert read_done_units(path) == set()
+    with SummaryWriter(path) as writer:
+        writer.write({'unit': 'a', 'p_value': 0.1})
+    with SummaryWriter(path) as writer:
+        writer.write({'unit': 'b', 'p_value': 0.2})
+    result = pd.read_csv(path)
+    assert list(result['unit']) == ['a', 'b']
+    assert read_done_units(path) == {'a', 'b'}
+
+
+def test_progress():
+    stream = io.StringIO()
+    progress = Progress(4, stream=stream)
+    assert progress.eta is None
+    progress.update()
+    progress.update(failed=True)
+    progress.close()
+    output = stream.getvalue()
+    assert '2/4 units (1 failed)' in output
+    assert 'units/s' in output
+    assert output.endswith('\n')
+
+
+def test_unit_slices(wide_data, long_data):
+    frame, units = wide_unit_slices(wide_data, ['x1', 'x2'])
+    assert frame is wide_data
+    assert units == [('a', slice(None), ['a', 'x1', 'x2']),
+                     ('b', slice(None), ['b', 'x1', 'x2'])]
+
+    shuffled = long_data.sample(frac=1, random_state=1)
+    frame, units = long_unit_slices(shuffled, 'unit', 'y', 'time', ['x1'])
+    assert [unit for unit, _, _ in units] == list(pd.unique(shuffled['unit']))
+    for unit, rows, columns in units:
+        assert columns == ['y', 'x1']
+        expected = shuffled[shuffled['unit'] == unit].set_index('time')[columns]
+        assert_frame_equal(frame.iloc[rows][columns], expected)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_run_shared_batch(long_data, n_jobs, tmpdir):
+    frame, units = long_unit_slices(long_data, 'unit', 'y', covariates=['x1', 'x2'])
+    expected = dict((unit, row) for unit, row, _ in
+                    run_batch(iter_long_units(long_data, 'unit', 'y',
+                                              covariates=['x1', 'x2']),
+                              [0, 69], [70, 99]))
+    for path in [None, str(tmpdir.join('data.npy'))]:
+        results = list(run_shared_batch(frame, units, [0, 69], [70, 99], n_jobs=n_jobs,
+                                        path=path))
+        assert sorted(unit for unit, _, _ in results) == ['a', 'b']
+        for unit, row, error in results:
+            assert error is None
+            assert row['actual_average'] == expected[unit]['actual_average']
+            assert row['predicted_average'] == pytest.approx(
+                expected[unit]['predicted_average'])
+
+    with pytest.raises(ValueError):
+        list(run_shared_batch(frame, units, [0, 69], [70, 99], n_jobs=0))
+
+
+def test_predicted_cost():
+    assert predicted_cost(100, 3, [0, 69], [70, 99], {}) > 0
+    assert predicted_cost(400, 3, [0, 299], [300, 399], {}) > predicted_cost(
+        100, 3, [0, 69], [70, 99], {})
+    assert predicted_cost(100, 3, [0, 69], [70, 99], {'nseasons': [{'period': 30}]}) > \
+        predicted_cost(100, 3, [0, 69], [70, 99], {})
+    # Periods that are not positions take all points as pre-intervention points.
+    assert predicted_cost(100, 3, ['20180101', '20180310'], ['20180311', '20180409'],
+                          {}) == predicted_cost(100, 3, [0, 99], [100, 100], {})
+
+
+def test_run_batch_orders_units_by_cost(wide_data):
+    units = [('short', wide_data.iloc[:80]), ('long', wide_data),
+             ('short2', wide_data.iloc[:80])]
+    with mock.patch.object(ThreadingPolicy, 'pool') as pool_mock:
+        pool_mock.return_value.imap_unordered.return_value = []
+        list(run_batch(iter(units), [0, 59], [60, 99], n_jobs=2))
+        tasks = pool_mock.return_value.imap_unordered.call_args[0][1]
+        assert [task[0] for task in tasks] == ['long', 'short', 'short2']
+
+        list(run_batch(iter(units), [0, 59], [60, 99], n_jobs=2, order_by_cost=False))
+        tasks = pool_mock.return_value.imap_unordered.call_args[0][1]
+        assert [task[0] for task in tasks] == ['short', 'long', 'short2']
+
+    frame, slices = long_unit_slices(
+        pd.concat([wide_data.iloc[:80].assign(unit='short'),
+                   wide_data.assign(unit='long')]), 'unit', 'a')
+    with mock.patch.object(ThreadingPolicy, 'pool') as pool_mock:
+        pool_mock.return_value.imap_unordered.return_value = []
+        list(run_shared_batch(frame, slices, [0, 59], [60, 99], n_jobs=2))
+    assert pool_mock.call_args[0][0].__name__ == '_init_shared_worker'
+    tasks = pool_mock.return_value.imap_unordered.call_args[0][1]
+    assert [task[0] for task in tasks] == ['long', 'short']
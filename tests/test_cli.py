@@ -0,0 +1,121 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module cli.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import mock
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.util.testing import assert_frame_equal
+
+from causalimpact import cli
+
+
+@pytest.fixture
+def wide_csv(tmpdir):
+    np.random.seed(1)
+    data = pd.DataFrame(np.random.randn(100, 4), columns=['a', 'b', 'c', 'x1'])
+    data['date'] = pd.date_range(start='20180101', periods=len(data)).strftime(
+        '%Y%m%d')
+    path = str(tmpdir.join('data.csv'))
+    data.to_csv(path, index=False)
+    return path
+
+
+def test_parse_period():
+    assert cli.parse_period(['0', '69'], pd.RangeIndex(100)) == [0, 69]
+    index = pd.Index(['20180101', '20180102'])
+    assert cli.parse_period(['20180101', '20180102'], index) == ['20180101', '20180102']
+
+
+def test_parse_nseasons():
+    assert cli.parse_nseasons(['7', '365:10']) == [
+        {'period': 7}, {'period': 365, 'harmonics': 10}]
+    assert cli.parse_nseasons(['365:auto']) == [{'period': 365, 'harmonics': 'auto'}]
+    assert cli.parse_nseasons(['auto']) == 'auto'
+
+
+def test_get_model_kwargs():
+    parser = cli.build_parser()
+    argv = ['in.csv', '-o', 'out.csv', '--pre-period', '0', '69', '--post-period',
+            '70', '99']
+    args = parser.parse_args(argv)
+    assert cli.get_model_kwargs(args) == {'standardize': True}
+
+    args = parser.parse_args(argv + ['--prior-level-sd', 'None', '--nseasons', '7',
+                                     '--no-standardize'])
+    assert cli.get_model_kwargs(args) == {
+        'standardize': False,
+        'nseasons': [{'period': 7}],
+        'prior_level_sd': None
+    }
+
+    # Abbreviated options are also sent.
+    args = parser.parse_args(argv + ['--prior', '0.1'])
+    assert cli.get_model_kwargs(args) == {'standardize': True, 'prior_level_sd': 0.1}
+    args = parser.parse_args(argv + ['--prior=none'])
+    assert cli.get_model_kwargs(args) == {'standardize': True, 'prior_level_sd': None}
+
+
+def test_main_wide_format_resumes(wide_csv, tmpdir):
+    output = str(tmpdir.join('summary.csv'))
+    argv = [wide_csv, '-o', output, '--time-column', 'date', '--covariates', 'x1',
+            '--pre-period', '20180101', '20180311', '--post-period', '20180312',
+            '20180410', '--quiet']
+    assert cli.main(argv) == 0
+    result = pd.read_csv(output)
+    assert sorted(result['unit']) == ['a', 'b', 'c']
+    assert result.shape[1] == 22
+
+    # Simulates an interruption before the last unit was written.
+    result.iloc[:-1].to_csv(output, index=False)
+    assert cli.main(argv) == 0
+    resumed = pd.read_csv(output)
+    assert list(resumed['unit']) == list(result['unit'])
+    assert_frame_equal(resumed.iloc[:-1], result.iloc[:-1])
+
+    with mock.patch('causalimpact.cli.run_shared_batch') as run_batch_mock:
+        run_batch_mock.return_value = []
+        cli.main(argv)
+        assert run_batch_mock.call_args[0][1] == []
+
+
+def test_main_long_format(wide_csv, tmpdir):
+    data = pd.read_csv(wide_csv)
+    data = pd.melt(data, id_vars=['date', 'x1'], value_vars=['a', 'b'],
+                   var_name='region', value_name='sales')
+    path = str(tmpdir.join('long.csv'))
+    data.to_csv(path, index=False)
+    output = str(tmpdir.join('summary.csv'))
+    argv = [path, '-o', output, '--format', 'long', '--unit-column', 'region',
+            '--response-column', 'sales', '--time-column', 'date', '--covariates',
+            'x1', '--pre-period', '0', '69', '--post-period', '70', '99',
+            '--n-jobs', '2', '--quiet']
+    # Integer periods are not present in a date index.
+    assert cli.main(argv) == 1
+    argv[argv.index('--time-column'):argv.index('--time-column') + 2] = []
+    assert cli.main(argv) == 0
+    assert sorted(pd.read_csv(output)['unit']) == ['a', 'b']
+
+    os.remove(output)
+    mmap_file = str(tmpdir.join('data.npy'))
+    assert cli.main(argv + ['--mmap-file', mmap_file]) == 0
+    assert sorted(pd.read_csv(output)['unit']) == ['a', 'b']
+    assert not os.path.exists(mmap_file)
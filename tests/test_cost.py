@@ -0,0 +1,114 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module cost.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import warnings
+
+import numpy as np
+import pytest
+from statsmodels.tsa.statespace.structural import UnobservedComponents
+
+from causalimpact.cost import (CostBudgetWarning, check_budget,
+                               choose_mle_regression, estimate_cost, fit_cost,
+                               model_dimensions, simulation_cost)
+
+
+def test_model_dimensions():
+    nseasons = [{'period': 7}, {'period': 30, 'harmonics': 2}]
+    for mle_regression in [True, False]:
+        model = UnobservedComponents(np.zeros(50), level='llevel',
+                                     exog=np.random.randn(50, 3),
+                                     freq_seasonal=nseasons,
+                                     mle_regression=mle_regression)
+        assert model_dimensions(3, nseasons, mle_regression) == (model.k_states,
+                                                                 model.k_params)
+    assert model_dimensions(0) == (1, 2)
+    assert model_dimensions(0, [{'period': 7, 'harmonics': 'auto'}]) == (7, 3)
+    assert model_dimensions(0, 'auto') == (1, 2)
+
+
+def test_fit_cost():
+    def cost(n_obs, k_exog, mle_regression=True, analytic_score=False):
+        return fit_cost(n_obs, *model_dimensions(k_exog, None, mle_regression),
+                        analytic_score=analytic_score)
+
+    assert cost(1000, 2) > cost(100, 2)
+    assert cost(365, 20) > cost(365, 2)
+    assert cost(365, 20, analytic_score=True) < cost(365, 20)
+    assert cost(365, 2, mle_regression=False) < cost(365, 2)
+    assert cost(365, 160, mle_regression=False) > cost(365, 160)
+
+
+def test_choose_mle_regression():
+    assert choose_mle_regression(365, 0)
+    assert not choose_mle_regression(365, 2)
+    assert not choose_mle_regression(365, 2, [{'period': 7}], analytic_score=True)
+    assert choose_mle_regression(365, 200)
+    assert choose_mle_regression(365, 40, analytic_score=True)
+    # Too short for the diffuse initialization of the regression states.
+    assert choose_mle_regression(10, 8)
+
+
+def test_simulation_cost():
+    assert simulation_cost(30, 3, n_sims=2000) == pytest.approx(
+        2 * simulation_cost(30, 3))
+    assert simulation_cost(300, 3) > simulation_cost(30, 3)
+    assert simulation_cost(30, 365) > 10 * simulation_cost(30, 13)
+
+
+def test_estimate_cost():
+    estimate = estimate_cost(300, 60, 2, {'nseasons': [{'period': 365}],
+                                          'mle_regression': True})
+    assert estimate['k_states'] == 1 + 2 * 182
+    assert estimate['k_params'] == 5
+    assert estimate['mle_regression']
+    assert estimate['total_seconds'] == pytest.approx(
+        estimate['fit_seconds'] + estimate['simulation_seconds'])
+    assert estimate['total_seconds'] > 60
+
+    cheap = estimate_cost(300, 60, 2, {'nseasons': [{'period': 7}]})
+    assert cheap['k_states'] == 7 + 2
+    assert not cheap['mle_regression']
+    assert cheap['total_seconds'] < 10
+
+    filtered = estimate_cost(300, 60, 2, {'fit_method': 'filter'}, n_sims=10)
+    assert filtered['fit_seconds'] < cheap['fit_seconds']
+    assert filtered['simulation_seconds'] < cheap['simulation_seconds']
+
+    model = UnobservedComponents(np.zeros(50), level='lltrend')
+    estimate = estimate_cost(50, 10, model=model)
+    assert (estimate['k_states'], estimate['k_params']) == (2, 3)
+
+
+def test_check_budget():
+    estimate = estimate_cost(300, 60, 2, {'nseasons': [{'period': 365}]})
+    with warnings.catch_warnings(record=True) as record:
+        warnings.simplefilter('always')
+        check_budget(estimate, None)
+        check_budget(estimate, 1e6)
+    assert not record
+
+    with pytest.warns(CostBudgetWarning) as record:
+        check_budget(estimate, 1.)
+    message = str(record[0].message)
+    assert 'above the budget of 1.00s' in message
+    assert '365 states and 5 parameters' in message
+
+    with pytest.raises(ValueError) as excinfo:
+        check_budget(estimate, 1., action='raise')
+    assert str(excinfo.value) == message
@@ -0,0 +1,122 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module donors.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from causalimpact.donors import select_donors
+
+
+@pytest.fixture
+def markets():
+    rs = np.random.RandomState(1)
+    index = pd.date_range('2018-01-01', periods=120, name='date')
+    base = rs.randn(120).cumsum()
+    candidates = pd.DataFrame(rs.randn(120, 40).cumsum(axis=0), index=index,
+                              columns=['m{}'.format(idx) for idx in range(40)])
+    candidates['m7'] = 2 * base + rs.randn(120) * 0.1
+    candidates['m21'] = base + 10 + rs.randn(120) * 0.5
+    target = pd.Series(base + rs.randn(120) * 0.2, index=index, name='sales')
+    target.iloc[100:] += 5
+    return target, candidates
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 1000])
+def test_select_donors_correlation(markets, block_size):
+    target, candidates = markets
+    candidates.iloc[110, 5] = np.nan
+    candidates['m30'] = 1.
+    target.iloc[10] = np.nan
+    data, scores = select_donors(target, candidates, ['20180101', '20180410'], k=5,
+                                 block_size=block_size)
+    expected = candidates.iloc[:100].corrwith(target.iloc[:100]).drop(['m5', 'm30'])
+    expected = expected.sort_values(ascending=False)[:5]
+    assert list(scores.index) == list(expected.index)
+    assert list(scores.index[:2]) == ['m7', 'm21']
+    np.testing.assert_allclose(scores, expected)
+    assert list(data.columns) == ['sales'] + list(expected.index)
+    pd.testing.assert_frame_equal(data.iloc[:, 1:], candidates[expected.index])
+    pd.testing.assert_series_equal(data['sales'], target)
+
+
+def test_select_donors_distance(markets):
+    target, candidates = markets
+    data, scores = select_donors(target, candidates, ['20180101', '20180410'], k=3,
+                                 standardize=False)
+    errors = candidates.iloc[:100].sub(target.iloc[:100], axis=0)
+    expected = -np.sqrt((errors ** 2).mean()).sort_values()[:3]
+    assert list(scores.index) == list(expected.index)
+    np.testing.assert_allclose(scores, expected)
+    # Distances penalize controls at other levels.
+    assert 'm21' not in scores.index
+
+
+def test_select_donors_arrays(tmpdir, markets):
+    target, candidates = markets
+    expected, expected_scores = select_donors(target.values, candidates, [0, 99], k=4)
+
+    path = str(tmpdir.join('markets.npy'))
+    np.save(path, candidates.values)
+    for source in [candidates.values, path]:
+        data, scores = select_donors(target.values, source, [0, 99], k=4,
+                                     block_size=10)
+        names = ['x{}'.format(candidates.columns.get_loc(name)) for name in
+                 expected_scores.index]
+        assert list(scores.index) == names
+        np.testing.assert_allclose(data.values, expected.values)
+
+    data, scores = select_donors(target.values, path, [0, 99], k=4,
+                                 names=list(candidates.columns))
+    pd.testing.assert_series_equal(scores, expected_scores)
+    assert list(data.columns) == ['y'] + list(expected_scores.index)
+
+
+def test_select_donors_parquet(tmpdir, markets):
+    pytest.importorskip('pyarrow')
+    target, candidates = markets
+    expected, expected_scores = select_donors(target, candidates,
+                                              ['20180101', '20180410'], k=4)
+    path = str(tmpdir.join('markets.parquet'))
+    candidates.to_parquet(path)
+    data, scores = select_donors(target, path, ['20180101', '20180410'], k=4,
+                                 block_size=10)
+    pd.testing.assert_series_equal(scores, expected_scores)
+    pd.testing.assert_frame_equal(data, expected)
+
+
+def test_select_donors_raises(markets):
+    target, candidates = markets
+    for k in [0, 2.5, True]:
+        with pytest.raises(ValueError) as excinfo:
+            select_donors(target, candidates, ['20180101', '20180410'], k=k)
+        assert str(excinfo.value) == 'k must be a positive integer.'
+    with pytest.raises(ValueError) as excinfo:
+        select_donors(target, candidates, ['20180101', '20180410'], block_size=0)
+    assert str(excinfo.value) == 'block_size must be a positive integer.'
+    with pytest.raises(ValueError) as excinfo:
+        select_donors(target, candidates.iloc[1:], ['20180101', '20180410'])
+    assert str(excinfo.value) == ('candidates must have the same number of rows as '
+                                  'target: 119 != 120.')
+    with pytest.raises(ValueError) as excinfo:
+        select_donors(target, candidates.values[:, 0], ['20180101', '20180410'])
+    assert str(excinfo.value) == 'candidates must be a 2-D array.'
+    with pytest.raises(ValueError) as excinfo:
+        select_donors(target, candidates, ['20171231', '20180410'])
+    assert str(excinfo.value) == '20171231 not present in input data index.'
@@ -0,0 +1,97 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module export.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from causalimpact import CausalImpact
+from causalimpact.batch import summary_row
+from causalimpact.export import (ResultsWriter, inferences_table, read_results,
+                                 summary_table)
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture(scope='module')
+def ci():
+    np.random.seed(1)
+    data = pd.DataFrame(np.random.randn(100, 2), columns=['y', 'x1'])
+    data = data.set_index(pd.date_range(start='20180101', periods=len(data)))
+    return CausalImpact(data, ['20180101', '20180311'], ['20180312', '20180410'])
+
+
+def test_inferences_table(ci):
+    table = inferences_table('a', ci.inferences)
+    assert table.column_names == ['unit', 'time'] + list(ci.inferences.columns)
+    assert table.num_rows == len(ci.inferences)
+    assert set(table.column('unit').to_pylist()) == {'a'}
+    result = table.to_pandas()
+    assert_array_equal(result['time'].values, ci.inferences.index.values)
+    assert_array_equal(result['post_cum_effects'].values,
+                       ci.inferences['post_cum_effects'].values)
+
+
+def test_summary_table(ci):
+    table = summary_table(['a', 'b'], [ci.summary_data, ci.summary_data],
+                          [ci.p_value, 0.5])
+    expected = summary_row('a', ci)
+    assert table.column_names == list(expected.keys())
+    result = table.to_pandas()
+    assert list(result['unit']) == ['a', 'b']
+    assert list(result['p_value']) == [ci.p_value, 0.5]
+    for name, value in expected.items():
+        assert result.loc[0, name] == value
+
+
+@pytest.mark.parametrize('format', ['parquet', 'arrow'])
+def test_results_writer_and_reader(ci, tmpdir, format):
+    path = str(tmpdir.join('results'))
+    with ResultsWriter(path, format=format, batch_size=2) as writer:
+        for unit in ['a', 'b', 'c']:
+            writer.write(unit, ci)
+    assert len(os.listdir(os.path.join(path, 'summary'))) == 2
+
+    summary = read_results(path, 'summary').to_pandas()
+    assert list(summary['unit']) == ['a', 'b', 'c']
+    inferences = read_results(path, 'inferences', columns=['unit', 'preds'])
+    assert inferences.column_names == ['unit', 'preds']
+    assert inferences.num_rows == 3 * len(ci.inferences)
+
+    # Opening the dataset again appends new parts.
+    with ResultsWriter(path, format=format) as writer:
+        writer.write('d', ci)
+    summary = read_results(path, 'summary').to_pandas()
+    assert list(summary['unit']) == ['a', 'b', 'c', 'd']
+
+
+def test_invalid_inputs_raise(tmpdir):
+    path = str(tmpdir.join('results'))
+    with pytest.raises(ValueError):
+        ResultsWriter(path, format='csv')
+    with pytest.raises(ValueError):
+        ResultsWriter(path, batch_size=0)
+    with pytest.raises(ValueError):
+        read_results(path, 'preds')
+    with pytest.raises(ValueError) as excinfo:
+        read_results(path)
+    assert str(excinfo.value) == 'No results found in {path}.'.format(path=path)
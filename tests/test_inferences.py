@@ -181,3 +181,93 @@ def test_simulated_y_custom_model():
     lower, upper = np.percentile(ci.simulated_y.mean(axis=1), [5, 95])
     assert lower > 119
     assert upper < 121
+
+
+def test_compare_responses():
+    np.random.seed(1)
+    X = 100 + np.random.randn(100).cumsum()
+    y = 1.2 * X + np.random.normal(size=100)
+    y[70:] += 2
+    data = pd.DataFrame({'y': y, 'X': X}, columns=['y', 'X'])
+    ci = CausalImpact(data, [0, 69], [70, 99])
+    post_y = ci.post_data['y']
+    responses = pd.DataFrame({'same': post_y, 'lower': post_y - 2, 'none': post_y - 50},
+                             columns=['same', 'lower', 'none'])
+    summary, effects = ci.compare_responses(responses)
+
+    assert list(summary.index) == ['same', 'lower', 'none']
+    for metric, values in ci.summary_data.iterrows():
+        for stat in ['average', 'cumulative']:
+            np.testing.assert_allclose(
+                summary.loc['same', '{}_{}'.format(metric, stat)], values[stat])
+    assert summary.loc['same', 'p_value'] == ci.p_value
+    assert summary.loc['none', 'p_value'] == 0
+    assert summary.loc['lower', 'p_value'] > ci.p_value
+    np.testing.assert_allclose(summary.loc['lower', 'abs_effect_cumulative'],
+                               ci.summary_data.loc['abs_effect', 'cumulative'] - 60)
+
+    assert effects.index.equals(ci.post_data.index)
+    for metric in ['point_effects', 'point_effects_lower', 'point_effects_upper',
+                   'post_cum_effects', 'post_cum_effects_lower',
+                   'post_cum_effects_upper']:
+        np.testing.assert_allclose(effects[metric]['same'],
+                                   ci.inferences.loc[ci.post_data.index, metric])
+    np.testing.assert_allclose(effects['point_effects']['lower'],
+                               effects['point_effects']['same'] - 2)
+
+    summary, effects = ci.compare_responses(lambda post_data: post_data.values[:, :1])
+    assert list(summary.index) == [0]
+    assert summary.loc[0, 'p_value'] == ci.p_value
+
+    with pytest.raises(ValueError) as excinfo:
+        ci.compare_responses(np.zeros((10, 2)))
+    assert str(excinfo.value) == ('responses must have 30 rows, one for each '
+                                  'post-intervention point.')
+
+
+def test_summarize_periods():
+    np.random.seed(1)
+    X = 100 + np.random.randn(120).cumsum()
+    y = 1.2 * X + np.random.normal(size=120)
+    y[70:] += 2
+    data = pd.DataFrame({'y': y, 'X': X}, columns=['y', 'X'],
+                        index=pd.date_range('20180101', periods=120))
+    ci = CausalImpact(data, ['20180101', '20180311'], ['20180312', '20180430'])
+    summary = ci.summarize_periods(horizons=[7, 50])
+    assert list(summary.index) == [7, 50]
+    for metric, values in ci.summary_data.iterrows():
+        for stat in ['average', 'cumulative']:
+            np.testing.assert_allclose(
+                summary.loc[50, '{}_{}'.format(metric, stat)], values[stat])
+    assert summary.loc[50, 'p_value'] == ci.p_value
+    post_y = ci.post_data['y']
+    np.testing.assert_allclose(summary.loc[7, 'actual_cumulative'], post_y[:7].sum())
+    np.testing.assert_allclose(summary.loc[7, 'predicted_average'],
+                               ci.inferences.loc[post_y.index[:7], 'post_preds'].mean())
+    lower, upper = np.percentile(ci.simulated_y[:, :7].sum(axis=1), [2.5, 97.5])
+    np.testing.assert_allclose(summary.loc[7, ['predicted_lower_cumulative',
+                                               'predicted_upper_cumulative']],
+                               [lower, upper])
+
+    weekly = ci.summarize_periods(freq='W')
+    assert len(weekly) == 8
+    assert weekly.index[0] == pd.Timestamp('20180318')
+    np.testing.assert_allclose(weekly['actual_cumulative'].sum(), post_y.sum())
+    np.testing.assert_allclose(weekly['actual_cumulative'].iloc[1],
+                               post_y['20180319':'20180325'].sum())
+    signal = min(np.sum(ci.simulated_y[:, :7].sum(axis=1) > post_y[:7].sum()),
+                 np.sum(ci.simulated_y[:, :7].sum(axis=1) < post_y[:7].sum()))
+    assert weekly['p_value'].iloc[1] < 0.05
+    assert summary.loc[7, 'p_value'] == signal / 1001
+
+    with pytest.raises(ValueError) as excinfo:
+        ci.summarize_periods()
+    assert str(excinfo.value) == 'Either horizons or freq must be sent.'
+    with pytest.raises(ValueError) as excinfo:
+        ci.summarize_periods(horizons=[0, 7])
+    assert str(excinfo.value) == 'horizons must be between 1 and 50.'
+
+    ci = CausalImpact(data.reset_index(drop=True), [0, 69], [70, 119])
+    with pytest.raises(ValueError) as excinfo:
+        ci.summarize_periods(freq='W')
+    assert str(excinfo.value) == 'freq can only be used with data indexed by dates.'
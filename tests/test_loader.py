@@ -0,0 +1,100 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module loader.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from causalimpact.loader import load_resampled, resample_chunks
+
+
+@pytest.fixture
+def events():
+    rs = np.random.RandomState(1)
+    index = pd.date_range('2018-01-01', periods=3 * 24 * 60, freq='min', name='ts')
+    return pd.DataFrame({'events': rs.poisson(3, len(index)),
+                         'x1': rs.randn(len(index))}, index=index)
+
+
+@pytest.fixture
+def expected(events):
+    return events.resample('H').agg({'events': 'sum', 'x1': 'mean'}).astype(float)
+
+
+def test_load_resampled_csv(tmpdir, events, expected):
+    path = str(tmpdir.join('events.csv'))
+    events.to_csv(path, date_format='%d/%m/%Y %H:%M')
+    data = load_resampled(path, 'H', how={'x1': 'mean'}, time_column='ts',
+                          date_format='%d/%m/%Y %H:%M', chunksize=1000)
+    pd.testing.assert_frame_equal(data, expected, check_freq=False,
+                                  check_names=False)
+
+    events.to_csv(path)
+    data = load_resampled(path, 'D', how='max', columns=['x1'], chunksize=1000)
+    pd.testing.assert_frame_equal(data, events[['x1']].resample('D').max(),
+                                  check_freq=False, check_names=False)
+
+
+def test_load_resampled_parquet(tmpdir, events, expected):
+    pytest.importorskip('pyarrow')
+    path = str(tmpdir.join('events.parquet'))
+    events.to_parquet(path)
+    data = load_resampled(path, 'H', how={'x1': 'mean'}, chunksize=1000)
+    pd.testing.assert_frame_equal(data, expected, check_freq=False, check_names=False)
+
+    events.reset_index().to_parquet(path)
+    data = load_resampled(path, 'H', time_column='ts', columns=['events'],
+                          chunksize=1000)
+    pd.testing.assert_frame_equal(data, expected[['events']], check_freq=False,
+                                  check_names=False)
+
+
+def test_load_resampled_npy(tmpdir, events, expected):
+    path = str(tmpdir.join('events.npy'))
+    np.save(path, events.values)
+    data = load_resampled(path, 'H', how={'x1': 'mean'}, columns=['events', 'x1'],
+                          start='2018-01-01', step='1min', chunksize=1000)
+    pd.testing.assert_frame_equal(data, expected, check_freq=False, check_names=False)
+
+    with pytest.raises(ValueError) as excinfo:
+        load_resampled(path, 'H', start='2018-01-01')
+    assert str(excinfo.value) == 'start and step are required to read .npy files.'
+
+
+def test_resample_chunks(events):
+    # Chunks are not sorted and there's a gap of two hours without points.
+    events = events.drop(events.index[120:240])
+    chunks = [events.iloc[2000:], events.iloc[:700], events.iloc[700:2000]]
+    data = resample_chunks(chunks, 'H', how={'events': 'sum', 'x1': 'min'})
+    assert len(data) == 72
+    assert data[['events', 'x1']].iloc[2:4].isnull().all().all()
+    np.testing.assert_allclose(data['x1'].dropna(),
+                               events['x1'].resample('H').min().dropna())
+
+    data = resample_chunks(chunks, 'H', fill_value=0)
+    assert (data['events'].iloc[2:4] == 0).all()
+    assert data['events'].sum() == events['events'].sum()
+
+    with pytest.raises(ValueError) as excinfo:
+        resample_chunks(chunks, 'H', how={'x1': 'median'})
+    assert str(excinfo.value) == ('how must be one of sum, mean, min, max, count; got '
+                                  'median.')
+    with pytest.raises(ValueError) as excinfo:
+        resample_chunks([], 'H')
+    assert str(excinfo.value) == 'Input data has no rows.'
@@ -22,6 +22,8 @@ of this file.
 from __future__ import absolute_import, division, print_function
 
 import os
+import subprocess
+import sys
 
 import mock
 import numpy as np
@@ -34,7 +36,11 @@ from statsmodels.tsa.statespace.structural import (
     UnobservedComponents, UnobservedComponentsResultsWrapper)
 
 from causalimpact import CausalImpact
+from causalimpact.cost import CostBudgetWarning
 from causalimpact.misc import standardize
+from causalimpact.models import (AnalyticScoreUnobservedComponents,
+                                 SteadyStateUnobservedComponents,
+                                 fit_multiresolution)
 
 
 def test_default_causal_cto(rand_data, pre_int_period, post_int_period):
@@ -510,6 +516,27 @@ def test_string_index_with_no_date_formatted(rand_data, pre_int_period, post_int
     _ = CausalImpact(rand_data, pre_period, post_period)
 
 
+def test_date_format(rand_data):
+    dates = pd.date_range('2018-01-01', periods=len(rand_data))
+    rand_data.index = dates.strftime('%d/%m/%Y')
+    pre_period = ['01/01/2018', '02/03/2018']
+    post_period = ['03/03/2018', '10/04/2018']
+    ci = CausalImpact(rand_data, pre_period, post_period, date_format='%d/%m/%Y')
+    pd.testing.assert_index_equal(ci.data.index, dates)
+    assert 'date_format' not in ci.model_args
+    assert len(ci.pre_data) == 61
+    assert ci.post_data.index[-1] == pd.Timestamp('2018-04-10')
+    # The format of the index is guessed when not sent.
+    rand_data.index = dates.strftime('%d/%m/%Y')
+    ci = CausalImpact(rand_data, ['20180101', '20180302'], ['20180303', '20180410'])
+    pd.testing.assert_index_equal(ci.pre_data.index, dates[:61])
+
+    rand_data.index = dates.strftime('%d/%m/%Y')
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_period, post_period, date_format='%Y%m%d')
+    assert str(excinfo.value) == 'Input data index does not match date_format "%Y%m%d".'
+
+
 def test_default_causal_inferences(fix_path):
     np.random.seed(1)
     data = pd.read_csv(os.path.join(fix_path, 'google_data.csv'))
@@ -636,6 +663,7 @@ def test_default_model_fit(rand_data, pre_int_period, post_int_period, monkeypat
     CausalImpact(rand_data, pre_int_period, post_int_period)
     model.fit.assert_called_with(
         bounds=[(None, None), (0.01 / 1.2, 0.012), (None, None), (None, None)],
+        cov_type='none',
         disp=False,
         nseasons=[],
         standardize=True
@@ -644,6 +672,7 @@ def test_default_model_fit(rand_data, pre_int_period, post_int_period, monkeypat
     CausalImpact(rand_data, pre_int_period, post_int_period, disp=True)
     model.fit.assert_called_with(
         bounds=[(None, None), (0.01 / 1.2, 0.012), (None, None), (None, None)],
+        cov_type='none',
         disp=True,
         nseasons=[],
         standardize=True
@@ -653,6 +682,7 @@ def test_default_model_fit(rand_data, pre_int_period, post_int_period, monkeypat
                  prior_level_sd=0.1)
     model.fit.assert_called_with(
         bounds=[(None, None), (0.1 / 1.2, 0.1 * 1.2), (None, None), (None, None)],
+        cov_type='none',
         disp=True,
         prior_level_sd=0.1,
         nseasons=[],
@@ -663,6 +693,7 @@ def test_default_model_fit(rand_data, pre_int_period, post_int_period, monkeypat
                  prior_level_sd=None)
     model.fit.assert_called_with(
         bounds=[(None, None), (None, None), (None, None), (None, None)],
+        cov_type='none',
         disp=True,
         prior_level_sd=None,
         nseasons=[],
@@ -685,6 +716,7 @@ def test_default_model_fit(rand_data, pre_int_period, post_int_period, monkeypat
     model.fit.assert_called_with(
         bounds=[(None, None), (0.001 / 1.2, 0.001 * 1.2), (None, None), (None, None),
                 (None, None)],
+        cov_type='none',
         disp=True,
         prior_level_sd=0.001,
         nseasons=[{'period': 3}],
@@ -704,6 +736,7 @@ def test_default_model_fit(rand_data, pre_int_period, post_int_period, monkeypat
     CausalImpact(new_data, pre_int_period, post_int_period, disp=False)
     model.fit.assert_called_with(
         bounds=[(None, None), (0.01 / 1.2, 0.01 * 1.2)],
+        cov_type='none',
         disp=False,
         nseasons=[],
         standardize=True
@@ -724,6 +757,7 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
     CausalImpact(rand_data, pre_int_period, post_int_period, model=model)
     fit_mock.assert_called_with(
         bounds=[(None, None), (0.01 / 1.2, 0.01 * 1.2), (None, None), (None, None)],
+        cov_type='none',
         disp=False,
         nseasons=[],
         standardize=True
@@ -732,6 +766,7 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
     CausalImpact(rand_data, pre_int_period, post_int_period, model=model, disp=True)
     fit_mock.assert_called_with(
         bounds=[(None, None), (0.01 / 1.2, 0.01 * 1.2), (None, None), (None, None)],
+        cov_type='none',
         disp=True,
         nseasons=[],
         standardize=True
@@ -741,6 +776,7 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
                  prior_level_sd=0.01)
     fit_mock.assert_called_with(
         bounds=[(None, None), (0.01 / 1.2, 0.01 * 1.2), (None, None), (None, None)],
+        cov_type='none',
         disp=True,
         prior_level_sd=0.01,
         nseasons=[],
@@ -751,6 +787,7 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
                  prior_level_sd=None)
     fit_mock.assert_called_with(
         bounds=[(None, None), (None, None), (None, None), (None, None)],
+        cov_type='none',
         disp=True,
         prior_level_sd=None,
         nseasons=[],
@@ -766,6 +803,7 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
     fit_mock.assert_called_with(
         bounds=[(None, None), (0.001 / 1.2, 0.001 * 1.2), (None, None), (None, None),
                 (None, None)],
+        cov_type='none',
         disp=True,
         prior_level_sd=0.001,
         nseasons=[],
@@ -786,6 +824,7 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
                  prior_level_sd=0.001)
     fit_mock.assert_called_with(
         bounds=[(0.001 / 1.2, 0.001 * 1.2), (None, None), (None, None)],
+        cov_type='none',
         disp=True,
         prior_level_sd=0.001,
         nseasons=[],
@@ -802,6 +841,7 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
                  disp=False)
     fit_mock.assert_called_with(
         bounds=[(None, None), (0.01 / 1.2, 0.01 * 1.2), (None, None)],
+        cov_type='none',
         disp=False,
         nseasons=[],
         standardize=True
@@ -815,6 +855,7 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
                  disp=False)
     fit_mock.assert_called_with(
         bounds=[(None, None), (None, None)],
+        cov_type='none',
         disp=False,
         nseasons=[],
         standardize=True
@@ -828,7 +869,392 @@ def test_custom_model_fit(rand_data, pre_int_period, post_int_period, monkeypatc
                  disp=False)
     fit_mock.assert_called_with(
         bounds=[(None, None), (0.01 / 1.2, 0.01 * 1.2), (None, None), (None, None)],
+        cov_type='none',
         disp=False,
         nseasons=[],
         standardize=True
     )
+
+
+def test_filter_fit_method(rand_data, pre_int_period, post_int_period):
+    ci = CausalImpact(rand_data, pre_int_period, post_int_period)
+    params = ci.trained_model.params
+
+    with mock.patch.object(UnobservedComponents, 'fit') as fit_mock:
+        filtered = CausalImpact(rand_data, pre_int_period, post_int_period,
+                                params=params)
+    fit_mock.assert_not_called()
+    assert filtered.model_args['params'] is params
+    assert_array_equal(filtered.trained_model.params, params)
+    np.testing.assert_allclose(filtered.inferences['preds'], ci.inferences['preds'])
+
+    filtered = CausalImpact(rand_data, pre_int_period, post_int_period,
+                            fit_method='filter', params=params.values)
+    assert_array_equal(filtered.trained_model.params, params)
+
+    filtered = CausalImpact(rand_data, pre_int_period, post_int_period,
+                            fit_method='filter', prior_level_sd=0.1)
+    model = filtered.model
+    assert filtered.trained_model.params['sigma2.level'] == pytest.approx(0.1 ** 2)
+    design = np.column_stack([np.ones(model.nobs), model.exog])
+    coefs = np.linalg.lstsq(design, model.endog[:, 0], rcond=None)[0]
+    np.testing.assert_allclose(
+        filtered.trained_model.params[['beta.x1', 'beta.x2']], coefs[1:])
+
+    filtered = CausalImpact(rand_data, pre_int_period, post_int_period,
+                            params={'beta.x1': 0.5}, prior_level_sd=None)
+    assert filtered.trained_model.params['beta.x1'] == 0.5
+    assert filtered.trained_model.params['sigma2.level'] == model.start_params[1]
+
+    with mock.patch.object(UnobservedComponents, 'fit') as fit_mock, \
+            mock.patch.object(CausalImpact, '_process_posterior_inferences'):
+        CausalImpact(rand_data, pre_int_period, post_int_period, fit_method='mle')
+    assert 'fit_method' not in fit_mock.call_args[1]
+
+
+def test_filter_fit_method_validation(rand_data, pre_int_period, post_int_period):
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, fit_method='em')
+    assert str(excinfo.value) == 'fit_method must be either "mle" or "filter".'
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, fit_method='mle',
+                     params=[1, 2])
+    assert str(excinfo.value) == 'params can only be used when fit_method is "filter".'
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, params={'beta.x3': 1})
+    assert str(excinfo.value) == (
+        'Unknown parameter "beta.x3". Model parameters are: sigma2.irregular, '
+        'sigma2.level, beta.x1, beta.x2.')
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, params=[1, 2])
+    assert str(excinfo.value) == (
+        'params must have 4 values, one for each of: sigma2.irregular, sigma2.level, '
+        'beta.x1, beta.x2.')
+
+
+def test_parameters_covariance_is_optional(rand_data, pre_int_period, post_int_period):
+    ci = CausalImpact(rand_data, pre_int_period, post_int_period)
+    assert ci.trained_model.cov_type == 'none'
+
+    ci = CausalImpact(rand_data, pre_int_period, post_int_period, cov_type='opg')
+    assert ci.trained_model.cov_type == 'opg'
+    assert np.all(ci.trained_model.bse > 0)
+
+    ci = CausalImpact(rand_data, pre_int_period, post_int_period, fit_method='filter')
+    assert ci.trained_model.cov_type == 'none'
+
+
+def test_concentrate_scale(rand_data, pre_int_period, post_int_period):
+    rs = np.random.RandomState(1)
+    X = rs.randn(200, 2).cumsum(axis=0)
+    data = pd.DataFrame({'y': X.dot([1., .5]) + rs.randn(200), 'x1': X[:, 0],
+                         'x2': X[:, 1]}, columns=['y', 'x1', 'x2'])
+    ci = CausalImpact(data, pre_int_period, post_int_period, prior_level_sd=None)
+    concentrated = CausalImpact(data, pre_int_period, post_int_period,
+                                prior_level_sd=None, concentrate_scale=True)
+    assert concentrated.trained_model.model is concentrated.model
+    assert list(concentrated.trained_model.params.index) == ci.model.param_names
+    assert concentrated.trained_model.llf == pytest.approx(ci.trained_model.llf,
+                                                           abs=1e-3)
+    np.testing.assert_allclose(concentrated.inferences['preds'],
+                               ci.inferences['preds'], rtol=1e-3)
+
+    concentrated = CausalImpact(data, pre_int_period, post_int_period,
+                                prior_level_sd=0.1, concentrate_scale=True)
+    level_sd = np.sqrt(concentrated.trained_model.params['sigma2.level'])
+    assert 0.1 / 1.2 * 0.99 <= level_sd <= 0.1 * 1.2 * 1.01
+
+    # Under the default bounded prior the optimum is the same as well.
+    for mle_regression in [True, False]:
+        ci = CausalImpact(data, pre_int_period, post_int_period,
+                          mle_regression=mle_regression)
+        concentrated = CausalImpact(data, pre_int_period, post_int_period,
+                                    mle_regression=mle_regression,
+                                    concentrate_scale=True)
+        assert concentrated.trained_model.llf == pytest.approx(ci.trained_model.llf,
+                                                               abs=1e-4)
+
+    concentrated = CausalImpact(data, pre_int_period, post_int_period,
+                                mle_regression=False, concentrate_scale=True,
+                                start_params=ci.trained_model.params.values)
+    assert concentrated.trained_model.llf == pytest.approx(ci.trained_model.llf,
+                                                           abs=1e-4)
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period,
+                     concentrate_scale='yes')
+    assert str(excinfo.value) == 'concentrate_scale argument must be of type bool.'
+
+    pre_data = rand_data.loc[pre_int_period[0]: pre_int_period[1], :]
+    model = UnobservedComponents(endog=pre_data.iloc[:, 0], level='llevel',
+                                 exog=pre_data.iloc[:, 1:])
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, model=model,
+                     concentrate_scale=True)
+    assert str(excinfo.value) == (
+        'concentrate_scale can only be used with the default model.')
+
+
+def test_analytic_score(rand_data, pre_int_period, post_int_period):
+    rs = np.random.RandomState(1)
+    X = rs.randn(200, 2).cumsum(axis=0)
+    data = pd.DataFrame({'y': X.dot([1., .5]) + rs.randn(200), 'x1': X[:, 0],
+                         'x2': X[:, 1]}, columns=['y', 'x1', 'x2'])
+    ci = CausalImpact(data, pre_int_period, post_int_period, nseasons=[{'period': 7}])
+    analytic = CausalImpact(data, pre_int_period, post_int_period,
+                            nseasons=[{'period': 7}], analytic_score=True)
+    assert isinstance(analytic.model, AnalyticScoreUnobservedComponents)
+    assert analytic.trained_model.llf == pytest.approx(ci.trained_model.llf,
+                                                       abs=1e-3)
+    np.testing.assert_allclose(analytic.inferences['preds'],
+                               ci.inferences['preds'], rtol=1e-3)
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, analytic_score='yes')
+    assert str(excinfo.value) == 'analytic_score argument must be of type bool.'
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, analytic_score=True,
+                     concentrate_scale=True)
+    assert str(excinfo.value) == (
+        'analytic_score cannot be used with concentrate_scale.')
+
+    pre_data = rand_data.loc[pre_int_period[0]: pre_int_period[1], :]
+    model = UnobservedComponents(endog=pre_data.iloc[:, 0], level='llevel',
+                                 exog=pre_data.iloc[:, 1:])
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, model=model,
+                     analytic_score=True)
+    assert str(excinfo.value) == (
+        'analytic_score can only be used with the default model.')
+
+
+def test_mle_regression(rand_data, pre_int_period, post_int_period):
+    ci = CausalImpact(rand_data, pre_int_period, post_int_period)
+    assert ci.model.mle_regression
+    assert ci.model.param_names == ['sigma2.irregular', 'sigma2.level', 'beta.x1',
+                                    'beta.x2']
+    assert ci.model_args == {'standardize': True, 'nseasons': []}
+
+    ci = CausalImpact(rand_data, pre_int_period, post_int_period, mle_regression='auto')
+    assert not ci.model.mle_regression
+    assert ci.model.param_names == ['sigma2.irregular', 'sigma2.level']
+    assert ci.simulated_y.shape == (1000, len(ci.post_data))
+
+    with mock.patch('causalimpact.main.choose_mle_regression',
+                    return_value=True) as choose_mock:
+        ci = CausalImpact(rand_data, pre_int_period, post_int_period,
+                          nseasons=[{'period': 7}], analytic_score=True,
+                          mle_regression='auto')
+    choose_mock.assert_called_once_with(len(ci.pre_data), 2, [{'period': 7}], True)
+    assert ci.model.mle_regression
+
+    # Fixed params may set the regression coefficients.
+    with mock.patch('causalimpact.main.choose_mle_regression') as choose_mock:
+        filtered = CausalImpact(rand_data, pre_int_period, post_int_period,
+                                params={'beta.x1': 0.5}, prior_level_sd=None,
+                                mle_regression='auto')
+    choose_mock.assert_not_called()
+    assert filtered.trained_model.params['beta.x1'] == 0.5
+
+    filtered = CausalImpact(rand_data, pre_int_period, post_int_period,
+                            fit_method='filter', mle_regression=False)
+    assert list(filtered.trained_model.params.index) == ['sigma2.irregular',
+                                                         'sigma2.level']
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, mle_regression='no')
+    assert str(excinfo.value) == 'mle_regression must be either a bool or "auto".'
+
+    pre_data = rand_data.loc[pre_int_period[0]: pre_int_period[1], :]
+    model = UnobservedComponents(endog=pre_data.iloc[:, 0], level='llevel',
+                                 exog=pre_data.iloc[:, 1:])
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, model=model,
+                     mle_regression=False)
+    assert str(excinfo.value) == (
+        'mle_regression can only be used with the default model.')
+
+
+def test_steady_state_tol(rand_data, pre_int_period, post_int_period):
+    rs = np.random.RandomState(1)
+    X = rs.randn(2000, 2).cumsum(axis=0)
+    data = pd.DataFrame({'y': X.dot([1., .5]) + rs.randn(2000), 'x1': X[:, 0],
+                         'x2': X[:, 1]}, columns=['y', 'x1', 'x2'])
+    ci = CausalImpact(data, [0, 1899], [1900, 1999], mle_regression=True)
+    steady = CausalImpact(data, [0, 1899], [1900, 1999], steady_state_tol=1e-9)
+    assert isinstance(steady.model, SteadyStateUnobservedComponents)
+    assert steady.model.mle_regression
+    assert steady.model.ssm.tolerance == 1e-9
+    assert steady.trained_model.llf == pytest.approx(ci.trained_model.llf, abs=1e-6)
+    np.testing.assert_allclose(steady.inferences['post_preds'],
+                               ci.inferences['post_preds'], rtol=1e-4)
+
+    for steady_state_tol in [0, -1e-9, True, '1e-9']:
+        with pytest.raises(ValueError) as excinfo:
+            CausalImpact(rand_data, pre_int_period, post_int_period,
+                         steady_state_tol=steady_state_tol)
+        assert str(excinfo.value) == 'steady_state_tol must be a positive number.'
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, steady_state_tol=1e-9,
+                     analytic_score=True)
+    assert str(excinfo.value) == (
+        'steady_state_tol cannot be used with analytic_score nor concentrate_scale.')
+
+    pre_data = rand_data.loc[pre_int_period[0]: pre_int_period[1], :]
+    model = UnobservedComponents(endog=pre_data.iloc[:, 0], level='llevel',
+                                 exog=pre_data.iloc[:, 1:])
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, model=model,
+                     steady_state_tol=1e-9)
+    assert str(excinfo.value) == (
+        'steady_state_tol can only be used with the default model.')
+
+
+def test_coarse_factor(rand_data, pre_int_period, post_int_period):
+    rs = np.random.RandomState(1)
+    X = rs.randn(1000, 2).cumsum(axis=0)
+    data = pd.DataFrame({'y': X.dot([1., .5]) + rs.randn(1000), 'x1': X[:, 0],
+                         'x2': X[:, 1]}, columns=['y', 'x1', 'x2'])
+    ci = CausalImpact(data, [0, 899], [900, 999], nseasons=[{'period': 7}])
+    with mock.patch('causalimpact.models.fit_multiresolution',
+                    wraps=fit_multiresolution) as fit_mock:
+        coarse = CausalImpact(data, [0, 899], [900, 999], nseasons=[{'period': 7}],
+                              coarse_factor=7)
+    fit_mock.assert_called_once_with(coarse.model, 7, level_sd=0.01, disp=False,
+                                     cov_type='none')
+    assert coarse.trained_model.llf == pytest.approx(ci.trained_model.llf, abs=1e-2)
+    np.testing.assert_allclose(coarse.inferences['post_preds'],
+                               ci.inferences['post_preds'], rtol=1e-2)
+
+    for coarse_factor in [1, 2.5, True, '7']:
+        with pytest.raises(ValueError) as excinfo:
+            CausalImpact(rand_data, pre_int_period, post_int_period,
+                         coarse_factor=coarse_factor)
+        assert str(excinfo.value) == 'coarse_factor must be an integer greater than 1.'
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, coarse_factor=7,
+                     concentrate_scale=True)
+    assert str(excinfo.value) == 'coarse_factor cannot be used with concentrate_scale.'
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, coarse_factor=7,
+                     start_params=[1., 1., 1., 1.])
+    assert str(excinfo.value) == 'coarse_factor cannot be used with start_params.'
+
+    pre_data = rand_data.loc[pre_int_period[0]: pre_int_period[1], :]
+    model = UnobservedComponents(endog=pre_data.iloc[:, 0], level='llevel',
+                                 exog=pre_data.iloc[:, 1:])
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, model=model,
+                     coarse_factor=7)
+    assert str(excinfo.value) == (
+        'coarse_factor can only be used with the default model.')
+
+
+def test_cost_budget(rand_data, pre_int_period, post_int_period):
+    with pytest.warns(CostBudgetWarning) as record:
+        ci = CausalImpact(rand_data, pre_int_period, post_int_period,
+                          nseasons=[{'period': 7}], cost_budget=1e-3)
+    assert 'the model has 7 states and 5 parameters' in str(record[0].message)
+    assert ci.inferences is not None
+
+    with mock.patch.object(UnobservedComponents, 'fit') as fit_mock:
+        with pytest.raises(ValueError) as excinfo:
+            CausalImpact(rand_data, pre_int_period, post_int_period,
+                         nseasons=[{'period': 7}], cost_budget=1e-3,
+                         cost_budget_action='raise')
+    fit_mock.assert_not_called()
+    assert 'is above the budget of 0.00s' in str(excinfo.value)
+
+    with mock.patch.object(UnobservedComponents, 'fit') as fit_mock, \
+            mock.patch.object(CausalImpact, '_process_posterior_inferences'):
+        CausalImpact(rand_data, pre_int_period, post_int_period, cost_budget=1e3,
+                     cost_budget_action='raise')
+    assert 'cost_budget' not in fit_mock.call_args[1]
+    assert 'cost_budget_action' not in fit_mock.call_args[1]
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, cost_budget=-1)
+    assert str(excinfo.value) == 'cost_budget must be a positive number.'
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, cost_budget=1,
+                     cost_budget_action='ignore')
+    assert str(excinfo.value) == 'cost_budget_action must be either "warn" or "raise".'
+
+
+def test_auto_harmonics(pre_int_period, post_int_period):
+    rs = np.random.RandomState(1)
+    t = np.arange(200)
+    X = rs.randn(200).cumsum()
+    y = X + np.sin(2 * np.pi * t / 7) + .5 * np.sin(4 * np.pi * t / 7) + \
+        rs.randn(200) * .3
+    data = pd.DataFrame({'y': y, 'x': X}, columns=['y', 'x'])
+    nseasons = [{'period': 7, 'harmonics': 'auto'}]
+    ci = CausalImpact(data, pre_int_period, post_int_period, nseasons=nseasons)
+    assert ci.model_args['nseasons'] == [{'period': 7, 'harmonics': 2}]
+    assert ci.model.freq_seasonal_harmonics == [2]
+    assert nseasons == [{'period': 7, 'harmonics': 'auto'}]
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(data, pre_int_period, post_int_period,
+                     nseasons=[{'period': 7, 'harmonics': 'all'}])
+    assert str(excinfo.value) == 'nseasons harmonics must be a number or "auto".'
+
+
+def test_auto_nseasons(pre_int_period, post_int_period):
+    rs = np.random.RandomState(2)
+    t = np.arange(200)
+    X = rs.randn(200).cumsum()
+    y = X + np.sin(2 * np.pi * t / 7) + .5 * np.sin(4 * np.pi * t / 7) + \
+        rs.randn(200) * .3
+    data = pd.DataFrame({'y': y, 'x': X}, columns=['y', 'x'])
+    ci = CausalImpact(data, pre_int_period, post_int_period, nseasons='auto')
+    assert ci.model_args['nseasons'] == [{'period': 7, 'harmonics': 2}]
+    assert ci.model.freq_seasonal_periods == [7]
+
+    ci = CausalImpact(data.iloc[:, :1].assign(y=rs.randn(200)), pre_int_period,
+                      post_int_period, nseasons='auto')
+    assert ci.model_args['nseasons'] == []
+    assert ci.model.freq_seasonal_periods == []
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(data, pre_int_period, post_int_period, nseasons='weekly')
+    assert str(excinfo.value) == (
+        'nseasons must be a list of dicts with the required key "period" and the '
+        'optional key "harmonics".')
+
+
+def test_post_responses(rand_data, pre_int_period, post_int_period):
+    post_y = rand_data.iloc[post_int_period[0]:post_int_period[1] + 1, 0]
+    responses = pd.DataFrame({'gross': post_y, 'net': post_y * .8},
+                             columns=['gross', 'net'])
+    with mock.patch.object(UnobservedComponents, 'fit',
+                           wraps=UnobservedComponents.fit, autospec=True) as fit_mock:
+        ci = CausalImpact(rand_data, pre_int_period, post_int_period,
+                          post_responses=responses)
+    fit_mock.assert_called_once()
+    assert 'post_responses' not in fit_mock.call_args[1]
+    assert list(ci.responses_summary.index) == ['gross', 'net']
+    assert ci.responses_summary.loc['gross', 'p_value'] == ci.p_value
+    assert list(ci.responses_effects['point_effects'].columns) == ['gross', 'net']
+
+    ci = CausalImpact(rand_data, pre_int_period, post_int_period,
+                      post_responses=lambda post_data: post_data.iloc[:, :1] * 2)
+    assert list(ci.responses_summary.index) == ['y']
+
+    with pytest.raises(ValueError) as excinfo:
+        CausalImpact(rand_data, pre_int_period, post_int_period, post_responses=1.)
+    assert str(excinfo.value) == 'post_responses must be either array-like or callable.'
+
+
+def test_models_are_imported_lazily():
+    # Options of `causalimpact.models` need recent statsmodels releases.
+    code = "import sys, causalimpact; sys.exit('causalimpact.models' in sys.modules)"
+    assert subprocess.call([sys.executable, '-c', code]) == 0
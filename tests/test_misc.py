@@ -17,15 +17,17 @@
 from __future__ import absolute_import, division, print_function
 
 import inspect
+import sys
 
+import mock
 import numpy as np
 import pandas as pd
 import pytest
 from pandas.util.testing import array_equivalent, assert_almost_equal
 from statsmodels.tsa.statespace.structural import UnobservedComponents
 
-from causalimpact.misc import (get_reference_model, get_z_score, standardize,
-                               unstandardize)
+from causalimpact.misc import (get_pyarrow, get_reference_model, get_z_score,
+                               standardize, unstandardize)
 
 
 def test_basic_standardize():
@@ -95,3 +97,17 @@ def test_default_get_reference_model():
     assert ref_model_kwds == model_kwds
     assert array_equivalent(ref_model.endog, [[1], [1], [1]])
     assert array_equivalent(ref_model.exog, [[2], [2], [2]])
+
+
+def test_get_pyarrow():
+    pytest.importorskip('pyarrow')
+    pyarrow = get_pyarrow()
+    assert pyarrow.parquet.ParquetFile is not None
+    assert pyarrow.ipc.new_file is not None
+
+    with mock.patch.dict(sys.modules, {'pyarrow': None}):
+        with pytest.raises(ImportError) as excinfo:
+            get_pyarrow()
+    assert str(excinfo.value) == ('pyarrow is required for reading and writing Parquet '
+                                  'or Arrow files. Please install it with '
+                                  '"pip install pycausalimpact[parquet]".')
@@ -0,0 +1,281 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module models.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import warnings
+
+import mock
+import numpy as np
+import pytest
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
+from statsmodels.tsa.statespace.structural import UnobservedComponents
+
+from causalimpact.models import (LOGLIKE_ARGS,
+                                 AnalyticScoreUnobservedComponents,
+                                 ConcentratedUnobservedComponents,
+                                 SteadyStateUnobservedComponents, _block_means,
+                                 _fixed_gain_forecasts, _handle_args,
+                                 fit_concentrated, fit_multiresolution)
+
+
+@pytest.fixture
+def data():
+    rs = np.random.RandomState(1)
+    X = rs.randn(200, 2).cumsum(axis=0)
+    y = X.dot([1., .5]) + rs.randn(200) + np.sin(np.arange(200) * 2 * np.pi / 7)
+    return (y - y.mean()) / y.std(), (X - X.mean(axis=0)) / X.std(axis=0)
+
+
+def test_concentrated_model_is_equivalent(data):
+    y, X = data
+    model = UnobservedComponents(y, level='llevel', exog=X,
+                                 freq_seasonal=[{'period': 7}])
+    concentrated = ConcentratedUnobservedComponents(y, level='llevel', exog=X,
+                                                    freq_seasonal=[{'period': 7}])
+    assert concentrated.param_names == ['ratio.level', 'ratio.freq_seasonal_7(3)',
+                                        'beta.x1', 'beta.x2']
+    assert concentrated.k_params == 4
+    assert len(concentrated.start_params) == 4
+
+    params = np.array([0.5, 0.01, 0.002, 0.9, 0.4])
+    ratios = np.r_[params[1:3] / params[0], params[3:]]
+    results = concentrated.filter(ratios)
+    # The concentrated likelihood is the likelihood at the best scale.
+    assert results.llf >= model.loglike(params)
+    np.testing.assert_allclose(concentrated.expand_params(ratios, 0.5), params)
+    np.testing.assert_allclose(
+        model.loglike(concentrated.expand_params(ratios, results.scale)), results.llf)
+
+    unconstrained = concentrated.untransform_params(ratios)
+    np.testing.assert_allclose(concentrated.transform_params(unconstrained), ratios)
+
+
+def test_concentrated_model_requires_irregular(data):
+    with pytest.raises(ValueError) as excinfo:
+        ConcentratedUnobservedComponents(data[0], level='rwalk')
+    assert str(excinfo.value) == (
+        'Concentrating the scale requires an irregular component.')
+
+
+def test_handle_args():
+    assert _handle_args(LOGLIKE_ARGS) == (True, False, False, {})
+    assert _handle_args(LOGLIKE_ARGS, False, True, a=1) == (False, True, False,
+                                                            {'a': 1})
+    # Optimizers send the options as a dict.
+    assert _handle_args(LOGLIKE_ARGS, {'complex_step': True}) == (
+        True, False, True, {})
+    assert _handle_args(LOGLIKE_ARGS, transformed=False, a=1) == (
+        False, False, False, {'a': 1})
+    with pytest.raises(TypeError):
+        _handle_args(LOGLIKE_ARGS, {'transformed': True}, transformed=False)
+
+
+def test_fit_concentrated(data):
+    y, X = data
+    model = UnobservedComponents(y, level='llevel', exog=X)
+    expected = model.fit(disp=False)
+    results = fit_concentrated(model, level_sd=None)
+    assert results.model is model
+    assert results.cov_type == 'none'
+    assert results.llf == pytest.approx(expected.llf, abs=1e-3)
+    np.testing.assert_allclose(results.params, expected.params, atol=1e-3)
+
+    results = fit_concentrated(model, level_sd=0.1, cov_type='opg')
+    assert results.cov_type == 'opg'
+    level_sd = np.sqrt(results.params[1])
+    assert 0.1 / 1.2 * 0.99 <= level_sd <= 0.1 * 1.2 * 1.01
+
+
+def test_fit_concentrated_start_params(data):
+    y, X = data
+    model = UnobservedComponents(y, level='llevel', exog=X)
+    expected = model.fit(disp=False)
+    params = np.asarray(expected.params)
+    with mock.patch.object(ConcentratedUnobservedComponents, 'fit', autospec=True,
+                           wraps=ConcentratedUnobservedComponents.fit) as fit_mock:
+        results = fit_concentrated(model, level_sd=None, start_params=params)
+    # The irregular variance is the initial scale of the other variances.
+    np.testing.assert_allclose(fit_mock.call_args_list[0][1]['start_params'],
+                               np.r_[params[1] / params[0], params[2:]])
+    assert results.llf == pytest.approx(expected.llf, abs=1e-4)
+
+
+@pytest.mark.parametrize('mle_regression', [True, False])
+@pytest.mark.parametrize('nseasons', [None, [{'period': 7}]])
+def test_fit_concentrated_bounded_level(data, mle_regression, nseasons):
+    y, X = data
+    model = UnobservedComponents(y, level='llevel', exog=X, freq_seasonal=nseasons,
+                                 mle_regression=mle_regression)
+    bounds = [(None, None)] * len(model.param_names)
+    bounds[1] = (0.01 / 1.2, 0.01 * 1.2)
+    expected = model.fit(bounds=bounds, disp=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', ConvergenceWarning)
+        results = fit_concentrated(model, level_sd=0.01)
+    assert results.llf == pytest.approx(expected.llf, abs=1e-4)
+    np.testing.assert_allclose(results.params, expected.params, atol=1e-3)
+
+
+@pytest.mark.parametrize('nseasons', [
+    None,
+    [{'period': 7}, {'period': 30, 'harmonics': 2}]
+])
+@pytest.mark.parametrize('with_exog', [True, False])
+def test_analytic_score_matches_numerical_score(data, nseasons, with_exog):
+    y, X = data
+    y = y.copy()
+    y[50:53] = np.nan
+    exog = X if with_exog else None
+    model = UnobservedComponents(y, level='llevel', exog=exog, freq_seasonal=nseasons)
+    analytic = AnalyticScoreUnobservedComponents(y, level='llevel', exog=exog,
+                                                 freq_seasonal=nseasons)
+    params = np.array(model.start_params)
+    params[1] = 1e-3
+    np.testing.assert_allclose(analytic.score(params), model.score(params),
+                               rtol=1e-5, atol=1e-5)
+    unconstrained = model.untransform_params(params)
+    np.testing.assert_allclose(analytic.score(unconstrained, transformed=False),
+                               model.score(unconstrained, transformed=False),
+                               rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(analytic.score(params, score_method='approx'),
+                               model.score(params))
+
+
+def test_analytic_score_fit(data):
+    y, X = data
+    model = UnobservedComponents(y, level='llevel', exog=X,
+                                 freq_seasonal=[{'period': 7}])
+    analytic = AnalyticScoreUnobservedComponents(y, level='llevel', exog=X,
+                                                 freq_seasonal=[{'period': 7}])
+    expected = model.fit(disp=False)
+    results = analytic.fit(disp=False)
+    assert results.llf == pytest.approx(expected.llf, abs=1e-3)
+    np.testing.assert_allclose(results.params, expected.params, atol=1e-2)
+
+    with analytic.fix_params({'sigma2.level': 1e-4}):
+        results = analytic.fit(disp=False)
+    assert results.params[1] == 1e-4
+
+
+def test_analytic_score_requires_variance_parameters(data):
+    with pytest.raises(ValueError) as excinfo:
+        AnalyticScoreUnobservedComponents(data[0], level='llevel', autoregressive=1)
+    assert str(excinfo.value) == (
+        'Analytic score requires an irregular component and parameters that are '
+        'variances or regression coefficients only.')
+
+
+@pytest.fixture
+def long_data():
+    rs = np.random.RandomState(1)
+    X = rs.randn(2000, 2).cumsum(axis=0)
+    y = X.dot([1., .5]) + rs.randn(2000) + np.sin(np.arange(2000) * 2 * np.pi / 7)
+    return (y - y.mean()) / y.std(), (X - X.mean(axis=0)) / X.std(axis=0)
+
+
+@pytest.mark.parametrize('nseasons', [None, [{'period': 7}]])
+def test_steady_state_loglike_matches(long_data, nseasons):
+    y, X = long_data
+    kwargs = dict(level='llevel', exog=X, mle_regression=True, freq_seasonal=nseasons)
+    model = UnobservedComponents(y, **kwargs)
+    steady = SteadyStateUnobservedComponents(y, **kwargs)
+    model.ssm.tolerance = steady.ssm.tolerance = 1e-12
+    params = np.array(model.start_params)
+    params[1] = 1e-2
+    assert steady.loglike(params) == pytest.approx(model.loglike(params), abs=1e-6)
+    # Covariances converged without filtering all the points.
+    n_head = max(steady._head_models)
+    assert steady._steady_state_loglike(params, n_head, False, {}) is not None
+    np.testing.assert_allclose(steady.score(params), model.score(params), rtol=1e-6,
+                               atol=1e-6)
+    unconstrained = model.untransform_params(params)
+    assert steady.loglike(unconstrained, transformed=False) == pytest.approx(
+        model.loglike(unconstrained, transformed=False), abs=1e-6)
+
+
+def test_steady_state_loglike_fallback(long_data):
+    y, X = long_data
+    params = [1., 1e-6, 1., .5]
+    model = SteadyStateUnobservedComponents(y, level='llevel', exog=X,
+                                            mle_regression=True)
+    expected = UnobservedComponents(y, level='llevel', exog=X,
+                                    mle_regression=True).loglike(params)
+    # A tiny level variance doesn't converge within a quarter of the points.
+    assert model.loglike(params) == expected
+    assert max(model._head_models) <= len(y) // 4
+
+    y = y.copy()
+    y[1500] = np.nan
+    model = SteadyStateUnobservedComponents(y, level='llevel', exog=X,
+                                            mle_regression=True)
+    expected = UnobservedComponents(y, level='llevel', exog=X,
+                                    mle_regression=True).loglike([1., 1e-2, 1., .5])
+    assert model.loglike([1., 1e-2, 1., .5]) == expected
+
+
+def test_fixed_gain_forecasts():
+    rs = np.random.RandomState(1)
+    transition = rs.rand(3, 3) / 3
+    gain, design, initial_state = rs.randn(3), rs.randn(3), rs.randn(3)
+    residuals = rs.randn(150)
+    expected = []
+    state = initial_state
+    for residual in residuals:
+        expected.append(design.dot(state))
+        state = transition.dot(state) + gain * residual
+    forecasts = _fixed_gain_forecasts(transition, gain, design, initial_state,
+                                      residuals, 16)
+    np.testing.assert_allclose(forecasts, expected)
+
+
+@pytest.mark.parametrize('mle_regression', [True, False])
+def test_fit_multiresolution(long_data, mle_regression):
+    y, X = long_data
+    model = UnobservedComponents(y, level='llevel', exog=X,
+                                 freq_seasonal=[{'period': 7}],
+                                 mle_regression=mle_regression)
+    bounds = [(None, None)] * len(model.param_names)
+    bounds[1] = (0.1 / 1.2, 0.1 * 1.2)
+    expected = model.fit(bounds=bounds, disp=False)
+    results = fit_multiresolution(model, 7, level_sd=0.1)
+    assert results.model is model
+    assert results.cov_type == 'none'
+    assert results.llf == pytest.approx(expected.llf, abs=1e-2)
+    np.testing.assert_allclose(results.params, expected.params, atol=1e-2)
+
+    results = fit_multiresolution(model, 7, level_sd=0.1, cov_type='opg')
+    assert results.cov_type == 'opg'
+
+    with pytest.raises(ValueError) as excinfo:
+        fit_multiresolution(model, 250)
+    assert str(excinfo.value) == ('Averaging 250 points leaves 8 observations to fit, '
+                                  'fewer than 10.')
+
+    with pytest.raises(ValueError) as excinfo:
+        fit_multiresolution(model, 7, start_params=model.start_params)
+    assert str(excinfo.value) == (
+        'start_params cannot be sent as the coarse fit gives them.')
+
+
+def test_block_means():
+    values = np.arange(12.).reshape(6, 2)
+    values[1, 0] = np.nan
+    values[2:4, 1] = np.nan
+    np.testing.assert_array_equal(_block_means(values, 2),
+                                  [[0, 2], [5, np.nan], [9, 10]])
+    np.testing.assert_array_equal(_block_means(np.arange(6.), 3), [1, 4])
@@ -0,0 +1,91 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module multi.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import mock
+import numpy as np
+import pandas as pd
+import pytest
+
+from causalimpact import CausalImpact
+from causalimpact.multi import MultiCausalImpact
+
+
+@pytest.fixture
+def kpi_data():
+    rs = np.random.RandomState(5)
+    X = 100 + rs.randn(120, 2).cumsum(axis=0)
+    data = pd.DataFrame(X, columns=['x1', 'x2'])
+    data['revenue'] = X.dot([1., .5]) + rs.randn(120)
+    data.loc[90:, 'revenue'] += 5
+    data['orders'] = X.dot([.2, .1]) + rs.randn(120)
+    return data
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_multi_causal_impact(kpi_data, n_jobs):
+    with mock.patch.object(CausalImpact, '_format_input_data',
+                           wraps=CausalImpact._format_input_data,
+                           autospec=True) as format_mock:
+        multi = MultiCausalImpact(kpi_data, [0, 89], [90, 119], ['revenue', 'orders'],
+                                  ['x1', 'x2'], n_jobs=n_jobs)
+    format_mock.assert_called_once()
+    assert list(multi.results) == ['revenue', 'orders']
+    assert list(multi.summary_data.index) == ['revenue', 'orders']
+    assert multi.summary_data.index.name == 'metric'
+    assert multi.summary_data.loc['revenue', 'p_value'] < 0.05
+    assert multi.summary_data.loc['orders', 'p_value'] > 0.05
+
+    for metric, ci in multi.results.items():
+        expected = CausalImpact(kpi_data[[metric, 'x1', 'x2']], [0, 89], [90, 119])
+        np.testing.assert_allclose(ci.trained_model.params,
+                                   expected.trained_model.params)
+        assert ci.mu_sig == expected.mu_sig
+        np.testing.assert_allclose(ci.inferences['preds'], expected.inferences['preds'])
+        assert multi.summary_data.loc[metric, 'actual_average'] == \
+            expected.summary_data.loc['actual', 'average']
+
+
+def test_multi_causal_impact_options(kpi_data):
+    kpi_data.loc[100:, 'orders'] = np.nan
+    multi = MultiCausalImpact(kpi_data, [0, 89], [90, 119], ['revenue', 'orders'],
+                              n_jobs=1, standardize=False, nseasons=[{'period': 7}])
+    ci = multi.results['orders']
+    assert ci.mu_sig is None
+    assert ci.model.exog is None
+    assert ci.model.freq_seasonal_periods == [7]
+
+
+def test_multi_causal_impact_raises(kpi_data):
+    with pytest.raises(ValueError) as excinfo:
+        MultiCausalImpact(kpi_data, [0, 89], [90, 119], [])
+    assert str(excinfo.value) == 'metrics cannot be empty.'
+
+    with pytest.raises(ValueError) as excinfo:
+        MultiCausalImpact(kpi_data, [0, 89], [90, 119], ['revenue', 'visits'], ['x3'])
+    assert str(excinfo.value) == 'visits, x3 not present in input data.'
+
+    kpi_data.loc[3, 'x1'] = np.nan
+    with pytest.raises(ValueError) as excinfo:
+        MultiCausalImpact(kpi_data, [0, 89], [90, 119], ['revenue'], ['x1'])
+    assert str(excinfo.value) == 'Input data cannot have NAN values.'
+
+    kpi_data['orders'] = 1.
+    with pytest.raises(ValueError) as excinfo:
+        MultiCausalImpact(kpi_data, [0, 89], [90, 119], ['revenue', 'orders'])
+    assert str(excinfo.value) == 'Input response cannot be constant.'
@@ -0,0 +1,129 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module parallel.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import mock
+import pytest
+
+from causalimpact import parallel
+from causalimpact.parallel import (THREAD_ENV_VARS, ThreadingPolicy, cpu_count,
+                                   init_worker, limit_threads, plan_workers)
+
+
+def test_cpu_count():
+    assert cpu_count() >= 1
+
+
+@pytest.mark.parametrize('kwargs, expected', [
+    ({}, (8, 1)),
+    ({'n_tasks': 2}, (2, 4)),
+    ({'n_tasks': 3}, (3, 2)),
+    ({'n_jobs': 2}, (2, 4)),
+    ({'n_jobs': 16}, (16, 1)),
+    ({'threads_per_worker': 2}, (4, 2)),
+    ({'threads_per_worker': 16}, (1, 16)),
+    ({'n_jobs': 2, 'threads_per_worker': 1}, (2, 1)),
+    ({'n_tasks': 0}, (1, 8))
+])
+def test_plan_workers(kwargs, expected):
+    assert plan_workers(n_cpus=8, **kwargs) == expected
+
+
+def test_plan_workers_raises():
+    with pytest.raises(ValueError) as excinfo:
+        plan_workers(n_jobs=0)
+    assert str(excinfo.value) == 'n_jobs must be at least 1.'
+
+    with pytest.raises(ValueError) as excinfo:
+        plan_workers(threads_per_worker=0)
+    assert str(excinfo.value) == 'threads_per_worker must be at least 1.'
+
+
+def test_limit_threads():
+    threadpoolctl = pytest.importorskip('threadpoolctl')
+    with limit_threads(1):
+        for pool in threadpoolctl.threadpool_info():
+            assert pool['num_threads'] == 1
+
+
+def test_limit_threads_without_threadpoolctl():
+    with mock.patch.dict('sys.modules', {'threadpoolctl': None}):
+        with limit_threads(1) as limits:
+            assert limits is None
+
+
+def test_init_worker(monkeypatch):
+    for var in THREAD_ENV_VARS:
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(parallel, '_worker_limits', None)
+    init_worker(2)
+    assert all(os.environ[var] == '2' for var in THREAD_ENV_VARS)
+    assert parallel._worker_limits is not None
+    if hasattr(parallel._worker_limits, 'restore_original_limits'):
+        parallel._worker_limits.restore_original_limits()
+
+
+def test_threading_policy():
+    with mock.patch('causalimpact.parallel.cpu_count', return_value=4):
+        policy = ThreadingPolicy(n_tasks=2)
+    assert policy.n_jobs == 2
+    assert policy.threads_per_worker == 2
+    assert policy.initializer is init_worker
+    assert policy.initargs == (2,)
+    assert repr(policy) == 'ThreadingPolicy(n_jobs=2, threads_per_worker=2)'
+
+
+def test_threading_policy_process_executor():
+    policy = ThreadingPolicy(n_jobs=1, threads_per_worker=1)
+    with policy.process_executor() as executor:
+        result = executor.submit(os.getenv, 'OMP_NUM_THREADS').result()
+    assert result == '1'
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_threading_policy_map(ordered):
+    policy = ThreadingPolicy(n_jobs=2, threads_per_worker=1)
+    results = policy.map(os.getenv, ['OMP_NUM_THREADS'] * 3, ordered=ordered)
+    assert list(results) == ['1'] * 3
+
+    with mock.patch.object(ThreadingPolicy, 'local_limits') as limits_mock:
+        results = ThreadingPolicy(n_jobs=1).map(abs, [-1, 2, -3])
+        assert list(results) == [1, 2, 3]
+    limits_mock.assert_called_once_with()
+
+
+def test_threading_policy_local_limits():
+    with mock.patch('causalimpact.parallel.limit_threads') as limit_mock:
+        ThreadingPolicy(n_jobs=1).local_limits()
+        limit_mock.assert_not_called()
+        ThreadingPolicy(n_jobs=1, threads_per_worker=2).local_limits()
+        limit_mock.assert_called_once_with(2)
+
+
+def test_threading_policy_map_custom_initializer():
+    policy = ThreadingPolicy(n_jobs=2, threads_per_worker=1)
+    with mock.patch('causalimpact.parallel.multiprocessing.Pool') as pool_mock:
+        pool_mock.return_value.imap_unordered.return_value = [1]
+        results = policy.map(abs, [-1], ordered=False, initializer=os.getenv,
+                             initargs=('a',))
+        assert list(results) == [1]
+    pool_mock.assert_called_once_with(2, initializer=os.getenv, initargs=('a',))
+    pool_mock.return_value.close.assert_called_once_with()
+    pool_mock.return_value.join.assert_called_once_with()
@@ -0,0 +1,106 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module periods.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from causalimpact.periods import PeriodResolver, parse_index
+
+
+def test_parse_index():
+    dates = pd.date_range('2018-01-01', periods=40, freq='D')
+    for date_format in ['%Y%m%d %H:%M', '%m/%d/%Y %H:%M', '%d/%m/%Y %H:%M']:
+        index = pd.Index(dates.strftime(date_format))
+        pd.testing.assert_index_equal(parse_index(index), dates)
+        pd.testing.assert_index_equal(parse_index(index, date_format), dates)
+
+    index = pd.Index(['2018-01-01', '2018-01-02 10:00'])
+    pd.testing.assert_index_equal(parse_index(index), pd.DatetimeIndex(
+        ['2018-01-01', '2018-01-02 10:00']))
+
+    with pytest.raises(ValueError):
+        parse_index(pd.Index(['0', '60']))
+    with pytest.raises(ValueError):
+        parse_index(pd.Index(['20180101']), '%d/%m/%Y')
+
+
+def test_period_resolver_dates():
+    index = pd.date_range('2018-01-01', periods=100)
+    resolver = PeriodResolver(index)
+    assert resolver.searchable
+    np.testing.assert_array_equal(
+        resolver.resolve_periods([['20180101', pd.Timestamp('20180110')],
+                                  ['2018-01-11', '20180410']]),
+        [[0, 9], [10, 99]]
+    )
+    for point in ['20180411', pd.Timestamp('20171231'), 5, 'abc']:
+        with pytest.raises(ValueError) as excinfo:
+            resolver.positions([point])
+        expected = point.strftime('%Y%m%d') if isinstance(point, pd.Timestamp) else point
+        assert str(excinfo.value) == '{} not present in input data index.'.format(
+            expected)
+
+    resolver = PeriodResolver(index.tz_localize('Europe/Lisbon'))
+    np.testing.assert_array_equal(resolver.positions(['20180102']), [1])
+
+
+def test_period_resolver_dates_in_seconds():
+    index = pd.date_range('2018-01-01', periods=100)
+    if hasattr(index, 'as_unit'):
+        resolver = PeriodResolver(index.as_unit('s'))
+    else:
+        # Indexes are always in nanoseconds before pandas 2.
+        resolver = PeriodResolver(index)
+        resolver._keys, resolver._ns_per_key = index.asi8 // 10 ** 9, 10 ** 9
+    assert resolver._ns_per_key == 10 ** 9
+    np.testing.assert_array_equal(resolver.positions(['20180102', '20180410']), [1, 99])
+    with pytest.raises(ValueError) as excinfo:
+        resolver.positions([pd.Timestamp('2018-01-02 00:00:00.5')])
+    assert str(excinfo.value) == '20180102 not present in input data index.'
+
+
+def test_period_resolver_integers():
+    data = pd.DataFrame(np.random.randn(20, 2), index=range(100, 120))
+    resolver = PeriodResolver(data.index)
+    assert resolver.searchable
+    positions = resolver.positions([100, 105])
+    np.testing.assert_array_equal(positions, [0, 5])
+    pre_data = resolver.take(data, positions)
+    pd.testing.assert_frame_equal(pre_data, data.loc[100:105])
+    assert np.shares_memory(pre_data.values, data.values)
+    for point in [99, '100', 120, 2 ** 64]:
+        with pytest.raises(ValueError) as excinfo:
+            resolver.positions([point])
+        assert str(excinfo.value) == '{} not present in input data index.'.format(point)
+
+
+def test_period_resolver_fallback():
+    data = pd.DataFrame(np.random.randn(4, 2), index=['b', 'a', 'd', 'c'])
+    resolver = PeriodResolver(data.index)
+    assert not resolver.searchable
+    positions = resolver.positions(['a', 'c'])
+    np.testing.assert_array_equal(positions, [1, 3])
+    pd.testing.assert_frame_equal(resolver.take(data, positions), data.iloc[1:4])
+    with pytest.raises(ValueError) as excinfo:
+        resolver.positions(['e'])
+    assert str(excinfo.value) == 'e not present in input data index.'
+
+    assert not PeriodResolver(pd.Index([0, 2, 1])).searchable
+    assert not PeriodResolver(pd.Index([0, 1, 1])).searchable
@@ -0,0 +1,99 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module power.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from causalimpact import CausalImpact
+from causalimpact.power import power_analysis, power_curve
+
+
+@pytest.fixture
+def fitted_ci():
+    rs = np.random.RandomState(3)
+    X = 50 + rs.randn(130).cumsum()
+    y = 1.2 * X + rs.randn(130)
+    data = pd.DataFrame({'y': y, 'X': X}, columns=['y', 'X'])
+    ci = CausalImpact.__new__(CausalImpact)
+    ci._prepare(data, [0, 99], [100, 129], None, 0.05)
+    ci._fit_model()
+    ci.n_sims = 200
+    np.random.seed(1)
+    ci.simulated_y
+    return ci
+
+
+def test_power_curve(fitted_ci):
+    effects = [0, 0.01, 0.03, 0.1]
+    curve, mde = power_curve(fitted_ci, effects, post_lengths=[5, 30])
+    assert list(curve.index) == effects
+    assert list(curve.columns) == [5, 30]
+    assert list(mde.index) == [5, 30]
+    assert (curve.diff().iloc[2:] >= 0).all().all()
+    assert (curve.loc[0.1] == 1).all()
+    assert (curve.loc[0] < 0.2).all()
+
+    # Same decision as the p-value of an analysis whose response had the effect.
+    predicted = np.cumsum(fitted_ci.trained_model.get_forecast(
+        30, exog=fitted_ci.normed_post_data.iloc[:, 1:]).predicted_mean)
+    predicted = predicted.values * fitted_ci.mu_sig[1] + 30 * fitted_ci.mu_sig[0]
+    sums = fitted_ci.simulated_y.sum(axis=1)
+    detected = []
+    for observed in sums + 0.01 * predicted[-1]:
+        signal = min(np.sum(sums > observed), np.sum(sums < observed))
+        detected.append(signal / (fitted_ci.n_sims + 1) < fitted_ci.alpha)
+    assert curve.loc[0.01, 30] == np.mean(detected)
+
+    check, _ = power_curve(fitted_ci, [mde[30], mde[30] * 0.99], post_lengths=[30])
+    assert check.iloc[0, 0] >= 0.8
+    assert check.iloc[1, 0] < 0.8
+
+    absolute, absolute_mde = power_curve(fitted_ci, [1], post_lengths=[30],
+                                         relative=False)
+    np.testing.assert_allclose(absolute_mde[30], mde[30] * predicted[-1] / 30)
+
+
+def test_power_curve_all_lengths(fitted_ci):
+    curve, mde = power_curve(fitted_ci, [0.02], power=0.5)
+    assert list(curve.columns) == list(range(1, 31))
+    assert mde.notnull().all()
+    assert curve.iloc[0, -1] > curve.iloc[0, 0]
+
+
+def test_power_curve_raises(fitted_ci):
+    with pytest.raises(ValueError) as excinfo:
+        power_curve(fitted_ci, [0.1], power=1)
+    assert str(excinfo.value) == 'power must be between 0 and 1.'
+
+    with pytest.raises(ValueError) as excinfo:
+        power_curve(fitted_ci, [0.1], post_lengths=[0, 31])
+    assert str(excinfo.value) == 'post_lengths must be between 1 and 30.'
+
+
+def test_power_analysis():
+    rs = np.random.RandomState(3)
+    X = 50 + rs.randn(130).cumsum()
+    y = 1.2 * X + rs.randn(130)
+    y[100:] = np.nan
+    data = pd.DataFrame({'y': y, 'X': X}, columns=['y', 'X'])
+    curve, mde = power_analysis(data, [0, 99], [100, 129], [0.05],
+                                post_lengths=[10], nseasons=[{'period': 7}])
+    assert curve.shape == (1, 1)
+    assert 0 < mde[10] < 0.05
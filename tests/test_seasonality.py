@@ -0,0 +1,146 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module seasonality.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from causalimpact.seasonality import (candidate_periods, detect_seasonality,
+                                      fourier_leverage, harmonic_statistics,
+                                      noise_spectrum, resolve_harmonics,
+                                      select_harmonics)
+
+
+def seasonal(n_obs, period, amplitudes):
+    t = np.arange(n_obs)
+    return sum(amplitude * np.sin(2 * np.pi * (j + 1) * t / period)
+               for j, amplitude in enumerate(amplitudes))
+
+
+@pytest.fixture
+def yearly():
+    rs = np.random.RandomState(1)
+    level = rs.randn(730).cumsum() * 0.1
+    return level + seasonal(730, 365, [3, 1.5, .9]) + rs.randn(730)
+
+
+def test_harmonic_statistics():
+    rs = np.random.RandomState(0)
+    y = seasonal(100, 10, [2, 0, 1]) + rs.randn(100) * 1e-3
+    energy, p_value = harmonic_statistics(y, 10, 5)
+    assert energy.shape == p_value.shape == (5, 1)
+    np.testing.assert_allclose(energy[:, 0], [2, 0, .5, 0, 0], atol=1e-3)
+    assert (p_value[[0, 2]] < 1e-10).all()
+    assert (p_value[[1, 3, 4]] > 1e-3).all()
+
+    y[[3, 50]] = np.nan
+    energy, _ = harmonic_statistics(np.c_[y, y], 10, 5)
+    np.testing.assert_allclose(energy[:, 1], [2, 0, .5, 0, 0], atol=1e-3)
+
+    # p-values of pure noise are uniform.
+    _, p_value = harmonic_statistics(rs.randn(730, 200), 365, 182)
+    assert np.mean(p_value < .05) == pytest.approx(.05, abs=.01)
+
+
+def test_noise_spectrum():
+    rs = np.random.RandomState(1)
+    design = np.ones((1000, 1))
+    leverage = fourier_leverage(design, np.array([[1e-3]]))
+    assert leverage.shape == (499,)
+    np.testing.assert_allclose(leverage, 0, atol=1e-10)
+
+    white = rs.randn(1000, 2) * [1, 3]
+    noise, dof = noise_spectrum(white - white.mean(axis=0), np.array([.01, .4]),
+                                leverage)
+    np.testing.assert_allclose(noise, [[1, 9], [1, 9]], rtol=.2)
+    assert (dof > 100).all()
+
+    walk = rs.randn(1000).cumsum()[:, None]
+    noise, _ = noise_spectrum(walk - walk.mean(), np.array([.002, .4]), leverage)
+    assert noise[0, 0] > 100 * noise[1, 0]
+
+
+def test_select_harmonics(yearly):
+    rs = np.random.RandomState(1)
+    assert select_harmonics(yearly, 365) == 3
+    assert select_harmonics(rs.randn(730), 365) == 1
+    assert select_harmonics(rs.randn(20), 365) == 1
+
+    y = seasonal(400, 7, [1, .5]) + rs.randn(400)
+    assert select_harmonics(y, 7) == 2
+    assert_array_equal(select_harmonics(np.c_[y, rs.randn(400)], 7), [2, 1])
+
+    X = rs.randn(400, 2)
+    assert select_harmonics(y + X.dot([3, 2]), 7, exog=X) == 2
+
+
+def test_select_harmonics_even_period():
+    rs = np.random.RandomState(2)
+    t = np.arange(600)
+    y = np.sin(2 * np.pi * t / 30) + np.cos(np.pi * t) + rs.randn(600) * .3
+    assert select_harmonics(y, 30) == 15
+
+
+def test_resolve_harmonics(yearly):
+    y = yearly + seasonal(730, 7, [1, .5])
+    nseasons = [{'period': 365, 'harmonics': 'auto'}, {'period': 7, 'harmonics': 'auto'},
+                {'period': 30, 'harmonics': 2}]
+    resolved = resolve_harmonics(y, nseasons)
+    assert resolved == [{'period': 365, 'harmonics': 3}, {'period': 7, 'harmonics': 2},
+                        {'period': 30, 'harmonics': 2}]
+    assert nseasons[0]['harmonics'] == 'auto'
+    assert resolve_harmonics(y, []) == []
+
+
+def test_candidate_periods():
+    rs = np.random.RandomState(3)
+    y = np.c_[seasonal(365, 7, [1, .5]) + seasonal(365, 30, [1]), np.zeros(365)]
+    candidates = candidate_periods(y + rs.randn(365, 2) * .5, 182)
+    assert candidates.shape == (5, 2)
+    assert {7, 30} <= set(candidates[:, 0])
+    assert 7 not in candidates[:, 1] and 30 not in candidates[:, 1]
+
+
+def test_detect_seasonality(yearly):
+    rs = np.random.RandomState(4)
+    level = rs.randn(730, 3).cumsum(axis=0) * .1
+    y = level + rs.randn(730, 3)
+    y[:, 0] += seasonal(730, 7, [1, .5])
+    y[:, 1] += seasonal(730, 7, [1, .5]) + seasonal(730, 30, [1])
+    assert detect_seasonality(y) == [
+        [{'period': 7, 'harmonics': 2}],
+        [{'period': 7, 'harmonics': 2}, {'period': 30, 'harmonics': 1}],
+        []
+    ]
+    assert detect_seasonality(y[:, 0]) == [{'period': 7, 'harmonics': 2}]
+
+    y[[5, 100], 0] = np.nan
+    assert detect_seasonality(pd.DataFrame(y[:, :1])) == [[{'period': 7,
+                                                           'harmonics': 2}]]
+
+    # Given periods are tested from the shortest on, so yearly harmonics don't take
+    # the weekly ones.
+    assert detect_seasonality(yearly + seasonal(730, 7, [1]),
+                              periods=[365, 7, 1000]) == [
+        {'period': 7, 'harmonics': 1}, {'period': 365, 'harmonics': 3}]
+
+    X = rs.randn(730, 1)
+    assert detect_seasonality(y[:, 2] + 3 * X[:, 0], exog=X) == []
+    assert detect_seasonality(rs.randn(3)) == []
@@ -0,0 +1,131 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module selection.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import mock
+import numpy as np
+import pandas as pd
+import pytest
+
+from causalimpact import CausalImpact
+from causalimpact.selection import candidate_grid, select_model
+
+
+@pytest.fixture
+def weekly_data():
+    rs = np.random.RandomState(3)
+    X = 50 + rs.randn(140).cumsum()
+    y = 1.2 * X + rs.randn(140) + 2 * np.sin(2 * np.pi * np.arange(140) / 7)
+    y[105:] += 5
+    return pd.DataFrame({'y': y, 'X': X}, columns=['y', 'X'])
+
+
+def test_candidate_grid():
+    candidates = candidate_grid(nseasons=[[], [{'period': 7}]],
+                                prior_level_sd=[0.01, None])
+    assert candidates == [
+        {'nseasons': [], 'prior_level_sd': 0.01},
+        {'nseasons': [], 'prior_level_sd': None},
+        {'nseasons': [{'period': 7}], 'prior_level_sd': 0.01},
+        {'nseasons': [{'period': 7}], 'prior_level_sd': None}
+    ]
+    assert candidate_grid() == [{}]
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+@pytest.mark.parametrize('criterion', ['aic', 'bic', 'one_step'])
+def test_select_model(weekly_data, n_jobs, criterion):
+    candidates = [{'nseasons': []}, {'nseasons': [{'period': 7}]},
+                  {'nseasons': [{'period': 7}], 'prior_level_sd': None}]
+    with mock.patch.object(CausalImpact, '_format_input_data',
+                           wraps=CausalImpact._format_input_data,
+                           autospec=True) as format_mock:
+        ci, ranking = select_model(weekly_data, [0, 104], [105, 139], candidates,
+                                   criterion=criterion, n_jobs=n_jobs)
+    format_mock.assert_called_once()
+    assert ranking.index[0] in [1, 2]
+    assert ranking[criterion].is_monotonic_increasing
+    assert ranking['error'].isnull().all()
+    assert (ranking['nobs'] == ranking['nobs'].iloc[0]).all()
+    assert list(ranking['k_states'].sort_index()) == [1, 7, 7]
+
+    expected = CausalImpact(weekly_data, [0, 104], [105, 139],
+                            **ranking['candidate'].iloc[0])
+    np.testing.assert_allclose(ci.trained_model.params, expected.trained_model.params)
+    assert ci.model_args['nseasons'] == [{'period': 7}]
+    assert ci.inferences is not None
+    assert ci.p_value < 0.05
+
+
+def test_select_model_pins_mle_regression(weekly_data):
+    candidates = [{'nseasons': []}, {'nseasons': [{'period': 7}]},
+                  {'nseasons': [{'period': 7}], 'mle_regression': False}]
+
+    # "auto" would choose parameters without seasons and states with them.
+    def choose_mle_regression(nobs, k_exog, nseasons, analytic_score):
+        return not nseasons
+
+    with mock.patch('causalimpact.main.choose_mle_regression',
+                    side_effect=choose_mle_regression):
+        ci, ranking = select_model(weekly_data, [0, 104], [105, 139], candidates,
+                                   n_jobs=1, mle_regression='auto')
+    ranking = ranking.sort_index()
+    # The regression coefficient is a parameter of all candidates but the last one.
+    assert list(ranking['k_params']) == [3, 4, 3]
+    assert list(ranking['k_states']) == [1, 7, 8]
+
+
+def test_select_model_failed_candidates(weekly_data):
+    candidates = [{'nseasons': [{'period': 7}]}, {'prior_level_sd': 0.01}]
+    original = CausalImpact._fit_model
+
+    def _fit_model(self):
+        if self.model_args['nseasons']:
+            raise np.linalg.LinAlgError('singular matrix')
+        return original(self)
+
+    with mock.patch.object(CausalImpact, '_fit_model', _fit_model):
+        ci, ranking = select_model(weekly_data, [0, 104], [105, 139], candidates,
+                                   n_jobs=1)
+        assert list(ranking.index) == [1, 0]
+        assert ranking['error'][0] == 'LinAlgError: singular matrix'
+        assert np.isnan(ranking['aic'][0])
+        assert ci.model_args['nseasons'] == []
+
+        with pytest.raises(ValueError) as excinfo:
+            select_model(weekly_data, [0, 104], [105, 139], candidates[:1], n_jobs=1)
+        assert str(excinfo.value) == ('No candidate could be fitted: LinAlgError: '
+                                      'singular matrix')
+
+
+def test_select_model_raises(weekly_data):
+    with pytest.raises(ValueError) as excinfo:
+        select_model(weekly_data, [0, 104], [105, 139], [])
+    assert str(excinfo.value) == 'candidates cannot be empty.'
+
+    with pytest.raises(ValueError) as excinfo:
+        select_model(weekly_data, [0, 104], [105, 139], [{'standardize': False}])
+    assert 'standardize must be the same for all candidates' in str(excinfo.value)
+
+    with pytest.raises(ValueError) as excinfo:
+        select_model(weekly_data, [0, 104], [105, 139], [{}], criterion='llf')
+    assert str(excinfo.value) == 'criterion must be one of aic, bic, hqic, one_step.'
+
+    with pytest.raises(ValueError) as excinfo:
+        select_model(weekly_data, [0, 104], [105, 139], [{'nseasons': [{'p': 7}]}])
+    assert str(excinfo.value) == 'nseasons dicts must contain the key "period" defined.'
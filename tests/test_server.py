@@ -0,0 +1,197 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module server.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import threading
+from concurrent.futures import Future
+
+import mock
+import numpy as np
+import pytest
+
+server_module = pytest.importorskip('causalimpact.server')
+
+try:
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+except ImportError:  # pragma: no cover
+    pass
+
+
+@pytest.fixture
+def payload():
+    np.random.seed(1)
+    data = np.random.randn(100, 2)
+    return {
+        'data': {'y': list(data[:, 0]), 'x1': list(data[:, 1])},
+        'pre_period': [0, 69],
+        'post_period': [70, 99],
+        'nseasons': [{'period': 7}]
+    }
+
+
+@pytest.fixture
+def server():
+    server = server_module.make_server(port=0, n_workers=1, batch_window=0.5)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+
+def _request(server, path, body=None):
+    url = 'http://127.0.0.1:{port}{path}'.format(port=server.server_address[1],
+                                                 path=path)
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    try:
+        response = urlopen(Request(url, data=data))
+    except HTTPError as err:
+        return err.code, json.loads(err.read().decode('utf-8'))
+    return response.getcode(), json.loads(response.read().decode('utf-8'))
+
+
+def test_parse_request(payload):
+    request = server_module.parse_request(payload)
+    assert list(request['data'].columns) == ['y', 'x1']
+    assert request['alpha'] == 0.05
+    assert request['kwargs'] == {'nseasons': [{'period': 7}]}
+
+    with pytest.raises(ValueError) as excinfo:
+        server_module.parse_request({'data': [1, 2, 3]})
+    assert str(excinfo.value) == 'pre_period, post_period input cannot be empty'
+
+    payload['model'] = 'llevel'
+    with pytest.raises(ValueError) as excinfo:
+        server_module.parse_request(payload)
+    assert str(excinfo.value) == 'Unknown arguments: model.'
+
+
+def test_structure_key(payload):
+    request = server_module.parse_request(payload)
+    other = server_module.parse_request(dict(payload, pre_period=[0, 59]))
+    assert server_module.structure_key(request) == server_module.structure_key(other)
+    other = server_module.parse_request(dict(payload, nseasons=[]))
+    assert server_module.structure_key(request) != server_module.structure_key(other)
+
+
+def test_analyze_batch_warm_starts(payload):
+    requests = [server_module.parse_request(payload)] * 2
+    requests.append(server_module.parse_request(dict(payload, post_period=[70, 100])))
+    results = server_module.analyze_batch(requests)
+    assert results[0][1] is None and results[1][1] is None
+    assert results[0][0]['summary']['actual'] == results[1][0]['summary']['actual']
+    assert results[2][0] is None
+    assert results[2][1].startswith('ValueError')
+
+
+def test_analyze_batch_mixed_lengths():
+    rs = np.random.RandomState(1)
+    requests = []
+    # With seasons and 2 covariates, the regression of the default model is made of
+    # states for the long series and of parameters for the short one.
+    for n_rows in [300, 12, 300]:
+        data = rs.randn(n_rows, 3)
+        payload = {
+            'data': {'y': list(data[:, 0]), 'x1': list(data[:, 1]),
+                     'x2': list(data[:, 2])},
+            'pre_period': [0, n_rows - 4],
+            'post_period': [n_rows - 3, n_rows - 1],
+            'nseasons': [{'period': 7}]
+        }
+        requests.append(server_module.parse_request(payload))
+    assert len(set(server_module.structure_key(request) for request in requests)) == 1
+    results = server_module.analyze_batch(requests)
+    assert [error for (_, error) in results] == [None] * 3
+
+
+def test_analyze_batch_auto_nseasons():
+    rs = np.random.RandomState(1)
+    weekly = 3 * np.sin(np.arange(200) * 2 * np.pi / 7) + rs.randn(200) * 0.3
+    requests = [
+        server_module.parse_request({
+            'data': {'y': list(y), 'x1': list(rs.randn(200))},
+            'pre_period': [0, 169],
+            'post_period': [170, 199],
+            'nseasons': 'auto'
+        }) for y in [weekly, rs.randn(200)]
+    ]
+    # Both are keyed by "auto" although only the first one has weekly seasonality.
+    assert (server_module.structure_key(requests[0]) ==
+            server_module.structure_key(requests[1]))
+    results = server_module.analyze_batch(requests)
+    assert [error for (_, error) in results] == [None, None]
+
+
+def test_analyze_endpoint_micro_batches(server, payload):
+    results = []
+
+    def post():
+        results.append(_request(server, '/analyze', payload))
+
+    threads = [threading.Thread(target=post) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [status for status, _ in results] == [200] * 3
+    body = results[0][1]
+    assert set(body) == {'summary', 'p_value'}
+    assert set(body['summary']['abs_effect']) == {'average', 'cumulative'}
+
+    status, stats = _request(server, '/stats')
+    assert status == 200
+    assert stats['requests'] == 3
+    assert stats['batches'] == 1
+    assert stats['mean_batch_size'] == 3
+    assert stats['latency_ms']['p95'] > 0
+
+
+def test_service_spreads_groups_over_workers(payload):
+    request = server_module.parse_request(payload)
+    with mock.patch.object(server_module, 'ProcessPoolExecutor') as executor_mock:
+        submit = executor_mock.return_value.submit
+        submit.side_effect = lambda *args: Future()
+        service = server_module.AnalysisService(n_workers=2, batch_window=0.5)
+        for _ in range(5):
+            service.submit(request)
+        service.close()
+    # Same-structure requests are split in one task per worker.
+    assert [len(call[0][1]) for call in submit.call_args_list] == [3, 2]
+    assert service.stats.batches == 2
+
+
+def test_invalid_requests(server, payload):
+    status, body = _request(server, '/analyze', {'data': [1, 2]})
+    assert status == 400
+    assert 'input cannot be empty' in body['error']
+
+    status, body = _request(server, '/analyze', dict(payload, pre_period=[0, 100]))
+    assert status == 400
+    assert body['error'].startswith('ValueError')
+
+    status, _ = _request(server, '/predict', payload)
+    assert status == 404
+    status, _ = _request(server, '/unknown')
+    assert status == 404
+
+    _, stats = _request(server, '/stats')
+    assert stats['errors'] == 1
@@ -0,0 +1,86 @@
+# Copyright 2014 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for module shared.py"""
+
+
+from __future__ import absolute_import, division, print_function
+
+import os
+import pickle
+
+import mock
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.util.testing import assert_frame_equal
+
+from causalimpact.shared import SharedFrame
+
+
+@pytest.fixture
+def data():
+    np.random.seed(1)
+    data = pd.DataFrame(np.random.randn(50, 4), columns=['a', 'b', 'x1', 'x2'])
+    return data.set_index(pd.date_range(start='20180101', periods=len(data)))
+
+
+@pytest.fixture(params=['shm', 'npy'])
+def shared(request, data, tmpdir):
+    if request.param == 'shm':
+        pytest.importorskip('multiprocessing.shared_memory')
+        shared = SharedFrame(data)
+    else:
+        shared = SharedFrame(data, path=str(tmpdir.join('data')))
+    yield shared
+    shared.close()
+
+
+def test_shared_frame_take(shared, data):
+    ref = pickle.loads(pickle.dumps(shared.ref))
+    assert ref.kind in ('shm', 'npy')
+    result = ref.take(slice(10, 20), ['b', 'x1', 'x2'])
+    assert_frame_equal(result, data.iloc[10:20][['b', 'x1', 'x2']])
+    # Contiguous columns are views of the shared matrix.
+    assert np.shares_memory(result.values, ref.values)
+
+    result = ref.take(slice(None), ['a', 'x1', 'x2'])
+    assert_frame_equal(result, data[['a', 'x1', 'x2']])
+    assert not ref.values.flags.writeable
+
+
+def test_shared_frame_reference_is_small(data):
+    pytest.importorskip('multiprocessing.shared_memory')
+    data = pd.DataFrame(np.random.randn(10000, 10))
+    with SharedFrame(data) as shared:
+        assert len(pickle.dumps(shared.ref)) < data.values.nbytes / 100
+
+
+def test_shared_frame_close_removes_file(data, tmpdir):
+    path = str(tmpdir.join('data.npy'))
+    with SharedFrame(data, path=path) as shared:
+        assert os.path.exists(path)
+        shared.ref.values
+    assert not os.path.exists(path)
+
+
+def test_shared_frame_without_shared_memory(data):
+    with mock.patch('causalimpact.shared._get_shared_memory',
+                    side_effect=ImportError('no shared memory')):
+        with SharedFrame(data) as shared:
+            ref = pickle.loads(pickle.dumps(shared.ref))
+            assert ref.kind == 'npy'
+            assert os.path.exists(ref.location)
+            assert_frame_equal(ref.take(slice(None), ['a', 'b']), data[['a', 'b']])
+    assert not os.path.exists(os.path.dirname(ref.location))